@@ -9,6 +9,8 @@
 import psychopy.voicekey
 from psychopy.voicekey import _BaseVoiceKey
 import threading
+from pybelt.clock import clockNs, toNs
+from onsetdetection import ThresholdOnsetDetector, chunkPower
 
 class SoundRecorder(object):
     """
@@ -131,53 +133,48 @@ class _ThresholdDetector(_BaseVoiceKey):
             The threshold for detecting onset.
         """
         super(_ThresholdDetector, self).__init__(
-            file_out=file_out, sec=duration, config={'more_processing': False})
+            file_out=file_out, sec=duration,
+            config={'more_processing': False, 'zero_crossings': False})
         self._sound_recorder = recorder
-        self._threshold_level_onset = threshold_level_onset
-        self._threshold_level_offset = threshold_level_offset
         self._onset_window = onset_window
         self._offset_window = offset_window
         # Event queue
         self._event_queue = event_queue
         # Detection state
-        self._active_onset = False
-        
+        self._onset_detector = ThresholdOnsetDetector(
+            threshold_level_onset, threshold_level_offset, onset_window,
+            offset_window)
+        self._chunk_power = 0.0
+
+    def _process(self, chunk):
+        """Overwrites the chunk statistics of the voice key to keep only the
+        power of the current chunk, instead of lists growing for the whole
+        record.
+        """
+        self._chunk_power = chunkPower(chunk)
+        chunk_max = chunk.max()
+        if chunk_max > self.max_bp:
+            self.max_bp = chunk_max
+            self.max_bp_chunk = self.count
+
     def detect(self):
         """Overwrites the detect method to generate onset and offset events.
         """
-        if (self._active_onset):
-            # Check for offset
-            threshold = self._threshold_level_offset * self.baseline
-            conditions = all([x < threshold for x in 
-                              self.power_bp[-self._offset_window:]])
-            if conditions:
-                # offset event
-                self._active_onset = False
-                event_onset = False
-                event_lag = self._offset_window * self.msPerChunk / 1000.
-                event_elapsed = self.elapsed - event_lag
-                self._event_queue.notifySoundEvent(SoundEvent(
-                    onset=event_onset, 
-                    lag=event_lag,
-                    elapsed=event_elapsed))
+        event_onset = self._onset_detector.process(self._chunk_power,
+                                                   self.baseline)
+        if event_onset is None:
+            return
+        if event_onset:
+            event_lag = self._onset_window * self.msPerChunk / 1000.
         else:
-            # Check for onset
-            if len(self.power_bp) < self._onset_window:
-                # Not enough data
-                return
-            threshold = self._threshold_level_onset * self.baseline
-            conditions = all([x > threshold for x in 
-                              self.power_bp[-self._onset_window:]])
-            if conditions:
-                # onset event
-                self._active_onset = True
-                event_onset = True
-                event_lag = self._onset_window * self.msPerChunk / 1000.
-                event_elapsed = self.elapsed - event_lag
-                self._event_queue.notifySoundEvent(SoundEvent(
-                    onset=event_onset, 
-                    lag=event_lag,
-                    elapsed=event_elapsed))
+            event_lag = self._offset_window * self.msPerChunk / 1000.
+        event_elapsed = self.elapsed - event_lag
+        self._event_queue.notifySoundEvent(SoundEvent(
+            onset=event_onset,
+            lag=event_lag,
+            elapsed=event_elapsed,
+            clock_time=clockNs()-toNs(event_lag)))
+
     def stop(self):
         """Overrides stop method of the recorder to automatically stop the async
         queue.
@@ -189,12 +186,24 @@ class SoundEvent(object):
     """A sound event.
     """
     
-    def __init__(self, onset, lag, elapsed):
+    def __init__(self, onset, lag, elapsed, clock_time=-1):
         """Constructor.
+        
+        Parameters
+        ----------
+        :param bool onset:
+            'True' for an onset event, 'False' for an offset event.
+        :param float lag:
+            Delay in seconds between the event and its detection.
+        :param float elapsed:
+            Time in seconds of the event since the start of the record.
+        :param int clock_time:
+            Clock time in nanoseconds of the event, see :mod:`clock`.
         """
         self.onset = onset
         self.lag = lag
         self.elapsed = elapsed
+        self.clock_time = clock_time
 
 class _AsyncEventQueue(threading.Thread):
     """A queue of events that are processed asynchronously.
@@ -9,6 +9,7 @@
 # Last update: 01.08.2018
 
 from audiocapture import SoundRecorder
+from pybelt.clock import clockNs
 import time
 import csv
 
@@ -32,10 +33,10 @@ def main():
     time.sleep(2)
     # Start record and wait for termination
     print("INFO: Start recording.")
-    call_start_clock_time = time.clock()
+    call_start_clock_time = clockNs()
     recorder.startRecording(filename=AUDIO_RECORD_FILE, 
                             duration=RECORD_DURATION)
-    return_start_clock_time = time.clock()
+    return_start_clock_time = clockNs()
     while (recorder.isRecording()):
         time.sleep(1)
     print("INFO: End of record.")
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+
+# Offline replay of audio records through the onset detector
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+from __future__ import print_function
+import argparse
+import os
+import struct
+import numpy as np
+from onsetdetection import ThresholdOnsetDetector, chunkPower
+
+MS_PER_CHUNK = 2.0
+# Duration of the analysis chunks in milliseconds, as in the voice key
+
+BASELINE_START = 0.035
+# Start in seconds of the baseline period, as in the voice key
+
+BASELINE_END = 0.180
+# End in seconds of the baseline period, as in the voice key
+
+THRESHOLD_LEVEL_ONSET = 150
+# Default threshold level for detecting onset, as in the experiment values
+
+THRESHOLD_LEVEL_OFFSET = 100
+# Default threshold level for detecting offset, as in the experiment values
+
+DETECTION_WINDOW = 25
+# Default number of chunks of the onset and offset conditions
+
+def main():
+    """Replays audio records through the streaming onset detector and through
+    the list-based detector it replaces, and checks that the events are the
+    same.
+
+    The chunks of a record are contiguous, and the baseline becomes available
+    at the end of the baseline period, as with the voice key. The events may
+    differ slightly from those of the live recording, where chunks are not
+    contiguous.
+    """
+    parser = argparse.ArgumentParser(
+        description="Offline replay of audio records through the onset "+
+        "detector.")
+    parser.add_argument('files', nargs='+', help="WAV files of records.")
+    parser.add_argument('--onset-level', type=float,
+                        default=THRESHOLD_LEVEL_ONSET,
+                        help="Threshold level for detecting onset.")
+    parser.add_argument('--offset-level', type=float,
+                        default=THRESHOLD_LEVEL_OFFSET,
+                        help="Threshold level for detecting offset.")
+    parser.add_argument('--onset-window', type=int, default=DETECTION_WINDOW,
+                        help="Number of chunks of the onset condition.")
+    parser.add_argument('--offset-window', type=int, default=DETECTION_WINDOW,
+                        help="Number of chunks of the offset condition.")
+    args = parser.parse_args()
+
+    mismatch_count = 0
+    for filename in args.files:
+        rate, samples = readWav(filename)
+        powers, baselines = chunkPowers(samples, rate)
+        detector = ThresholdOnsetDetector(args.onset_level, args.offset_level,
+                                          args.onset_window,
+                                          args.offset_window)
+        events = replayChunks(detector, powers, baselines)
+        reference_events = _referenceEvents(
+            powers, baselines, args.onset_level, args.offset_level,
+            args.onset_window, args.offset_window)
+        match = (events == reference_events)
+        if not match:
+            mismatch_count += 1
+        print(filename+"\t"+("MATCH" if match else "MISMATCH")+"\t"+
+              str(len(events))+" events")
+        for onset, chunk_idx in events:
+            window = args.onset_window if onset else args.offset_window
+            print("\t"+("onset" if onset else "offset")+"\t"+
+                  "{:.3f}".format(
+                      (chunk_idx-window)*MS_PER_CHUNK/1000.))
+    print("INFO: "+str(len(args.files)-mismatch_count)+"/"+
+          str(len(args.files))+" records match.")
+
+def readWav(filename):
+    """Maps the samples of the first channel of a 16-bit PCM WAV file in
+    memory, without reading the file.
+
+    Return
+    ------
+    :rtype tuple
+        The sample rate and the samples as an int16 array.
+
+    Exception
+    ---------
+    Raises a ValueError if the file is not a 16-bit PCM WAV file.
+    """
+    channels = None
+    with open(filename, 'rb') as fr:
+        header = fr.read(12)
+        if len(header) < 12 or header[:4] != b'RIFF' or header[8:] != b'WAVE':
+            raise ValueError("Not a WAV file: "+filename)
+        # Look for the format and data chunks
+        while True:
+            chunk_header = fr.read(8)
+            if len(chunk_header) < 8:
+                raise ValueError("No data in WAV file: "+filename)
+            chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+            if chunk_id == b'fmt ':
+                fmt = fr.read(chunk_size)
+                (audio_format, channels, rate, _, _,
+                 sample_bits) = struct.unpack('<HHIIHH', fmt[:16])
+                if audio_format != 1 or sample_bits != 16:
+                    raise ValueError("Only 16-bit PCM WAV files are "+
+                                     "supported: "+filename)
+            elif chunk_id == b'data':
+                if channels is None:
+                    raise ValueError("No format in WAV file: "+filename)
+                data_offset = fr.tell()
+                break
+            else:
+                # Chunks have an even size
+                fr.seek(chunk_size+(chunk_size%2), 1)
+    # The size of the data chunk is wrong in unfinished records
+    frame_count = (os.path.getsize(filename)-data_offset)//(2*channels)
+    if frame_count == 0:
+        return (rate, np.zeros(0, dtype='<i2'))
+    samples = np.memmap(filename, dtype='<i2', mode='r', offset=data_offset,
+                        shape=(frame_count, channels))
+    return (rate, samples[:, 0])
+
+def chunkPowers(samples, rate, ms_per_chunk=MS_PER_CHUNK):
+    """Returns the power and the baseline of each chunk of a record.
+
+    The baseline is 0 until the end of the baseline period, then the power of
+    the baseline period in full scale, at least 1, as in the voice key.
+
+    Parameters
+    ----------
+    :param numpy.ndarray samples:
+        The int16 samples of the record.
+    :param int rate:
+        The sample rate.
+    :param float ms_per_chunk:
+        The duration of a chunk in milliseconds.
+
+    Return
+    ------
+    :rtype tuple
+        The arrays of power and baseline by chunk.
+    """
+    chunk_size = int(rate*ms_per_chunk/1000.)
+    chunk_count = len(samples)//chunk_size
+    chunks = samples[:chunk_count*chunk_size].reshape(chunk_count, chunk_size)
+    powers = np.sqrt(np.mean(np.square(chunks, dtype=np.float64), axis=1))
+    baseline = max(chunkPower(
+        samples[int(BASELINE_START*rate):int(BASELINE_END*rate)]/32768.), 1)
+    baselines = np.zeros(chunk_count)
+    baselines[int(np.ceil(BASELINE_END*1000./ms_per_chunk)):] = baseline
+    return (powers, baselines)
+
+def replayChunks(detector, powers, baselines):
+    """Replays chunks through a detector.
+
+    Return
+    ------
+    :rtype list[tuple]
+        The events as (onset, chunk index of the detection) tuples.
+    """
+    events = []
+    for chunk_idx in range(len(powers)):
+        onset = detector.process(powers[chunk_idx], baselines[chunk_idx])
+        if onset is not None:
+            events.append((onset, chunk_idx))
+    return events
+
+def _referenceEvents(powers, baselines, threshold_level_onset,
+                     threshold_level_offset, onset_window, offset_window):
+    """Detects the events with the list-based algorithm of the former
+    detector of the audio capture.
+    """
+    events = []
+    power_bp = []
+    active_onset = False
+    for chunk_idx in range(len(powers)):
+        power_bp.append(powers[chunk_idx])
+        baseline = baselines[chunk_idx]
+        if active_onset:
+            threshold = threshold_level_offset * baseline
+            if all([x < threshold for x in power_bp[-offset_window:]]):
+                active_onset = False
+                events.append((False, chunk_idx))
+        else:
+            if len(power_bp) < onset_window:
+                continue
+            threshold = threshold_level_onset * baseline
+            if all([x > threshold for x in power_bp[-onset_window:]]):
+                active_onset = True
+                events.append((True, chunk_idx))
+    return events
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+#!/usr/bin/env python
+
+# Benchmark of the belt command latency and throughput with a simulated belt
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+from __future__ import print_function
+import argparse
+import heapq
+import os
+import random
+import socket
+import threading
+import tty
+import queue
+from pybelt import classicbelt
+from pybelt.classicbelt import BeltController, BeltConnectionState, BeltMode
+from pybelt.transport import SocketTransport, MemoryTransport
+from pybelt.clock import clockSec, NS_PER_MS
+
+SIMULATED_FIRMWARE_VERSION = 40
+# Firmware version reported by the simulated belt
+
+SIMULATED_VIBRATION_INTENSITY = 50
+# Default vibration intensity reported by the simulated belt
+
+KEEP_ALIVE_PERIOD = 1.0
+# Period in seconds of the keep-alive notifications of the simulated belt
+
+COMMAND_LENGTHS = {0x87: 7, 0x8A: 12}
+# Length of the commands that are not 6 bytes long
+
+BENCHMARK_POSITIONS = [[0], [4], [8], [12]]
+# Vibromotor positions of the benchmark commands
+
+def main():
+    """Connects a belt controller to a simulated belt and measures the
+    command-to-ACK latency, the sustained command rate and the CPU time used by
+    the listener thread.
+
+    The serial link uses a pseudo-terminal and requires a POSIX system. The
+    Bluetooth link uses a socket pair in place of the RFCOMM socket. The memory
+    link has no operating system I/O.
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark of the belt command latency and throughput.")
+    parser.add_argument('--links', default="serial,bt,memory",
+                        help="Comma separated list of links: serial, bt, "+
+                        "memory.")
+    parser.add_argument('--delay', type=float, default=5.0,
+                        help="Processing delay of the simulated belt in ms.")
+    parser.add_argument('--jitter', type=float, default=2.0,
+                        help="Maximum additional random delay in ms.")
+    parser.add_argument('--commands', type=int, default=500,
+                        help="Number of commands of the latency measurement.")
+    parser.add_argument('--duration', type=float, default=5.0,
+                        help="Duration in seconds of the throughput "+
+                        "measurement.")
+    parser.add_argument('--window', type=int, default=16,
+                        help="Number of commands awaited together in the "+
+                        "throughput measurement.")
+    args = parser.parse_args()
+
+    print("INFO: Simulated belt delay "+str(args.delay)+" ms, jitter "+
+          str(args.jitter)+" ms.")
+    print("link\tp50_ms\tp99_ms\tmax_ms\tcmd_per_sec\t"+
+          "listener_cpu_ms\tlistener_cpu_us_per_cmd")
+    for link in args.links.split(','):
+        link = link.strip()
+        if link == 'serial':
+            result = _benchmarkSerial(args)
+        elif link == 'bt':
+            result = _benchmarkSocket(args)
+        elif link == 'memory':
+            result = _benchmarkMemory(args)
+        else:
+            print("ERROR: Unknown link '"+link+"'.")
+            continue
+        if result is not None:
+            _printResult(link, result)
+
+def _benchmarkSerial(args):
+    """Benchmarks the serial link through a pseudo-terminal.
+    """
+    master, slave = os.openpty()
+    # No echo or line processing before the serial port is configured
+    tty.setraw(slave)
+    belt = SimulatedBelt(lambda: os.read(master, 256),
+                         lambda data: os.write(master, data),
+                         args.delay, args.jitter)
+    belt.start()
+    controller = BeltController()
+    try:
+        controller.connectBeltSerial(os.ttyname(slave))
+        return _measure(controller, args)
+    finally:
+        controller.disconnectBelt(True)
+        belt.stop()
+        os.close(master)
+        os.close(slave)
+
+def _benchmarkSocket(args):
+    """Benchmarks the socket transport of Bluetooth with a socket pair.
+    """
+    host_socket, belt_socket = socket.socketpair()
+    belt = SimulatedBelt(lambda: belt_socket.recv(256), belt_socket.sendall,
+                         args.delay, args.jitter)
+    belt.start()
+    controller = BeltController()
+    try:
+        controller.connectBeltTransport(SocketTransport(host_socket))
+        return _measure(controller, args)
+    finally:
+        controller.disconnectBelt(True)
+        belt.stop()
+        belt_socket.close()
+
+def _benchmarkMemory(args):
+    """Benchmarks the in-memory transport.
+    """
+    belt_input = queue.Queue()
+    memory_transport = MemoryTransport(belt_input.put)
+    belt = SimulatedBelt(belt_input.get, memory_transport.receive,
+                         args.delay, args.jitter)
+    belt.start()
+    controller = BeltController()
+    try:
+        controller.connectBeltTransport(memory_transport)
+        return _measure(controller, args)
+    finally:
+        controller.disconnectBelt(True)
+        belt.stop()
+        belt_input.put(b'')
+
+def _measure(controller, args):
+    """Measures the latency and throughput of vibration commands.
+
+    Return
+    ------
+    :rtype dict
+        The round-trip times in ns, the command rate and the CPU time in
+        seconds of the listener thread.
+    """
+    if controller.getBeltConnectionState() != BeltConnectionState.CONNECTED:
+        print("ERROR: Connection to the simulated belt failed.")
+        return None
+    listener = controller._transport._listener
+    cpu_start = _threadCpuTime(listener)
+    # Latency: one command at a time
+    round_trip_times = []
+    for command_idx in range(args.commands):
+        timing = controller.vibrateAtPositions(
+            BENCHMARK_POSITIONS[command_idx%len(BENCHMARK_POSITIONS)], 0,
+            wait_ack=True)
+        round_trip_times.append(timing.getRoundTripTime())
+    # Throughput: windows of commands awaited together
+    command_count = 0
+    start_time = clockSec()
+    while clockSec()-start_time < args.duration:
+        with controller.pipelineAcks(classicbelt.WAIT_ACK_TIMEOUT_SEC):
+            for command_idx in range(args.window):
+                controller.vibrateAtPositions(
+                    BENCHMARK_POSITIONS[command_idx%len(BENCHMARK_POSITIONS)],
+                    0, wait_ack=True)
+        command_count += args.window
+    elapsed = clockSec()-start_time
+    cpu_time = _threadCpuTime(listener)-cpu_start
+    round_trip_times.sort()
+    return {
+        'p50': _percentile(round_trip_times, 0.50),
+        'p99': _percentile(round_trip_times, 0.99),
+        'max': round_trip_times[-1],
+        'commands_per_sec': command_count/elapsed,
+        'listener_cpu_time': cpu_time,
+        'command_count': args.commands+command_count
+        }
+
+def _percentile(sorted_values, fraction):
+    """Returns a percentile of sorted values (nearest rank).
+    """
+    rank = int(round(fraction*(len(sorted_values)-1)))
+    return sorted_values[rank]
+
+def _threadCpuTime(thread):
+    """Returns the CPU time in seconds used by a thread, or by the process if
+    the CPU time of the thread is not available.
+    """
+    native_id = getattr(thread, 'native_id', None)
+    if native_id is not None:
+        try:
+            with open('/proc/self/task/'+str(native_id)+'/stat', 'r') as fr:
+                # Fields after the command name, which may contain spaces
+                fields = fr.read().rsplit(')', 1)[1].split()
+            return ((int(fields[11])+int(fields[12]))/
+                    float(os.sysconf('SC_CLK_TCK')))
+        except (IOError, OSError, ValueError, IndexError):
+            pass
+    cpu_times = os.times()
+    return cpu_times[0]+cpu_times[1]
+
+def _printResult(name, result):
+    """Prints a line of results.
+    """
+    print(name+"\t"+
+          "{:.2f}".format(result['p50']/float(NS_PER_MS))+"\t"+
+          "{:.2f}".format(result['p99']/float(NS_PER_MS))+"\t"+
+          "{:.2f}".format(result['max']/float(NS_PER_MS))+"\t"+
+          "{:.0f}".format(result['commands_per_sec'])+"\t"+
+          str(int(result['listener_cpu_time']*1000))+"\t"+
+          "{:.1f}".format(result['listener_cpu_time']*1000000/
+                          result['command_count']))
+
+class SimulatedBelt(threading.Thread):
+    """Belt simulated on the end point of a link.
+
+    The simulated belt sends keep-alive notifications and acknowledges each
+    command after a delay with a random jitter. Parameter requests are
+    answered with the firmware version, the belt mode and the default
+    intensity of the simulated belt.
+    """
+
+    def __init__(self, read_function, write_function, delay_ms=0.0,
+                 jitter_ms=0.0):
+        """Constructor.
+
+        Parameters
+        ----------
+        :param function read_function:
+            Function without argument that returns the bytes received, and
+            blocks until bytes are available.
+        :param function write_function:
+            Function that writes bytes.
+        :param float delay_ms:
+            The processing delay of commands in milliseconds.
+        :param float jitter_ms:
+            The maximum additional random delay in milliseconds.
+        """
+        threading.Thread.__init__(self, name="SimulatedBelt")
+        self.daemon = True
+        self._read = read_function
+        self._write = write_function
+        self._delay = delay_ms/1000.0
+        self._jitter = jitter_ms/1000.0
+        self._parameters = {
+            0x02: SIMULATED_FIRMWARE_VERSION,
+            0x08: BeltMode.APP_MODE,
+            0x09: SIMULATED_VIBRATION_INTENSITY
+            }
+        # Responses as (clock time, sequence, packet) ordered by time
+        self._responses = []
+        self._responses_condition = threading.Condition()
+        self._response_sequence = 0
+        self._writer = threading.Thread(target=self._writeResponses,
+                                        name="SimulatedBeltWriter")
+        self._writer.daemon = True
+        # Flag for stopping the threads
+        self.stop_flag = False
+
+    def stop(self):
+        """Stops the simulated belt.
+        """
+        self.stop_flag = True
+        with self._responses_condition:
+            self._responses_condition.notify()
+
+    def run(self):
+        """Starts the thread."""
+        self.stop_flag = False
+        self._writer.start()
+        received = bytearray()
+        while not self.stop_flag:
+            try:
+                data = self._read()
+            except (IOError, OSError):
+                break
+            if not data:
+                break
+            received += bytearray(data)
+            # Acknowledge complete commands
+            while len(received) > 0:
+                length = COMMAND_LENGTHS.get(received[0], 6)
+                if len(received) < length:
+                    break
+                command = received[:length]
+                del received[:length]
+                self._acknowledge(command)
+
+    def _acknowledge(self, command):
+        """Schedules the acknowledgment of a command.
+        """
+        if command[0] == 0xF1:
+            # Keep-alive acknowledgment, no response
+            return
+        value = 0x00
+        if command[0] == 0x90:
+            value = self._parameters.get(command[1], 0x00)
+        response = bytes(bytearray([command[0] | 0x40, command[1], value,
+                                    0x00, 0x00, 0x0A]))
+        self._schedule(clockSec()+self._delay+random.uniform(0, self._jitter),
+                       response)
+
+    def _schedule(self, clock_time, packet):
+        """Schedules a packet to send.
+        """
+        with self._responses_condition:
+            self._response_sequence += 1
+            heapq.heappush(self._responses,
+                           (clock_time, self._response_sequence, packet))
+            self._responses_condition.notify()
+
+    def _writeResponses(self):
+        """Writes the scheduled packets and the keep-alive notifications.
+        """
+        next_keep_alive = clockSec()
+        while not self.stop_flag:
+            with self._responses_condition:
+                now = clockSec()
+                if next_keep_alive <= now:
+                    heapq.heappush(self._responses, (
+                        now, 0, bytes(bytearray([0x01, 0x00, BeltMode.APP_MODE,
+                                                 0x00, 0x00, 0x0A]))))
+                    next_keep_alive = now+KEEP_ALIVE_PERIOD
+                due_packets = []
+                while self._responses and self._responses[0][0] <= now:
+                    due_packets.append(heapq.heappop(self._responses)[2])
+                if not due_packets:
+                    wait_until = next_keep_alive
+                    if self._responses:
+                        wait_until = min(wait_until, self._responses[0][0])
+                    self._responses_condition.wait(max(0.0, wait_until-now))
+                    continue
+            try:
+                self._write(b''.join(due_packets))
+            except (IOError, OSError):
+                break
+
+if __name__ == "__main__":
+    main()
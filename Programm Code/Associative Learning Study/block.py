@@ -6,15 +6,20 @@
 
 # Last update: 31.07.2018
 
-import time
+from pybelt.clock import clockNs, getWallClockDriftNs, NS_PER_MS
 from trial import TrialState, Trial, generateTrials
 import json
 import os
-from common import getTimeStamp, eprint, Action
+from common import getTimeStamp, eprint, Action, getActionInputLatency, \
+    getActionClockTime
 import random
 import csv
 from page import Page, PageState
 
+RESPONSE_ACTIONS = (Action.RESPONSE_BLUE, Action.RESPONSE_GREEN,
+                    Action.RESPONSE_RED, Action.RESPONSE_YELLOW)
+# Actions of the responses to trials
+
 class Block:
     """Block of an experiment.
     """
@@ -43,8 +48,9 @@ class Block:
                     eprint("WARNING: Unknown block config entry: "+config_key)
         # Results
         self.result = {
-            'start_trials_clock_time': -1,
-            'stop_trials_clock_time': -1,
+            'start_trials_clock_time_ns': -1,
+            'stop_trials_clock_time_ns': -1,
+            'stop_trials_wall_clock_drift_ns': -1,
             'total_trials': -1,
             'total_trials_completed': -1,
             'correct_responses_count': 0,
@@ -63,6 +69,10 @@ class Block:
         self.active_trial_page_index = -1
         self.active_trial = None
         self.active_page = None
+        self._trial_start_missed_deadlines = 0
+        # Clock time of the start of the active trial
+        self._trial_start_clock_time = 0
+        self._prepared_stimuli = []
         # Trials (generate to test config, then clear)
         self.trials = []
         self.pages = []
@@ -78,6 +88,8 @@ class Block:
         """
         # Generates trials and pages from config
         self._loadTrialsPages()
+        # Renders stimuli before the first trial
+        self._prepareStimuli()
         # Shows first trial or page
         self._startBlock()
     
@@ -89,6 +101,8 @@ class Block:
                 if self.active_trial.state == TrialState.NOT_STARTED:
                     self.active_trial.start()
                 elif self.active_trial.state == TrialState.COMPLETED:
+                    self._recordMissedDeadlines()
+                    self._recordVibrationTiming()
                     self._startNextTrialPage()
                     if self.active_trial_page_index == -1:
                         # Block completed
@@ -118,7 +132,10 @@ class Block:
         elif self.active_page is not None:
             self.active_page.onAction(action)
         elif self.active_trial is not None:
+            self._recordInputLatency(action)
+            response_action = self.active_trial.result.get('response_action')
             self.active_trial.onAction(action)
+            self._recordResponseActionClockTime(action, response_action)
     
     def _startBlock(self):
         if not self.trials_pages:
@@ -133,7 +150,7 @@ class Block:
             # Cancel current page or trial
             self._cancelCurrentTrialPage()
         # Start first page or trial
-        self.result['start_trials_clock_time'] = time.clock()
+        self.result['start_trials_clock_time_ns'] = clockNs()
         self.state = BlockState.TRIALS_PAGES
         self.active_trial_page_index = -1
         self._startNextTrialPage()
@@ -159,11 +176,78 @@ class Block:
         if isinstance(self.trials_pages[self.active_trial_page_index], 
                       Trial):
             self.active_trial = self.trials_pages[self.active_trial_page_index]
+            if self.experiment.frame_clock is not None:
+                self._trial_start_missed_deadlines = (
+                    self.experiment.frame_clock.missed_deadlines)
+            self._trial_start_clock_time = clockNs()
+            self.experiment.visual_stimulus_clock_time = -1
             self.active_trial.start()
         else:
             self.active_page = self.trials_pages[self.active_trial_page_index]
             self.active_page.start()
     
+    def _recordMissedDeadlines(self):
+        """Records the frame deadlines missed during the active trial.
+        """
+        if (self.active_trial is None or
+            self.experiment.frame_clock is None):
+            return
+        self.active_trial.result['missed_frame_deadlines_count'] = (
+            self.experiment.frame_clock.missed_deadlines-
+            self._trial_start_missed_deadlines)
+
+    def _recordVibrationTiming(self):
+        """Records the timing of the belt command of the vibration stimulus of
+        the active trial, and the asynchrony between the estimated vibration
+        onset and the visual stimulus onset.
+        """
+        vibration_timing = self.experiment.vibration_timing
+        if (vibration_timing is None or
+            vibration_timing.getSendClockTime() is None or
+            vibration_timing.getSendClockTime() < self._trial_start_clock_time):
+            return
+        result = self.active_trial.result
+        onset_clock_time, onset_error = (
+            vibration_timing.getActuationClockTime())
+        result['vibration_command_clock_time_ns'] = (
+            vibration_timing.getSendClockTime())
+        result['vibration_ack_clock_time_ns'] = (
+            vibration_timing.getAckClockTime())
+        result['vibration_round_trip_time_ns'] = (
+            vibration_timing.getRoundTripTime())
+        result['estimated_vibration_onset_clock_time_ns'] = onset_clock_time
+        result['estimated_vibration_onset_error_ns'] = onset_error
+        # Display of the visual stimulus, on the same clock as the command
+        visual_clock_time = self.experiment.visual_stimulus_clock_time
+        if visual_clock_time < self._trial_start_clock_time:
+            return
+        result['visual_stimulus_onset_clock_time_ns'] = visual_clock_time
+        result['vibration_visual_asynchrony_ns'] = (
+            vibration_timing.getAsynchrony(visual_clock_time)[0])
+
+    def _recordInputLatency(self, action):
+        """Records the delay between the input event of the first response of
+        the active trial and its handling.
+        """
+        if (action not in RESPONSE_ACTIONS or
+            'response_input_latency_ns' in self.active_trial.result):
+            return
+        input_latency = getActionInputLatency(action)
+        if input_latency is not None:
+            self.active_trial.result['response_input_latency_ns'] = (
+                input_latency)
+
+    def _recordResponseActionClockTime(self, action, previous_response_action):
+        """Records the clock time of the input event of the response action,
+        when the active trial has recorded the action as its response.
+        """
+        result = self.active_trial.result
+        if (action not in RESPONSE_ACTIONS or
+            'response_action_clock_time_ns' in result or
+            result.get('response_action') == previous_response_action):
+            return
+        result['response_action_clock_time_ns'] = getActionClockTime(action)
+
     def _endBlock(self):
         if self.state == BlockState.TRIALS_PAGES:
             # Save partial results if any
@@ -182,6 +266,35 @@ class Block:
         self.trials = []
         self.pages = []
         self.trials_pages = []
+        # Release prepared stimuli
+        self.experiment.releaseStimuli(self._prepared_stimuli)
+        self._prepared_stimuli = []
+
+    def _prepareStimuli(self):
+        """Renders and pins the visual stimuli of all trials, and the
+        fixation and countdown glyphs of the pages.
+        """
+        start_prepare_clock_time = clockNs()
+        self.experiment.releaseStimuli(self._prepared_stimuli)
+        stimuli = []
+        for trial in self.trials:
+            if ('visual_stimulus_text' in trial.config and
+                'visual_stimulus_color' in trial.config):
+                stimuli.append((trial.config['visual_stimulus_text'],
+                                trial.config['visual_stimulus_color']))
+        countdown_max = 0
+        for page in self.pages:
+            if (page.config['page_timeout'] is not None and
+                'countdown_fixation_cross' in page.config['page_gui']):
+                countdown_max = max(countdown_max,
+                                    int(page.config['page_timeout']))
+        self._prepared_stimuli = self.experiment.prepareStimuli(
+            stimuli, countdown_max)
+        print("INFO: Stimuli prepared in "+
+              str((clockNs()-start_prepare_clock_time)//NS_PER_MS)+
+              " ms, "+str(len(self._prepared_stimuli))+" surfaces, "+
+              str(self.experiment.text_cache.getPinnedBytes())+
+              " bytes pinned.")
         
     def _loadTrialsPages(self):
         if self.config['random_seed'] is not None:
@@ -264,6 +377,10 @@ class Block:
             return
         if not self.config['save_results']:
             return
+        # Timing of the active trial, aborted before its completion
+        if self.active_trial is not None:
+            self._recordMissedDeadlines()
+            self._recordVibrationTiming()
         # Check trial completion
         all_trials_completed = (self.trials[-1].state>=TrialState.SUMMARY)
         trials_completed_count = 0
@@ -274,7 +391,8 @@ class Block:
             # No trial to save
             return
         # Compute block results
-        self.result['stop_trials_clock_time'] = time.clock()
+        self.result['stop_trials_clock_time_ns'] = clockNs()
+        self.result['stop_trials_wall_clock_drift_ns'] = getWallClockDriftNs()
         if self.experiment.isBeltConnected():
             self.result['belt_vibration_intensity'] = (
             self.experiment.getVibrationIntensity())
@@ -339,15 +457,25 @@ class Block:
             'stop_visual_stimulus_clock_time',
             'start_vibration_stimulus_clock_time',
             'stop_vibration_stimulus_clock_time',
+            'vibration_command_clock_time_ns',
+            'vibration_ack_clock_time_ns',
+            'vibration_round_trip_time_ns',
+            'estimated_vibration_onset_clock_time_ns',
+            'estimated_vibration_onset_error_ns',
+            'visual_stimulus_onset_clock_time_ns',
+            'vibration_visual_asynchrony_ns',
             'response_clock_time',
             'response_action',
             'response_action_clock_time',
+            'response_action_clock_time_ns',
             'response_sound_onset_clock_time',
             'reaction_time',
             'is_response_correct',
             'average_update_time',
             'max_update_time',
-            'min_update_time'
+            'min_update_time',
+            'missed_frame_deadlines_count',
+            'response_input_latency_ns'
             ]
         trial_results_filename = (self.block_result_folder+time_stamp+
                                  ("_Results_trials.csv" if
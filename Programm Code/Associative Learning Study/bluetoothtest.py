@@ -159,18 +159,16 @@ def main():
             print("Pulse 20-20: 20ms On, 20ms Off, 25 pulses/seconds.")
             if(belt.getBeltMode() != bluetoothbelt.BeltMode.APP_MODE):
                 belt.switchToMode(bluetoothbelt.BeltMode.APP_MODE)
-            with belt._socket_output_lock:
-                #                                            v D     v P
-                belt._socket.send(b'\x8A\x91\x00\x00\x64\xFF\x14\x00\x28\x00\x01\x0A')
+            #                                            v D     v P
+            belt.sendPacket(b'\x8A\x91\x00\x00\x64\xFF\x14\x00\x28\x00\x01\x0A')
 
         elif event.keysym == '2':
             # Pulse 30-30
             print("Pulse 30-30: 30ms On, 30ms Off, 16.6 pulses/seconds.")
             if(belt.getBeltMode() != bluetoothbelt.BeltMode.APP_MODE):
                 belt.switchToMode(bluetoothbelt.BeltMode.APP_MODE)
-            with belt._socket_output_lock:
-                #                                            v D     v P
-                belt._socket.send(b'\x8A\x91\x00\x00\x64\xFF\x1E\x00\x3C\x00\x01\x0A')
+            #                                            v D     v P
+            belt.sendPacket(b'\x8A\x91\x00\x00\x64\xFF\x1E\x00\x3C\x00\x01\x0A')
             
             
         elif event.keysym == '3':
@@ -178,36 +176,32 @@ def main():
             print("Pulse 40-40: 40ms On, 40ms Off, 12.5 pulses/seconds.")
             if(belt.getBeltMode() != bluetoothbelt.BeltMode.APP_MODE):
                 belt.switchToMode(bluetoothbelt.BeltMode.APP_MODE)
-            with belt._socket_output_lock:
-                #                                            v D     v P
-                belt._socket.send(b'\x8A\x91\x00\x00\x64\xFF\x28\x00\x50\x00\x01\x0A')
+            #                                            v D     v P
+            belt.sendPacket(b'\x8A\x91\x00\x00\x64\xFF\x28\x00\x50\x00\x01\x0A')
             
         elif event.keysym == '4':
             # Pulse 50-50
             print("Pulse 50-50: 50ms On, 50ms Off, 10 pulses/seconds.")
             if(belt.getBeltMode() != bluetoothbelt.BeltMode.APP_MODE):
                 belt.switchToMode(bluetoothbelt.BeltMode.APP_MODE)
-            with belt._socket_output_lock:
-                #                                            v D     v P
-                belt._socket.send(b'\x8A\x91\x00\x00\x64\xFF\x32\x00\x64\x00\x01\x0A')
+            #                                            v D     v P
+            belt.sendPacket(b'\x8A\x91\x00\x00\x64\xFF\x32\x00\x64\x00\x01\x0A')
 
         elif event.keysym == '5':
             # Pulse 60-60
             print("Pulse 60-60: 60ms On, 60ms Off, 8.3 pulses/seconds.")
             if(belt.getBeltMode() != bluetoothbelt.BeltMode.APP_MODE):
                 belt.switchToMode(bluetoothbelt.BeltMode.APP_MODE)
-            with belt._socket_output_lock:
-                #                                            v D     v P
-                belt._socket.send(b'\x8A\x91\x00\x00\x64\xFF\x3C\x00\x78\x00\x01\x0A')
+            #                                            v D     v P
+            belt.sendPacket(b'\x8A\x91\x00\x00\x64\xFF\x3C\x00\x78\x00\x01\x0A')
                 
         elif event.keysym == '6':
             # Pulse 60-90
             print("Pulse 60-90: 60ms On, 90ms Off, 6.6 pulses/seconds.")
             if(belt.getBeltMode() != bluetoothbelt.BeltMode.APP_MODE):
                 belt.switchToMode(bluetoothbelt.BeltMode.APP_MODE)
-            with belt._socket_output_lock:
-                #                                            v D     v P
-                belt._socket.send(b'\x8A\x91\x00\x00\x64\xFF\x3C\x00\x96\x00\x01\x0A')
+            #                                            v D     v P
+            belt.sendPacket(b'\x8A\x91\x00\x00\x64\xFF\x3C\x00\x96\x00\x01\x0A')
                 
         
         elif event.keysym == '7':
@@ -215,25 +209,23 @@ def main():
             print("Pulse 60-190: 60ms On, 190ms Off, 4 pulses/seconds.")
             if(belt.getBeltMode() != bluetoothbelt.BeltMode.APP_MODE):
                 belt.switchToMode(bluetoothbelt.BeltMode.APP_MODE)
-            with belt._socket_output_lock:
-                #                                            v D     v P
-                belt._socket.send(b'\x8A\x91\x00\x00\x64\xFF\x3C\x00\xFA\x00\x01\x0A')
+            #                                            v D     v P
+            belt.sendPacket(b'\x8A\x91\x00\x00\x64\xFF\x3C\x00\xFA\x00\x01\x0A')
                 
         elif event.keysym == '8':
             # Single pulse 60
             print("Single pulse 60ms.")
             if(belt.getBeltMode() != bluetoothbelt.BeltMode.APP_MODE):
                 belt.switchToMode(bluetoothbelt.BeltMode.APP_MODE)
-            with belt._socket_output_lock:
-                datePacketSent = datetime.datetime.now()
-                try:
-                    #                                                v I v D     v P
-                    belt._sendAndWait(b'\x8A\x91\x00\x00\x64\x01\x3C\x00\x3C\x00\x00\x0A', 0xCA)
-                except Exception as e:
-                    print(e)
-                dateACKReceived = datetime.datetime.now()
-                delayAckMs = (dateACKReceived-datePacketSent).total_seconds()*1000
-                print("Delay for ACK: "+str(delayAckMs))
+            datePacketSent = datetime.datetime.now()
+            try:
+                #                                                v I v D     v P
+                belt.sendPacket(b'\x8A\x91\x00\x00\x64\x01\x3C\x00\x3C\x00\x00\x0A', True, 0xCA)
+            except Exception as e:
+                print(e)
+            dateACKReceived = datetime.datetime.now()
+            delayAckMs = (dateACKReceived-datePacketSent).total_seconds()*1000
+            print("Delay for ACK: "+str(delayAckMs))
                 
         elif event.keysym == 'z':
             if(belt.getBeltMode() != bluetoothbelt.BeltMode.APP_MODE):
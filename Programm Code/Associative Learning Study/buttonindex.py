@@ -0,0 +1,89 @@
+# Spatial index of the buttons displayed by the experiment.
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+GRID_CELL_SIZE = 64
+# Size in pixels of the cells of the index grid
+
+class ButtonIndex(object):
+    """Uniform grid of button rectangles for hit-testing.
+
+    Each grid cell lists the buttons that overlap the cell, so that finding
+    the button at a position only tests the few buttons of one cell.
+    """
+
+    def __init__(self, cell_size=GRID_CELL_SIZE):
+        """Constructor.
+
+        Parameters
+        ----------
+        :param int cell_size:
+            The size of grid cells in pixels.
+        """
+        self._cell_size = cell_size
+        # Buttons as (action, rect) in drawing order
+        self._buttons = []
+        # Indexes of buttons by cell
+        self._cells = {}
+        # Actions of all buttons
+        self._actions = set()
+
+    def update(self, buttons):
+        """Rebuilds the index if the buttons changed.
+
+        Parameters
+        ----------
+        :param list buttons:
+            List of (action, rect) tuples in drawing order.
+
+        Return
+        ------
+        :rtype bool
+            'True' if the index has been rebuilt.
+        """
+        if buttons == self._buttons:
+            return False
+        self._buttons = list(buttons)
+        self._cells = {}
+        self._actions = set()
+        cell_size = self._cell_size
+        for button_idx in range(len(self._buttons)):
+            action, rect = self._buttons[button_idx]
+            self._actions.add(action)
+            if rect.width <= 0 or rect.height <= 0:
+                continue
+            for cell_x in range(rect.left//cell_size,
+                                (rect.right-1)//cell_size+1):
+                for cell_y in range(rect.top//cell_size,
+                                    (rect.bottom-1)//cell_size+1):
+                    self._cells.setdefault((cell_x, cell_y), []).append(
+                        button_idx)
+        return True
+
+    def find(self, position):
+        """Returns the action of the button at a position, or None.
+        When buttons overlap, the button drawn last is returned.
+
+        Parameters
+        ----------
+        :param tuple position:
+            The position (x, y), e.g. the position of a mouse event.
+        """
+        cell = self._cells.get((position[0]//self._cell_size,
+                                position[1]//self._cell_size))
+        if cell is None:
+            return None
+        for button_idx in reversed(cell):
+            action, rect = self._buttons[button_idx]
+            if rect.collidepoint(position):
+                return action
+        return None
+
+    def hasAction(self, actions):
+        """Returns 'True' if a button has one of the given actions.
+        """
+        return not self._actions.isdisjoint(actions)
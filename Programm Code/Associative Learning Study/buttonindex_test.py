@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+
+# Test of the spatial index of the buttons
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+import unittest
+from pygame.rect import Rect
+from buttonindex import ButtonIndex
+
+class ButtonIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = ButtonIndex(cell_size=64)
+        self.buttons = [
+            ('start', Rect(10, 10, 100, 40)),
+            ('quit', Rect(500, 300, 80, 80)),
+            ('overlay', Rect(90, 30, 50, 50))
+            ]
+        self.index.update(self.buttons)
+
+    def testFind(self):
+        self.assertEqual(self.index.find((20, 20)), 'start')
+        self.assertEqual(self.index.find((579, 379)), 'quit')
+        self.assertIsNone(self.index.find((300, 300)))
+        self.assertIsNone(self.index.find((2000, 2000)))
+
+    def testRectBorders(self):
+        # Right and bottom borders are outside of the rect, as in pygame
+        self.assertEqual(self.index.find((500, 300)), 'quit')
+        self.assertIsNone(self.index.find((580, 300)))
+        self.assertIsNone(self.index.find((500, 380)))
+
+    def testLastDrawnButtonOnTop(self):
+        self.assertEqual(self.index.find((100, 40)), 'overlay')
+
+    def testButtonAcrossCells(self):
+        wide_index = ButtonIndex(cell_size=64)
+        wide_index.update([('wide', Rect(0, 0, 300, 10))])
+        for x in (0, 63, 64, 200, 299):
+            self.assertEqual(wide_index.find((x, 5)), 'wide')
+
+    def testUpdateOnlyWhenButtonsChange(self):
+        self.assertFalse(self.index.update(list(self.buttons)))
+        self.assertTrue(self.index.update(self.buttons[:1]))
+        self.assertIsNone(self.index.find((579, 379)))
+
+    def testEmptyRectIsNotFound(self):
+        self.index.update([('empty', Rect(10, 10, 0, 10))])
+        self.assertIsNone(self.index.find((10, 10)))
+        self.assertTrue(self.index.hasAction(['empty']))
+
+    def testHasAction(self):
+        self.assertTrue(self.index.hasAction(['quit', 'other']))
+        self.assertFalse(self.index.hasAction(['other']))
+
+if __name__ == "__main__":
+    unittest.main()
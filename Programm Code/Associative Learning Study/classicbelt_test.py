@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+
+# Test of the acknowledgments and round-trip time of the belt controller
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+import os
+import select
+import threading
+import tty
+import unittest
+from concurrent.futures import Future
+from pybelt.clock import clockNs, toNs, NS_PER_MS
+from pybelt.classicbelt import (BeltController, CommandTiming,
+                                _RoundTripEstimator, WAIT_ACK_TIMEOUT_SEC,
+                                SERIAL_LOOKUP_REQUEST, findBeltSerialPort,
+                                _testSerialPort)
+
+class RoundTripEstimatorTest(unittest.TestCase):
+
+    def testNoSample(self):
+        estimator = _RoundTripEstimator()
+        self.assertEqual(estimator.getEstimate(), (-1, -1))
+        self.assertEqual(estimator.getTimeout(), -1)
+
+    def testFirstSample(self):
+        estimator = _RoundTripEstimator()
+        estimator.update(8*NS_PER_MS)
+        self.assertEqual(estimator.getEstimate(), (8*NS_PER_MS, 4*NS_PER_MS))
+        self.assertEqual(estimator.getTimeout(), 24*NS_PER_MS)
+
+    def testSmoothing(self):
+        estimator = _RoundTripEstimator()
+        estimator.update(8*NS_PER_MS)
+        estimator.update(16*NS_PER_MS)
+        # 7/8 of 8 ms + 1/8 of 16 ms, and 3/4 of 4 ms + 1/4 of 8 ms
+        self.assertEqual(estimator.getEstimate(), (9*NS_PER_MS, 5*NS_PER_MS))
+
+    def testConstantSamplesConverge(self):
+        estimator = _RoundTripEstimator()
+        for _ in range(100):
+            estimator.update(10*NS_PER_MS)
+        smoothed_rtt, rtt_deviation = estimator.getEstimate()
+        self.assertEqual(smoothed_rtt, 10*NS_PER_MS)
+        self.assertLess(rtt_deviation, NS_PER_MS//1000)
+
+class AckResolutionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.controller = BeltController()
+
+    def _registerSent(self, ack_id, ack_param=None, tracking=False,
+                      send_clock_time=None):
+        ack_future = self.controller._registerAck(ack_id, ack_param, tracking)
+        if send_clock_time is None:
+            send_clock_time = clockNs()
+        ack_future.send_clock_time = send_clock_time
+        return ack_future
+
+    def testOldestAckIsResolvedFirst(self):
+        first = self._registerSent(0xC7)
+        second = self._registerSent(0xC7)
+        self.controller._resolveAck(bytearray([0xC7, 0x00]))
+        self.assertTrue(first.done())
+        self.assertFalse(second.done())
+        self.controller._resolveAck(bytearray([0xC7, 0x00]))
+        self.assertTrue(second.done())
+        self.assertEqual(self.controller._pending_acks, {})
+
+    def testOrderAcrossParameterKeys(self):
+        any_param = self._registerSent(0xD0)
+        with_param = self._registerSent(0xD0, 0x02)
+        self.controller._resolveAck(bytearray([0xD0, 0x02]))
+        self.assertTrue(any_param.done())
+        self.assertFalse(with_param.done())
+        self.controller._resolveAck(bytearray([0xD0, 0x02]))
+        self.assertTrue(with_param.done())
+
+    def testResultAndRoundTripTime(self):
+        ack_future = self._registerSent(0xCA)
+        self.controller._receive_clock_time = (ack_future.send_clock_time+
+                                               6*NS_PER_MS)
+        self.controller._resolveAck(bytearray([0xCA, 0x01]))
+        self.assertEqual(ack_future.result(0), b'\xCA\x01')
+        self.assertEqual(ack_future.ack_clock_time-ack_future.send_clock_time,
+                         6*NS_PER_MS)
+        self.assertEqual(self.controller._round_trip_time.getEstimate()[0],
+                         6*NS_PER_MS)
+
+    def testExpiredTrackedAckIsNotResolved(self):
+        lost = self._registerSent(
+            0xC7, tracking=True,
+            send_clock_time=clockNs()-toNs(WAIT_ACK_TIMEOUT_SEC)-NS_PER_MS)
+        awaited = self._registerSent(0xC7)
+        self.controller._resolveAck(bytearray([0xC7, 0x00]))
+        self.assertTrue(lost.cancelled())
+        self.assertTrue(awaited.done())
+        self.assertFalse(awaited.cancelled())
+
+    def testTrackedAckExpiresWithRoundTripTime(self):
+        self.controller._round_trip_time.update(4*NS_PER_MS)
+        # Timeout of 12 ms from the round-trip time, above the minimum
+        lost = self._registerSent(0xC7, tracking=True,
+                                  send_clock_time=clockNs()-30*NS_PER_MS)
+        awaited = self._registerSent(0xC7)
+        self.controller._resolveAck(bytearray([0xC7, 0x00]))
+        self.assertTrue(lost.cancelled())
+        self.assertTrue(awaited.done())
+
+    def testRecentTrackedAckIsResolved(self):
+        tracked = self._registerSent(0xC7, tracking=True)
+        awaited = self._registerSent(0xC7)
+        self.controller._resolveAck(bytearray([0xC7, 0x00]))
+        self.assertTrue(tracked.done())
+        self.assertFalse(tracked.cancelled())
+        self.assertFalse(awaited.done())
+
+    def testAwaitedAckDoesNotExpire(self):
+        awaited = self._registerSent(
+            0xC7, send_clock_time=clockNs()-toNs(WAIT_ACK_TIMEOUT_SEC)*2)
+        self.controller._resolveAck(bytearray([0xC7, 0x00]))
+        self.assertTrue(awaited.done())
+        self.assertFalse(awaited.cancelled())
+
+    def testUnmatchedAck(self):
+        ack_future = self._registerSent(0xC7)
+        self.controller._resolveAck(bytearray([0xC8, 0x00]))
+        self.assertFalse(ack_future.done())
+
+class CommandTimingTest(unittest.TestCase):
+
+    def _sentCommand(self, send_clock_time, round_trip_time=None):
+        ack_future = Future()
+        ack_future.send_clock_time = send_clock_time
+        ack_future.ack_clock_time = None
+        if round_trip_time is not None:
+            ack_future.ack_clock_time = send_clock_time+round_trip_time
+        return CommandTiming(ack_future, _RoundTripEstimator())
+
+    def testActuationBetweenWriteAndAck(self):
+        timing = self._sentCommand(clockNs(), 8*NS_PER_MS)
+        self.assertEqual(timing.getRoundTripTime(), 8*NS_PER_MS)
+        self.assertEqual(timing.getActuationClockTime(),
+                         (timing.getSendClockTime()+4*NS_PER_MS, 4*NS_PER_MS))
+
+    def testAsynchronyIsInNanoseconds(self):
+        # Visual stimulus displayed 10 ms before the command is written
+        visual_clock_time = clockNs()
+        timing = self._sentCommand(visual_clock_time+10*NS_PER_MS,
+                                   8*NS_PER_MS)
+        self.assertEqual(timing.getAsynchrony(visual_clock_time),
+                         (14*NS_PER_MS, 4*NS_PER_MS))
+
+    def testAsynchronyOfCommandNotWritten(self):
+        timing = self._sentCommand(None)
+        self.assertEqual(timing.getAsynchrony(clockNs()), (None, -1))
+
+class CapabilityRefreshTest(unittest.TestCase):
+
+    def setUp(self):
+        self.controller = BeltController()
+        self.controller._belt_firm_version = 40
+        self.controller._default_vibration_intensity = 50
+        self.controller._cached_capabilities = {
+            'firmware_version': 40, 'default_vibration_intensity': 50}
+        self.ack_future = Future()
+        self.ack_future.set_result(b'\xD0\x02')
+
+    def _refresh(self):
+        """Notifies the refreshed value and waits for the capability worker.
+        """
+        self.controller._onCapabilityRefreshed(self.ack_future)
+        self.controller._capability_executor.shutdown(wait=True)
+
+    def testPacketsAreRebuiltWhenFirmwareChanges(self):
+        compiled = self.controller._getVibrationPackets([4], 0, 50, 0, False)
+        self.controller._belt_firm_version = 20
+        self._refresh()
+        rebuilt = self.controller._getVibrationPackets([4], 0, 50, 0, False)
+        self.assertNotEqual(rebuilt, compiled)
+        self.assertEqual(rebuilt, self.controller._compileVibrationAtPositions(
+            [4], 0, 50, 0, False))
+        self.assertEqual(
+            self.controller._cached_capabilities['firmware_version'], 20)
+
+    def testPacketsAreKeptWhenFirmwareIsUnchanged(self):
+        compiled = self.controller._getVibrationPackets([4], 0, 50, 0, False)
+        self.controller._default_vibration_intensity = 60
+        self._refresh()
+        self.assertIs(
+            self.controller._getVibrationPackets([4], 0, 50, 0, False),
+            compiled)
+
+    def testPacketsAreNotRebuiltByListenerThread(self):
+        threads = []
+        self.controller._rebuildVibrationPackets = (
+            lambda: threads.append(threading.current_thread()))
+        self.controller._belt_firm_version = 20
+        self._refresh()
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.current_thread())
+
+class _PseudoTerminal():
+    """Pseudo-terminal standing in for a device on a serial port.
+    """
+
+    def __init__(self):
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.port_name = os.ttyname(self.slave)
+
+    def close(self):
+        os.close(self.master)
+        os.close(self.slave)
+
+    def read(self, timeout_sec):
+        """Returns the data written by the tested port within the timeout.
+        """
+        data = b''
+        while select.select([self.master], [], [], timeout_sec)[0]:
+            data += os.read(self.master, 64)
+        return data
+
+class SerialPortLookupTest(unittest.TestCase):
+
+    def setUp(self):
+        self.belt = _PseudoTerminal()
+        self.silent = _PseudoTerminal()
+
+    def tearDown(self):
+        self.belt.close()
+        self.silent.close()
+
+    def _answer(self, replies):
+        """Answers each request on the belt port with the next reply.
+        """
+        for reply in replies:
+            request = b''
+            while len(request) < len(SERIAL_LOOKUP_REQUEST):
+                request += os.read(self.belt.master, 64)
+            os.write(self.belt.master, reply)
+
+    def _startBelt(self, replies):
+        belt_thread = threading.Thread(target=self._answer, args=(replies,))
+        belt_thread.daemon = True
+        belt_thread.start()
+        return belt_thread
+
+    def testBeltPortIsFound(self):
+        belt_thread = self._startBelt([b'\xD0\x02\x28\x00\x00\x0A'])
+        self.assertEqual(findBeltSerialPort([self.silent.port_name,
+                                             self.belt.port_name]),
+                         self.belt.port_name)
+        belt_thread.join(1.0)
+        # The request is sent once to the other port
+        self.assertEqual(self.silent.read(0.2), SERIAL_LOOKUP_REQUEST)
+
+    def testRequestIsRepeatedAfterKeepAlive(self):
+        belt_thread = self._startBelt([b'\x01\x00\x00\x00\x00\x0A',
+                                       b'\xD0\x02\x28\x00\x00\x0A'])
+        self.assertTrue(_testSerialPort(self.belt.port_name,
+                                        threading.Event(), 2.0))
+        belt_thread.join(1.0)
+        self.assertFalse(belt_thread.is_alive())
+
+    def testUnframedReplyIsRejected(self):
+        self._startBelt([b'\xD0\xD0\x0A\x55\xD0\x01\x00\x00\x00'])
+        self.assertFalse(_testSerialPort(self.belt.port_name,
+                                         threading.Event(), 0.3))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,6 +9,7 @@
 from __future__ import print_function
 import time
 import sys
+from pybelt.clock import clockNs
 
 class Action:
     """Enumeration of actions from the GUI.
@@ -32,6 +33,18 @@ class Action:
     RESPONSE_YELLOW = "YELLOW"
     CLEAR_CLICK_COUNT = "clear click count"
     
+class TimedAction(str):
+    """Action with the clock time of the input event that triggered it.
+    
+    A timed action compares equal to the action itself, so that it can be
+    handled like any other action.
+    """
+    
+    def __new__(cls, action, clock_time):
+        timed_action = str.__new__(cls, action)
+        timed_action.clock_time = clock_time
+        return timed_action
+    
 class Symbol:
     """Enumeration of symbols used as stimulus in the different modalities.
     """
@@ -50,6 +63,24 @@ def getTimeStamp():
     """
     return time.strftime("%Y-%m-%d_T%H%M%S")
 
+def getActionClockTime(action):
+    """Returns the clock time in nanoseconds of the input event of an action,
+    or the current clock time if the action is not timed.
+    """
+    clock_time = getattr(action, 'clock_time', None)
+    if clock_time is None:
+        return clockNs()
+    return clock_time
+
+def getActionInputLatency(action):
+    """Returns the delay in nanoseconds between the input event of an action
+    and now, or None if the action is not timed.
+    """
+    clock_time = getattr(action, 'clock_time', None)
+    if clock_time is None:
+        return None
+    return clockNs()-clock_time
+
 def eprint(*args, **kwargs):
     print(*args, file=sys.stderr, **kwargs)
     
\ No newline at end of file
@@ -12,7 +12,7 @@
 import threading
 import random
 from audiocapture import SoundRecorder
-from pybelt.classicbelt import BeltController, BeltMode
+from pybelt.classicbelt import BeltController, BeltMode, BeltVibrationPattern
 import pygame
 import json
 from pygame.constants import FULLSCREEN
@@ -20,16 +20,25 @@ import os
 import sys
 import trial
 from session import Session, SessionState
-from common import Action, eprint, Symbol, Language, getTimeStamp
+from common import Action, eprint, Symbol, Language, getTimeStamp, \
+    TimedAction
 from block import BlockState
 from pygame.rect import Rect
 from glyph.glyph import Glyph, Macros
-import time
+from renderer import LayerRenderer
+from frameclock import FrameClock
+from pybelt.clock import clockNs
+from surfacecache import SurfaceCache, textKey
+from layout import Layout, Position
+from buttonindex import ButtonIndex
+from inputevents import InputQueue
+from gamepadinput import GamepadPoller
 from builtins import bytes
 from scipy.linalg.tests.test_fblas import accuracy
 import tkinter
 from tkinter import filedialog
 import csv
+import importlib
 
 
 RESOURCES_FOLDER = "./session_data/"
@@ -37,6 +46,26 @@ DEFAULT_SESSION_FILE_T = "./session_data/session_t.json"
 DEFAULT_SESSION_FILE_C = "./session_data/session_c.json"
 RESULT_FOLDER = "./results/"
 TOUCHSCREEN_MODE = True
+VIBRATION_ACTIONS = {
+    Action.VIBRATION_BLUE: Symbol.BLUE,
+    Action.VIBRATION_GREEN: Symbol.GREEN,
+    Action.VIBRATION_RED: Symbol.RED,
+    Action.VIBRATION_YELLOW: Symbol.YELLOW
+    }
+VIBROMOTOR_INDEX_KEYS = {
+    Symbol.BLUE: 'vibromotor_index_blue',
+    Symbol.GREEN: 'vibromotor_index_green',
+    Symbol.RED: 'vibromotor_index_red',
+    Symbol.YELLOW: 'vibromotor_index_yellow'
+    }
+TEST_VIBRATION_ORDER = [Symbol.BLUE, Symbol.GREEN, Symbol.RED, Symbol.YELLOW]
+TEST_VIBRATION_DURATION = 0.5
+TEST_VIBRATION_ITERATIONS = {
+    Symbol.BLUE: 0x01,
+    Symbol.GREEN: 0x02,
+    Symbol.RED: 0x03,
+    Symbol.YELLOW: 0x04
+    }
 
 class Experiment(threading.Thread):
     """Experiment.
@@ -51,6 +80,16 @@ class Experiment(threading.Thread):
             threshold_level_offset=100)
         # Belt
         self.belt_controller = BeltController(delegate=self)
+        # Precompiled packets of the test vibrations by stimulus
+        self.test_vibration_packets = None
+        # Timing of the last vibration stimulus
+        self.vibration_timing = None
+        # Clock time in ns of the display of the visual stimulus of the active
+        # trial, or -1, and whether the stimulus is drawn but not displayed
+        self.visual_stimulus_clock_time = -1
+        self._visual_stimulus_drawn = False
+        # Timeline of the vibration test
+        self.test_vibration_timeline = None
         # Session
         self.session_file = session_file
         self.mapping_file = mapping_file
@@ -62,7 +101,70 @@ class Experiment(threading.Thread):
         self.stop_flag = False
         self.active_components = []
         self.active_buttons = []
-        self.stored_surfaces_glyphs = {}
+        self.button_index = ButtonIndex()
+        self.ui_renderer = None
+        # Surface and areas drawn by the component being drawn
+        self.canvas = None
+        self.drawn_rects = []
+        # Text displayed by the countdown component
+        self._countdown_text = None
+        self.frame_clock = None
+        self.input_queue = InputQueue()
+        self.gamepad_poller = None
+        self.text_cache = SurfaceCache()
+        # Draw functions by component
+        self.components = {
+            'touch_and_feel_screen':
+                self._draw_touch_and_feel_screen,
+            'fixation_cross':
+                self._draw_fixation_cross,
+            'colored_square_stimulus':
+                self._draw_colored_square_stimulus,
+            'colored_square_answer_trial_summary':
+                self._draw_colored_square_answer_trial_summary,
+            'ordered_color_selection_buttons':
+                self._draw_ordered_color_selection_buttons,
+            'color_selection_trial_summary':
+                self._draw_color_selection_trial_summary,
+            'intermediate_rt_accuracy_summary':
+                self._draw_intermediate_rt_accuracy_summary,
+            'rt_accuracy_summary':
+                self._draw_rt_accuracy_summary,
+            'fixation_microphone':
+                self._draw_fixation_microphone,
+            'fixation_button':
+                self._draw_fixation_button,
+            'logo':
+                self._draw_logo,
+            'colored_color_label':
+                self._draw_colored_color_label,
+            'start_experiment_title_button':
+                self._draw_start_experiment_title_button,
+            'quit_experiment_button':
+                self._draw_quit_experiment_button,
+            'next_command':
+                self._draw_next_command,
+            'retry_command':
+                self._draw_retry_command,
+            'block_list_menu':
+                self._draw_block_list_menu,
+            'connect_test_start_command':
+                self._draw_connect_test_start_command,
+            'setting_commands':
+                self._draw_setting_commands,
+            'back_to_menu_command':
+                self._draw_back_to_menu_command,
+            'block_title':
+                self._draw_block_title,
+            'trials_pause_page':
+                self._draw_trials_pause_page,
+            'countdown_fixation_cross':
+                self._draw_countdown_fixation_cross,
+            'happy_message':
+                self._draw_happy_message
+            }
+        # Draw functions resolved for the displayed components
+        self._component_handles = {}
         self.cursor_visible = True
         self.is_fullscreen = False
         # Default strings
@@ -174,7 +276,12 @@ class Experiment(threading.Thread):
             'minimum_audio_response_duration':  0.100,
             'minimum_touch_and_feel_clicks':    5,
             'color_square_highlight_border':    "#ffffff",
-            'touch_screen_mode':                True
+            'touch_screen_mode':                True,
+            'frame_rate':                       0, # 0 for display rate
+            'frame_spin_budget':                0.0005,
+            'text_cache_max_bytes':             33554432,
+            'gamepad_polling_thread':           0,
+            'gamepad_polling_rate':             1000
             }
         self.results_summary = []
         self.words = []
@@ -195,9 +302,14 @@ class Experiment(threading.Thread):
         self.font_button = None
         self.font_title = None
         # Window area
+        self.layout = Layout()
         self.drawing_rect = None
         self.title_rect = None
         self.description_rect = None
+        self.description_top_rect = None
+        self.description_bottom_rect = None
+        self.description_left_rect = None
+        self.description_right_rect = None
         self.command_rect = None
         # Click count for touch and feel
         self.click_count = None
@@ -210,6 +322,8 @@ class Experiment(threading.Thread):
                 self.belt_controller.connectBeltSerial()
             except:
                 eprint("WARNING: The belt cannot be connected.")
+            if self.isBeltConnected():
+                self.precompileVibrationStimuli()
         else:
             eprint("WARNING: A belt is already connected.")
         if self.cursor_visible:
@@ -219,35 +333,39 @@ class Experiment(threading.Thread):
             pygame.mouse.set_cursor(
                 (8,8), (0,0), (0,0,0,0,0,0,0,0), (0,0,0,0,0,0,0,0))
         # Redraw after connection event
-        self.redraw = True
+        self.invalidateUI()
 
     def testVibration(self):
+        """Plays the vibration of each colour in turn, without blocking the
+        UI.
+        """
         if not self.isBeltConnected():
             return
-        pygame.mouse.set_cursor(*pygame.cursors.diamond)
-        if self.belt_controller.getBeltMode() != BeltMode.APP_MODE:
-            self.belt_controller.switchToMode(BeltMode.APP_MODE)
-        # Vibrate 1 second for each color
-        self.startVibrationStimulus(Symbol.BLUE)
-        time.sleep(0.5)
-        self.stopVibrationStimulus()
-        self.startVibrationStimulus(Symbol.GREEN)
-        time.sleep(0.5)
-        self.stopVibrationStimulus()
-        self.startVibrationStimulus(Symbol.RED)
-        time.sleep(0.5)
-        self.stopVibrationStimulus()
-        self.startVibrationStimulus(Symbol.YELLOW)
-        time.sleep(0.5)
-        self.stopVibrationStimulus()
-        if self.cursor_visible:
-            pygame.mouse.set_cursor(
-                *pygame.cursors.arrow)
-        else:
-            pygame.mouse.set_cursor(
-                (8,8), (0,0), (0,0,0,0,0,0,0,0), (0,0,0,0,0,0,0,0))
-        # Redraw after connection event
-        self.redraw = True
+        self.cancelTestVibration()
+        self.test_vibration_timeline = self.belt_controller.scheduleVibrations(
+            [(i*TEST_VIBRATION_DURATION,
+              [self.values[VIBROMOTOR_INDEX_KEYS[stimulus]]], -1,
+              BeltVibrationPattern.CONTINUOUS,
+              TEST_VIBRATION_DURATION)
+             for i, stimulus in enumerate(TEST_VIBRATION_ORDER)])
+        self.invalidateUI()
+
+    def cancelTestVibration(self):
+        """Cancels the vibration test if it is running.
+        """
+        if self.test_vibration_timeline is not None:
+            self.test_vibration_timeline.cancel()
+            self.test_vibration_timeline = None
+
+    def getGamepadActions(self):
+        """Returns the response actions by gamepad button index.
+        """
+        return {
+            self.values['gamepad_index_blue']: Action.RESPONSE_BLUE,
+            self.values['gamepad_index_green']: Action.RESPONSE_GREEN,
+            self.values['gamepad_index_red']: Action.RESPONSE_RED,
+            self.values['gamepad_index_yellow']: Action.RESPONSE_YELLOW
+            }
 
     def isBeltConnected(self):
         return self.belt_controller.getBeltMode() != BeltMode.UNKNOWN
@@ -262,113 +380,58 @@ class Experiment(threading.Thread):
         if self.belt_controller.getBeltMode() == BeltMode.UNKNOWN:
             eprint("WARNING: No belt connected.")
             return
-        if (stimulus == 'BLUE'):
-            position = int(self.values['vibromotor_index_blue'])
-            packet = bytes([0x8A,
-                            0x91,
-                            position, # Position L
-                            0x00,
-                            0x64, # Intensity
-                            0x01, # Iterations
-                            0xF4, # Duration L
-                            0x01, # Duration H
-                            0xF4, # Period L
-                            0x01, # Period H
-                            0x00,
-                            0x0A])
-            self.belt_controller._socket.send(packet)
-            ## 60ms ->  \x3C
-            ## 100ms -> \x64
-            ## 200ms -> \xC8
-            ## 250ms -> \xFA
-            ## 500ms -> \xF4\x01
-            ##                                                        v I v D     v P
-            self.belt_controller._socket.send(b'\x8A\x91\x00\x00\x64\x01\x64\x00\xFA\x00\x00\x0A')
-        elif (stimulus == 'GREEN'):
-            position = int(self.values['vibromotor_index_green'])
-            packet = bytes([0x8A,
-                            0x91,
-                            position, # Position L
-                            0x00,
-                            0x64, # Intensity
-                            0x01, # Iterations
-                            0xF4, # Duration L
-                            0x01, # Duration H
-                            0xF4, # Period L
-                            0x01, # Period H
-                            0x00,
-                            0x0A])
-            self.belt_controller._socket.send(packet)
-            ##                                                        v I v D     v P
-            self.belt_controller._socket.send(b'\x8A\x91\x00\x00\x64\x02\x64\x00\xFA\x00\x00\x0A')
-        elif (stimulus == 'RED'):
-            position = int(self.values['vibromotor_index_red'])
-            packet = bytes([0x8A,
-                            0x91,
-                            position, # Position L
-                            0x00,
-                            0x64, # Intensity
-                            0x01, # Iterations
-                            0xF4, # Duration L
-                            0x01, # Duration H
-                            0xF4, # Period L
-                            0x01, # Period H
-                            0x00,
-                            0x0A])
-            self.belt_controller._socket.send(packet)
-            ##                                                        v I v D     v P
-            self.belt_controller._socket.send(b'\x8A\x91\x00\x00\x64\x03\x64\x00\xFA\x00\x00\x0A')
-        elif (stimulus == 'YELLOW'):
-            position = int(self.values['vibromotor_index_yellow'])
-            packet = bytes([0x8A,
-                            0x91,
-                            position, # Position L
-                            0x00,
-                            0x64, # Intensity
-                            0x01, # Iterations
-                            0xF4, # Duration L
-                            0x01, # Duration H
-                            0xF4, # Period L
-                            0x01, # Period H
-                            0x00,
-                            0x0A])
-            self.belt_controller._socket.send(packet)
-            ##                                                        v I v D     v P
-            self.belt_controller._socket.send(b'\x8A\x91\x00\x00\x64\x04\x64\x00\xFA\x00\x00\x0A')
-        else:
+        if self.test_vibration_packets is None:
+            self.precompileVibrationStimuli()
+        packets = self.test_vibration_packets.get(stimulus)
+        if packets is None:
             eprint("WARNING: Unknown vibration stimulus.")
+            return
+        self.belt_controller.sendPacket(packets)
 
     def startVibrationStimulus(self, stimulus):
+        """Starts a vibration stimulus, and keeps the timing of the command
+        in 'vibration_timing'.
+        """
         if self.belt_controller.getBeltMode() == BeltMode.UNKNOWN:
             eprint("WARNING: No belt connected.")
             return
-        if (stimulus == 'BLUE'):
-            self.belt_controller.vibrateAtPositions(
-                [self.values['vibromotor_index_blue']], 0)
+        if stimulus not in VIBROMOTOR_INDEX_KEYS:
+            eprint("WARNING: Unknown vibration stimulus.")
+            return
+        self.cancelTestVibration()
+        self.vibration_timing = self.belt_controller.vibrateAtPositions(
+            [self.values[VIBROMOTOR_INDEX_KEYS[stimulus]]])
+
+    def precompileVibrationStimuli(self):
+        """Precompiles the vibration commands of the four colour stimuli.
+        """
+        self.belt_controller.precompileVibrations(
+            [{'indexes': [self.values[key]]}
+             for key in VIBROMOTOR_INDEX_KEYS.values()])
+        self.test_vibration_packets = {}
+        for stimulus, key in VIBROMOTOR_INDEX_KEYS.items():
+            position = int(self.values[key])
             ## 60ms ->  \x3C
             ## 100ms -> \x64
             ## 200ms -> \xC8
             ## 250ms -> \xFA
             ## 500ms -> \xF4\x01
-            ##                                                        v I v D     v P
-            # self.belt_controller._socket.send(b'\x8A\x91\x00\x00\x64\x01\x64\x00\xFA\x00\x00\x0A')
-        elif (stimulus == 'GREEN'):
-            self.belt_controller.vibrateAtPositions(
-                [self.values['vibromotor_index_green']], 0)
-            ##                                                        v I v D     v P
-            # self.belt_controller._socket.send(b'\x8A\x91\x00\x00\x64\x02\x64\x00\xFA\x00\x00\x0A')
-        elif (stimulus == 'RED'):
-            self.belt_controller.vibrateAtPositions(
-                [self.values['vibromotor_index_red']], 0)
-            ##                                                        v I v D     v P
-            # self.belt_controller._socket.send(b'\x8A\x91\x00\x00\x64\x03\x64\x00\xFA\x00\x00\x0A')
-        elif (stimulus == 'YELLOW'):
-            self.belt_controller.vibrateAtPositions(
-                [self.values['vibromotor_index_yellow']], 0)
-            ##                                                        v I v D     v P
-            # self.belt_controller._socket.send(b'\x8A\x91\x00\x00\x64\x04\x64\x00\xFA\x00\x00\x0A')
-        else:
-            eprint("WARNING: Unknown vibration stimulus.")
+            ##                                                v I v D     v P
+            self.test_vibration_packets[stimulus] = bytes([
+                0x8A,
+                0x91,
+                position, # Position L
+                0x00,
+                0x64, # Intensity
+                0x01, # Iterations
+                0xF4, # Duration L
+                0x01, # Duration H
+                0xF4, # Period L
+                0x01, # Period H
+                0x00,
+                0x0A,
+                0x8A, 0x91, 0x00, 0x00, 0x64, TEST_VIBRATION_ITERATIONS[stimulus],
+                0x64, 0x00, 0xFA, 0x00, 0x00, 0x0A])
 
     def stopVibrationStimulus(self):
         if self.belt_controller.getBeltMode() == BeltMode.UNKNOWN:
@@ -376,14 +439,63 @@ class Experiment(threading.Thread):
             return
         self.belt_controller.stopVibration()
 
+    def registerComponent(self, component, draw_function):
+        """Registers a UI component type.
+
+        Parameters
+        ----------
+        :param str component:
+            The component ID, as used in the session configuration.
+        :param function draw_function:
+            Function called with the component ID as argument to draw the
+            component on 'canvas'. The areas drawn must be appended to
+            'drawn_rects'.
+        """
+        self.components[component] = draw_function
+        self._component_handles.pop(component, None)
+        self.invalidateUI(component)
+
+    def _resolveComponent(self, component):
+        """Resolves the draw function of a component and keeps it as handle.
+        Returns None for an unknown component.
+        """
+        draw_function = self.components.get(component)
+        if draw_function is None:
+            if self.getString(component):
+                # Text in the description area
+                draw_function = self._draw_description_text
+            else:
+                eprint("WARNING: Unknown component to draw: "+str(component))
+                return None
+        self._component_handles[component] = draw_function
+        return draw_function
+
+    def _loadComponentModules(self, module_names):
+        """Imports modules that register additional components. Each module
+        must provide a 'registerComponents(experiment)' function.
+        """
+        for module_name in module_names:
+            try:
+                module = importlib.import_module(module_name)
+                module.registerComponents(self)
+            except Exception as e:
+                eprint("ERROR: Unable to load component module: "+
+                       str(module_name))
+                eprint(str(e))
+
     def showUIComponents(self, components):
         if components is None:
             return
         if isinstance(components, (str, unicode)):
             if len(components) > 0:
                 self.active_components.append(components)
+                self._resolveComponent(components)
+                self.invalidateUI(components)
         else:
             self.active_components += components
+            for component in components:
+                self._resolveComponent(component)
+                self.invalidateUI(component)
         self.redraw = True
 
     def clearUIComponents(self, components):
@@ -392,6 +504,7 @@ class Experiment(threading.Thread):
         if isinstance(components, (str, unicode)):
             if components in self.active_components:
                 self.active_components.remove(components)
+                self.invalidateUI(components)
             else:
                 eprint("WARNING: Try to remove nonexistent UI component: "+
                        str(components))
@@ -399,13 +512,72 @@ class Experiment(threading.Thread):
             for component in components:
                 if component in self.active_components:
                     self.active_components.remove(component)
+                    self.invalidateUI(component)
                 else:
                     eprint("WARNING: Try to remove nonexistent UI component: "+
                            str(component))
         self.redraw = True
 
+    def prepareStimuli(self, stimuli, countdown_max=0):
+        """Renders visual stimuli ahead of time and pins them in the text
+        cache.
+
+        Parameters
+        ----------
+        :param list stimuli:
+            List of (text, color symbol) tuples of the visual stimuli.
+        :param int countdown_max:
+            The highest number of seconds displayed by a countdown.
+
+        Return
+        ------
+        :rtype list
+            The keys of the pinned surfaces, to be released with
+            'releaseStimuli'.
+        """
+        if self.font_visual_stimulus is None:
+            # Fonts not loaded
+            return []
+        texts = []
+        background = (
+            self.getColor('color_background') if
+            self.isBeltConnected() else
+            self.getColor('color_background_warning'))
+        for text, color_symbol in stimuli:
+            texts.append((text, self.getColor(color_symbol), background))
+        # Fixation cross and countdown
+        fixation_color = self.getColor('fixation_cross_color')
+        texts.append(("+", fixation_color, None))
+        for remaining in range(1, countdown_max+1):
+            texts.append((str(remaining), fixation_color, None))
+        keys = []
+        for text, color, text_background in texts:
+            if not text or not color:
+                continue
+            self.text_cache.render(text, self.font_visual_stimulus, color,
+                                   text_background)
+            key = textKey(text, self.font_visual_stimulus, color,
+                          text_background)
+            if self.text_cache.pin(key) > 0:
+                keys.append(key)
+        return keys
+
+    def releaseStimuli(self, keys):
+        """Unpins stimuli prepared with 'prepareStimuli'.
+        """
+        for key in keys:
+            self.text_cache.unpin(key)
+
     def clearAllUIComponents(self):
         self.active_components = []
+        self.invalidateUI()
+
+    def invalidateUI(self, component=None):
+        """Requests a redraw of a component, or of the whole screen if no
+        component is given.
+        """
+        if self.ui_renderer is not None:
+            self.ui_renderer.invalidate(component)
         self.redraw = True
 
     def toggleFullscreen(self):
@@ -418,7 +590,23 @@ class Experiment(threading.Thread):
             self.screen = pygame.display.set_mode(
                 (self.values['screen_resolution_x'],
                  self.values['screen_resolution_y']))
-        self.redraw = True
+        self._updateLayout()
+        self.ui_renderer.setScreen(self.screen)
+        self.invalidateUI()
+
+    def _updateLayout(self):
+        """Computes the window areas, and resets the placement of labels.
+        """
+        self.layout.update(self.screen.get_width(), self.screen.get_height(),
+                           self.values)
+        self.drawing_rect = self.layout.drawing_rect
+        self.title_rect = self.layout.title_rect
+        self.description_rect = self.layout.description_rect
+        self.description_top_rect = self.layout.description_top_rect
+        self.description_bottom_rect = self.layout.description_bottom_rect
+        self.description_left_rect = self.layout.description_left_rect
+        self.description_right_rect = self.layout.description_right_rect
+        self.command_rect = self.layout.command_rect
         
     def run(self):
         print("INFO: Start experiment.")
@@ -442,6 +630,7 @@ class Experiment(threading.Thread):
         pygame.init()
         self.load_images(RESOURCES_FOLDER)
         self.load_fonts()
+        self.text_cache.max_bytes = self.values['text_cache_max_bytes']
         if self.is_fullscreen:
             self.screen = pygame.display.set_mode(
                 (self.values['screen_resolution_x'],
@@ -450,66 +639,34 @@ class Experiment(threading.Thread):
             self.screen = pygame.display.set_mode(
                 (self.values['screen_resolution_x'],
                  self.values['screen_resolution_y']))
-        # Window area
-        self.drawing_rect = Rect(
-            self.values['screen_padding_x'],
-            self.values['screen_padding_y'],
-            (self.values['screen_resolution_x']-
-             self.values['screen_padding_x']*2),
-            (self.values['screen_resolution_y']-
-             self.values['screen_padding_y']*2)
-            )
-        self.title_rect = Rect(
-            self.drawing_rect.x,
-            self.drawing_rect.y,
-            self.drawing_rect.width,
-            self.drawing_rect.height/5
-            )
-        self.description_rect = Rect(
-            self.drawing_rect.x,
-            self.drawing_rect.height/5+self.values['margin_y_ui'],
-            self.drawing_rect.width,
-            self.drawing_rect.height/5*3-self.values['margin_y_ui']*2+20
-            )
-        self.description_top_rect = Rect(
-            self.description_rect.x,
-            self.description_rect.y,
-            self.description_rect.width,
-            self.description_rect.height/2
-            )
-        self.description_bottom_rect = Rect(
-            self.description_rect.x,
-            self.description_rect.y+self.description_rect.height/2,
-            self.description_rect.width,
-            self.description_rect.height/2
-            )
-        self.description_left_rect = Rect(
-            self.description_rect.x,
-            self.description_rect.y,
-            self.description_rect.width/2,
-            self.description_rect.height
-            )
-        self.description_right_rect = Rect(
-            self.description_rect.x+self.description_rect.width/2,
-            self.description_rect.y,
-            self.description_rect.width/2,
-            self.description_rect.height
-            )
-        self.command_rect = Rect(
-            self.drawing_rect.x,
-            self.drawing_rect.height/5*4,
-            self.drawing_rect.width/5*4,
-            self.drawing_rect.height/5
-            )
-    
+        self.ui_renderer = LayerRenderer(self.screen)
+        self._updateLayout()
+
+        gamepad_actions = self.getGamepadActions()
+        if self.values['gamepad_polling_thread']:
+            gamepad_poller = GamepadPoller(
+                gamepad_actions, self.values['gamepad_polling_rate'])
+            if gamepad_poller.isAvailable():
+                print("INFO: Start gamepad polling thread.")
+                self.gamepad_poller = gamepad_poller
+                self.gamepad_poller.start()
+            else:
+                # Buttons read from the pygame events
+                print("INFO: Gamepad polling thread not available.")
+
         print("INFO: Start event and update loop.")
+        self.frame_clock = FrameClock(self.values['frame_rate'],
+                                      self.values['frame_spin_budget'])
+        print("INFO: Frame rate: "+str(self.frame_clock.frame_rate)+" Hz.")
         self.stop_flag = False
+        self.frame_clock.start()
         while not self.stop_flag:
             # Events
-            for event in pygame.event.get():
+            for event, event_clock_time in self.input_queue.get():
                 if event.type == pygame.QUIT:
                     if self.session is not None:
-                        self.session.onAction(Action.QUIT)
+                        self.session.onAction(
+                            TimedAction(Action.QUIT, event_clock_time))
                     self.stop_flag = True
                 elif (event.type == pygame.KEYDOWN and
                     event.key == pygame.K_ESCAPE):
@@ -517,14 +674,18 @@ class Experiment(threading.Thread):
                     self.screen = pygame.display.set_mode(
                         (self.values['screen_resolution_x'],
                          self.values['screen_resolution_y']))
-                    self.redraw = True
+                    self._updateLayout()
+                    self.ui_renderer.setScreen(self.screen)
+                    self.invalidateUI()
                 elif (event.type == pygame.KEYDOWN and
                     event.key == pygame.K_f):
                     # Full screen
                     self.screen = pygame.display.set_mode(
                         (self.values['screen_resolution_x'],
                          self.values['screen_resolution_y']), FULLSCREEN)
-                    self.redraw = True
+                    self._updateLayout()
+                    self.ui_renderer.setScreen(self.screen)
+                    self.invalidateUI()
                 elif (event.type == pygame.KEYDOWN and
                       (event.key == pygame.K_c)):
                     # Toggle mouse
@@ -539,132 +700,173 @@ class Experiment(threading.Thread):
                       (event.key == pygame.K_SPACE or
                        event.key == pygame.K_RETURN)):
                     if self.session is not None:
-                        self.session.onAction(Action.NEXT)
+                        self.session.onAction(
+                            TimedAction(Action.NEXT, event_clock_time))
                 elif (event.type == pygame.KEYDOWN and
                       (event.key == pygame.K_q or
                        event.key == pygame.K_BACKSPACE)):
                     if self.session is not None:
-                        self.session.onAction(Action.CANCEL)
+                        self.session.onAction(
+                            TimedAction(Action.CANCEL, event_clock_time))
                 elif (event.type == pygame.KEYDOWN and 
                       (event.key == pygame.K_6)):
                     if self.session is not None:
-                        self.session.onAction(Action.RESPONSE_GREEN)
+                        self.session.onAction(
+                            TimedAction(Action.RESPONSE_GREEN,
+                                        event_clock_time))
                 elif (event.type == pygame.KEYDOWN and 
                       (event.key == pygame.K_5)):
                     if self.session is not None:
-                        self.session.onAction(Action.RESPONSE_RED)
+                        self.session.onAction(
+                            TimedAction(Action.RESPONSE_RED, event_clock_time))
                 elif (event.type == pygame.KEYDOWN and 
                       (event.key == pygame.K_8)):
                     if self.session is not None:
-                        self.session.onAction(Action.RESPONSE_YELLOW)
+                        self.session.onAction(
+                            TimedAction(Action.RESPONSE_YELLOW,
+                                        event_clock_time))
                 elif (event.type == pygame.KEYDOWN and 
                       (event.key == pygame.K_7)):
                     if self.session is not None:
-                        self.session.onAction(Action.RESPONSE_BLUE)
+                        self.session.onAction(
+                            TimedAction(Action.RESPONSE_BLUE,
+                                        event_clock_time))
                 elif (event.type == pygame.MOUSEBUTTONUP and
                       event.button == 1):
                     # Mouse click -> Check active buttons
-                    for button in self.active_buttons:
-                        if button[1].collidepoint(
-                            pygame.mouse.get_pos()):
-                            # Check direct action
-                            if button[0] == Action.QUIT:
-                                if self.session is not None:
-                                    self.session.onAction(Action.QUIT)
-                                self.stop_flag = True
-                            elif button[0] == Action.CONNECT_BELT:
-                                self.connectBelt()
-                            elif button[0] == Action.TEST_VIBRATION:
-                                self.testVibration()
-                            elif button[0] == Action.TOGGLE_FULLSCREEN:
-                                self.toggleFullscreen()
-                            elif button[0] == Action.LOAD_SESSION:
-                                self.loadSession()
-                            elif button[0] == Action.CLEAR_CLICK_COUNT:
-                                self.click_count = None
-                            # Send action to session
-                            elif self.session is not None:
-                                self.session.onAction(button[0])
-                    for button in self.active_buttons:
-                        if (button[0] == Action.VIBRATION_BLUE or
-                            button[0] == Action.VIBRATION_GREEN or
-                            button[0] == Action.VIBRATION_RED or
-                            button[0] == Action.VIBRATION_YELLOW):
-                            # Note: Stop vibration even when mouse is not on
-                            # button to manage mouse position that exists button
-                            # between mouse-down and mouse-up.
-                            if not self.values['touch_screen_mode']:
-                                self.stopVibrationStimulus()
-                            break
+                    action = self.button_index.find(event.pos)
+                    # Check direct action
+                    if action is None:
+                        pass
+                    elif action == Action.QUIT:
+                        if self.session is not None:
+                            self.session.onAction(
+                                TimedAction(Action.QUIT, event_clock_time))
+                        self.stop_flag = True
+                    elif action == Action.CONNECT_BELT:
+                        self.connectBelt()
+                    elif action == Action.TEST_VIBRATION:
+                        self.testVibration()
+                    elif action == Action.TOGGLE_FULLSCREEN:
+                        self.toggleFullscreen()
+                    elif action == Action.LOAD_SESSION:
+                        self.loadSession()
+                    elif action == Action.CLEAR_CLICK_COUNT:
+                        # Clear count and go to next
+                        self.click_count = None
+                        self.invalidateUI('touch_and_feel_screen')
+                        if self.session is not None:
+                            self.session.onAction(
+                                TimedAction(Action.NEXT, event_clock_time))
+                    # Send action to session
+                    elif self.session is not None:
+                        self.session.onAction(
+                            TimedAction(action, event_clock_time))
+                    # Note: Stop vibration even when mouse is not on button to
+                    # manage mouse position that exits button between
+                    # mouse-down and mouse-up.
+                    if (not self.values['touch_screen_mode'] and
+                        self.button_index.hasAction(VIBRATION_ACTIONS)):
+                        self.stopVibrationStimulus()
                 elif (event.type == pygame.MOUSEBUTTONDOWN and
                       event.button == 1):
-                    for button in self.active_buttons:
-                        vibration_symbol = None
-                        if (button[0] == Action.VIBRATION_BLUE and
-                            button[1].collidepoint(pygame.mouse.get_pos())):
-                            vibration_symbol = Symbol.BLUE
-                        if (button[0] == Action.VIBRATION_GREEN and
-                            button[1].collidepoint(pygame.mouse.get_pos())):
-                            vibration_symbol = Symbol.GREEN
-                        if (button[0] == Action.VIBRATION_RED and
-                            button[1].collidepoint(pygame.mouse.get_pos())):
-                            vibration_symbol = Symbol.RED
-                        if (button[0] == Action.VIBRATION_YELLOW and
-                            button[1].collidepoint(pygame.mouse.get_pos())):
-                            vibration_symbol = Symbol.YELLOW
-                        if vibration_symbol is not None:
-                            if self.values['touch_screen_mode']:
-                                self.testVibrationStimulus(vibration_symbol)
-                            else:
-                                self.startVibrationStimulus(vibration_symbol)
-                            # Click count
-                            if self.click_count is None:
-                                self.click_count = {
-                                    Symbol.BLUE: 0,
-                                    Symbol.GREEN: 0,
-                                    Symbol.RED: 0,
-                                    Symbol.YELLOW: 0
-                                    }
-                            self.click_count[vibration_symbol] += 1
-                            self.redraw = True
-                elif (event.type == pygame.JOYBUTTONDOWN):
-                    gamepad_action = None
-                    if event.button == self.values['gamepad_index_blue']:
-                        gamepad_action = Action.RESPONSE_BLUE
-                    elif event.button == self.values['gamepad_index_green']:
-                        gamepad_action = Action.RESPONSE_GREEN
-                    elif event.button == self.values['gamepad_index_red']:
-                        gamepad_action = Action.RESPONSE_RED
-                    elif event.button == self.values['gamepad_index_yellow']:
-                        gamepad_action = Action.RESPONSE_YELLOW
-
+                    vibration_symbol = VIBRATION_ACTIONS.get(
+                        self.button_index.find(event.pos))
+                    if vibration_symbol is not None:
+                        if self.values['touch_screen_mode']:
+                            self.testVibrationStimulus(vibration_symbol)
+                        else:
+                            self.startVibrationStimulus(vibration_symbol)
+                        # Click count
+                        if self.click_count is None:
+                            self.click_count = {
+                                Symbol.BLUE: 0,
+                                Symbol.GREEN: 0,
+                                Symbol.RED: 0,
+                                Symbol.YELLOW: 0
+                                }
+                        self.click_count[vibration_symbol] += 1
+                        self.invalidateUI('touch_and_feel_screen')
+                elif (event.type == pygame.JOYBUTTONDOWN and
+                      self.gamepad_poller is None):
+                    gamepad_action = gamepad_actions.get(event.button)
+                    if (gamepad_action is not None and
+                        self.session is not None):
+                        self.session.onAction(
+                            TimedAction(gamepad_action, event_clock_time))
+            # Gamepad responses from polling thread
+            if self.gamepad_poller is not None:
+                for gamepad_action, press_clock_time in (
+                        self.gamepad_poller.getResponses()):
                     if self.session is not None:
-                        self.session.onAction(gamepad_action)
+                        self.session.onAction(
+                            TimedAction(gamepad_action, press_clock_time))
 
             # Experiment update
             if self.session is not None:
                 self.session.update()
+            self._updateCountdown()
             # Display UI
             if self.redraw and not self.stop_flag:
                 self.redraw = False
                 self.drawUI()
+            # Wait for next frame, polling input events while waiting
+            self.frame_clock.tick(self.input_queue.poll)
+
+        self.frame_clock.stop()
+        if self.gamepad_poller is not None:
+            self.gamepad_poller.stop()
+            if self.gamepad_poller.responses.dropped_count > 0:
+                eprint("WARNING: Gamepad responses dropped: "+
+                       str(self.gamepad_poller.responses.dropped_count)+".")
+            self.gamepad_poller = None
+        print("INFO: Missed frame deadlines: "+
+              str(self.frame_clock.missed_deadlines)+"/"+
+              str(self.frame_clock.frame_count)+".")
+        print("INFO: Text cache hits: "+str(self.text_cache.hits)+
+              ", misses: "+str(self.text_cache.misses)+".")
 
         self._saveMapping()
         self._saveSessionFile()
         self._saveResultsSummary()
+        framer_statistics = self.belt_controller.getFramerStatistics()
+        print("INFO: Belt packets received: "+
+              str(framer_statistics['frames'])+", resyncs: "+
+              str(framer_statistics['resyncs'])+", timeouts: "+
+              str(framer_statistics['timeouts'])+".")
         print("INFO: Disconnect belt.")
         self.belt_controller.disconnectBelt()
         print("INFO: End of the experiment.")
 
     def drawUI(self):
-        self.active_buttons = []
         if self.isBeltConnected():
-            self.screen.fill((0, 0, 0))
+            background = pygame.Color(0, 0, 0)
         else:
-            self.screen.fill(pygame.Color("#240200"))
-        for component in self.active_components:
-            self._draw_component(component)
-        pygame.display.flip()
+            background = pygame.Color("#240200")
+        # Only invalid layers are drawn, and only dirty areas are updated
+        self.active_buttons = self.ui_renderer.render(
+            self.active_components, background, self._draw_layer)
+        if self._visual_stimulus_drawn:
+            # The visual stimulus is displayed by the screen update
+            self._visual_stimulus_drawn = False
+            if self.visual_stimulus_clock_time < 0:
+                self.visual_stimulus_clock_time = clockNs()
+        self.button_index.update(self.active_buttons)
+
+    def _draw_layer(self, component, surface):
+        """Draws a component and returns its buttons and the areas drawn.
+        """
+        self.canvas = surface
+        self.active_buttons = []
+        self.drawn_rects = []
+        self._draw_component(component)
+        return (self.active_buttons, self.drawn_rects)
+
+    def _drawn(self, rect):
+        """Reports an area drawn on 'canvas' by a component and returns it.
+        """
+        self.drawn_rects.append(rect)
+        return rect
 
     def load_strings(self, string_file):
         """Loads the strings from a JSON file.
@@ -724,6 +926,7 @@ class Experiment(threading.Thread):
                 with open(values_file, 'r') as fp:
                     values_data = json.load(fp)
                     self.values.update(values_data)
+                    self.test_vibration_packets = None
 
     def load_words(self, words_file):
         """Loads the words from a JSON file.
@@ -800,6 +1003,8 @@ class Experiment(threading.Thread):
             self.values['title_font'],
             self.values['title_font_size'],
             self.values['title_font_bold'])
+        # Rendered texts refer to the previous fonts
+        self.text_cache.clear()
         Macros['b'] = ('font', self.font_instruction_bold)
         Macros['blue'] = ('color', self.getColor('color_blue'))
         Macros['green'] = ('color', self.getColor('color_green'))
@@ -833,6 +1038,10 @@ class Experiment(threading.Thread):
         if session_config['language'] not in self.strings:
             eprint("ERROR: Unknown language code.")
             return
+        # Additional components of the session
+        self._component_handles = {}
+        if 'component_modules' in session_config:
+            self._loadComponentModules(session_config['component_modules'])
         if not self.session_result_folder:
             self.session_result_folder = "./"
         if not os.path.exists(self.session_result_folder):
@@ -888,181 +1097,74 @@ class Experiment(threading.Thread):
                 writer.writerow(trial_info)
 
     def _draw_component(self, component):
-
-        if component == "touch_and_feel_screen":
-            """ ************************************************************ """
-            """ Touch and feel screen                                        """
-            """ ************************************************************ """
-            # Render colors buttons
-            top_space = int((self.screen.get_height()/2)-
-                         (self.values['margin_y_ui']/2))
-            left_space = int((self.screen.get_height()/2)-
-                          self.values['color_button_width']-
-                          (self.values['margin_x_ui']*1.5))
-            count_blue = 0
-            count_green = 0
-            count_red = 0
-            count_yellow = 0
-            if self.click_count is not None:
-                count_blue = self.click_count[Symbol.BLUE]
-                count_green = self.click_count[Symbol.GREEN]
-                count_red = self.click_count[Symbol.RED]
-                count_yellow = self.click_count[Symbol.YELLOW]
-            colors = [
-                (self.getColor('color_blue'), Action.VIBRATION_BLUE,
-                 count_blue),
-                (self.getColor('color_green'), Action.VIBRATION_GREEN,
-                 count_green),
-                (self.getColor('color_red'), Action.VIBRATION_RED,
-                 count_red),
-                (self.getColor('color_yellow'), Action.VIBRATION_YELLOW,
-                 count_yellow)
-                ]
-            for i in range(4):
-                color_button_rect = Rect(
-                    left_space+i*(self.values['color_button_width']+
-                                  self.values['margin_x_ui']),
-                    top_space,
-                    self.values['color_button_width'],
-                    self.values['color_button_height']
-                    )
-                button = pygame.draw.rect(
-                    self.screen,
-                    colors[i][0],
-                    color_button_rect)
-                self.active_buttons.append(
-                    (colors[i][1], button))
-                if colors[i][2] < self.values['minimum_touch_and_feel_clicks']:
-                    # Draw border when remaining clicks
-                    pygame.draw.rect(
-                        self.screen,
-                        self.getColor('color_square_highlight_border'),
-                        color_button_rect,
-                        1)
-            # Next button only when minimum clicks reached
-            if (count_blue >= self.values['minimum_touch_and_feel_clicks'] and
-                count_green >= self.values['minimum_touch_and_feel_clicks'] and
-                count_red >= self.values['minimum_touch_and_feel_clicks'] and
-                count_yellow >= self.values['minimum_touch_and_feel_clicks']):
-                button_rect = self._render_label(
-                    self.getString('next_button_label'), # Text
-                    self.font_button, # Font
-                    self.getColor('color_button_foreground'), # Foreground color
-                    self.getColor('color_button_background'), # Background color
-                    self.getColor('color_button_decoration'), # Decoration color (or None)
-                    self.values['padding_x_ui'], # Padding x
-                    self.values['padding_y_ui'], # Padding y
-                    self.values['margin_x_ui'], # Margin x
-                    self.values['margin_y_ui'], # Margin y
-                    -1, # Fixed width or -1
-                    -1, # Fixed height or -1
-                    'left', # 'justified', 'left', 'right' or 'center'
-                    Action.NEXT, # Action or None
-                    Position.ALIGN_RIGHT, # Relative position x
-                    Position.CENTER, # Relative position y
-                    self.command_rect # Reference rect
-                    )
-                # Additional action to clear count
-                self.active_buttons.append((Action.CLEAR_CLICK_COUNT,
-                                            button_rect))
-
-        elif component == "fixation_cross":
-            """ ************************************************************ """
-            """ Fixation cross                                               """
-            """ ************************************************************ """
-            self._draw_text("+", self.font_visual_stimulus,
-                            self.getColor('fixation_cross_color'), None)
-
-        elif component == "colored_square_stimulus":
-            """ ************************************************************ """
-            """ Colored rectangle                                            """
-            """ ************************************************************ """
-            if (self.session is None or
-                self.session.active_block is None or
-                self.session.active_block.active_trial is None):
-                eprint("WARNING: No active trial to draw the component.")
-                return
-            visual_stimulus_color = (self.session.active_block
-                .getActiveTrialValue('visual_stimulus_color'))
-            rect_color = None
-            if visual_stimulus_color == Symbol.BLUE:
-                rect_color = self.getColor('color_blue')
-            elif visual_stimulus_color == Symbol.GREEN:
-                rect_color = self.getColor('color_green')
-            elif visual_stimulus_color == Symbol.RED:
-                rect_color = self.getColor('color_red')
-            elif visual_stimulus_color == Symbol.YELLOW:
-                rect_color = self.getColor('color_yellow')
-            else:
-                eprint("WARNING: Unknown color symbol.")
-                return
-            colored_rect = Rect(
-                (self.screen.get_width()/2-
-                 self.values['rectangle_stimulus_width']/2),
-                (self.screen.get_height()/2-
-                 self.values['rectangle_stimulus_height']/2),
-                self.values['rectangle_stimulus_width'],
-                self.values['rectangle_stimulus_height']
-                )
-            pygame.draw.rect(
-                self.screen,
-                rect_color,
-                colored_rect)
-
-        elif (component == "colored_square_answer_trial_summary"):
-            """ ************************************************************ """
-            """ Summary with color square for answer                         """
-            """ ************************************************************ """
-            if (self.session is None or
-                self.session.active_block is None or
-                self.session.active_block.active_trial is None):
-                eprint("WARNING: No active trial to draw the component.")
-                return
-            # Colored square
-            vibration_stimulus_color = (self.session.active_block
-                .getActiveTrialValue('vibration_stimulus'))
-            rect_color = None
-            color_text = None
-            if vibration_stimulus_color == Symbol.BLUE:
-                rect_color = self.getColor('color_blue')
-                color_text = self.getString('BLUE')
-            elif vibration_stimulus_color == Symbol.GREEN:
-                rect_color = self.getColor('color_green')
-                color_text = self.getString('GREEN')
-            elif vibration_stimulus_color == Symbol.RED:
-                rect_color = self.getColor('color_red')
-                color_text = self.getString('RED')
-            elif vibration_stimulus_color == Symbol.YELLOW:
-                rect_color = self.getColor('color_yellow')
-                color_text = self.getString('YELLOW')
-            else:
-                eprint("WARNING: Unknown color symbol.")
-                return
-            colored_rect = Rect(
-                (self.screen.get_width()/2-
-                 self.values['rectangle_stimulus_width']/2),
-                (self.screen.get_height()/2+
-                 self.values['margin_y_ui']),
-                self.values['rectangle_stimulus_width'],
-                self.values['rectangle_stimulus_height']
+        """Draws a component with its resolved draw function.
+        """
+        draw_function = self._component_handles.get(component)
+        if draw_function is None:
+            draw_function = self._resolveComponent(component)
+        if draw_function is not None:
+            draw_function(component)
+
+    def _draw_touch_and_feel_screen(self, component):
+        """Touch and feel screen.
+        """
+        # Render colors buttons
+        top_space = int((self.canvas.get_height()/2)-
+                     (self.values['margin_y_ui']/2))
+        left_space = int((self.canvas.get_height()/2)-
+                      self.values['color_button_width']-
+                      (self.values['margin_x_ui']*1.5))
+        count_blue = 0
+        count_green = 0
+        count_red = 0
+        count_yellow = 0
+        if self.click_count is not None:
+            count_blue = self.click_count[Symbol.BLUE]
+            count_green = self.click_count[Symbol.GREEN]
+            count_red = self.click_count[Symbol.RED]
+            count_yellow = self.click_count[Symbol.YELLOW]
+        colors = [
+            (self.getColor('color_blue'), Action.VIBRATION_BLUE,
+             count_blue),
+            (self.getColor('color_green'), Action.VIBRATION_GREEN,
+             count_green),
+            (self.getColor('color_red'), Action.VIBRATION_RED,
+             count_red),
+            (self.getColor('color_yellow'), Action.VIBRATION_YELLOW,
+             count_yellow)
+            ]
+        for i in range(4):
+            color_button_rect = Rect(
+                left_space+i*(self.values['color_button_width']+
+                              self.values['margin_x_ui']),
+                top_space,
+                self.values['color_button_width'],
+                self.values['color_button_height']
                 )
-            pygame.draw.rect(
-                self.screen,
-                rect_color,
-                colored_rect)
-            # Correct answer label
-            correct_answer_text = (self.getString('correct_answer_label')+
-                                   color_text)
-            background = (
-                    self.getColor('color_background') if
-                    self.isBeltConnected() else
-                    self.getColor('color_background_warning'))
+            button = self._drawn(pygame.draw.rect(
+                self.canvas,
+                colors[i][0],
+                color_button_rect))
+            self.active_buttons.append(
+                (colors[i][1], button))
+            if colors[i][2] < self.values['minimum_touch_and_feel_clicks']:
+                # Draw border when remaining clicks
+                self._drawn(pygame.draw.rect(
+                    self.canvas,
+                    self.getColor('color_square_highlight_border'),
+                    color_button_rect,
+                    1))
+        # Next button only when minimum clicks reached
+        if (count_blue >= self.values['minimum_touch_and_feel_clicks'] and
+            count_green >= self.values['minimum_touch_and_feel_clicks'] and
+            count_red >= self.values['minimum_touch_and_feel_clicks'] and
+            count_yellow >= self.values['minimum_touch_and_feel_clicks']):
             self._render_label(
-                correct_answer_text, # Text
-                self.font_instruction, # Font
-                self.getColor('color_instructions'), # Foreground color
-                background, # Background color
-                None, # Decoration color (or None)
+                self.getString('next_button_label'), # Text
+                self.font_button, # Font
+                self.getColor('color_button_foreground'), # Foreground color
+                self.getColor('color_button_background'), # Background color
+                self.getColor('color_button_decoration'), # Decoration color (or None)
                 self.values['padding_x_ui'], # Padding x
                 self.values['padding_y_ui'], # Padding y
                 self.values['margin_x_ui'], # Margin x
@@ -1070,304 +1172,308 @@ class Experiment(threading.Thread):
                 -1, # Fixed width or -1
                 -1, # Fixed height or -1
                 'left', # 'justified', 'left', 'right' or 'center'
-                None, # Action or None
-                Position.CENTER, # Relative position x
-                Position.TOP, # Relative position y
-                colored_rect # Reference rect
+                Action.CLEAR_CLICK_COUNT, # Action or None (clear and next)
+                Position.ALIGN_RIGHT, # Relative position x
+                Position.CENTER, # Relative position y
+                self.command_rect # Reference rect
                 )
-            # Reaction time
-            """
-            if component == "colored_square_answer_rt_trial_summary":
-                reaction_time_ms = int((self.session.active_block
-                    .getActiveTrialValue('reaction_time')*1000))
-                if reaction_time_ms < 0:
-                    reaction_time_ms = "-"
-                else:
-                    reaction_time_ms = str(reaction_time_ms)
-                reaction_time_text = (self.getString('reaction_time_ms_label')+
-                                       reaction_time_ms)
-                reaction_time_surface = self.font_instruction.render(
-                    reaction_time_text, True,
-                    self.getColor('color_instructions'),
-                    self.getColor('color_background'))
-                reaction_time_rect = Rect(
-                    (self.screen.get_width()/2-
-                    reaction_time_surface.get_width()/2),
-                    (correct_answer_rect.y-
-                     reaction_time_surface.get_height()-
-                     self.values['margin_y_ui']),
-                    reaction_time_surface.get_width(),
-                    reaction_time_surface.get_height()
-                    )
-                self.screen.blit(reaction_time_surface, reaction_time_rect)
-            """
-
-        elif component == "ordered_color_selection_buttons":
-            """ ************************************************************ """
-            """ Buttons to select the answer                                 """
-            """ ************************************************************ """
-            # Render colors buttons
-            top_space = int((self.screen.get_height()/2)-
-                         (self.values['margin_y_ui']/2))
-            left_space = int((self.screen.get_height()/2)-
-                          self.values['color_button_width']-
-                          (self.values['margin_x_ui']*1.5))
-            colors = [
-                (self.getColor('color_blue'), Action.RESPONSE_BLUE),
-                (self.getColor('color_green'), Action.RESPONSE_GREEN),
-                (self.getColor('color_red'), Action.RESPONSE_RED),
-                (self.getColor('color_yellow'), Action.RESPONSE_YELLOW)
-                ]
-            for i in range(4):
-                color_button_rect = Rect(
-                    left_space+i*(self.values['color_button_width']+
-                                  self.values['margin_x_ui']),
-                    top_space,
-                    self.values['color_button_width'],
-                    self.values['color_button_height']
-                    )
-                button = pygame.draw.rect(
-                    self.screen,
-                    colors[i][0],
-                    color_button_rect)
-                self.active_buttons.append(
-                    (colors[i][1], button))
-
-        elif (component == 'color_selection_trial_summary'):
-            """ ************************************************************ """
-            """ Is response correct, and correct button       """
-            """ ************************************************************ """
-            if (self.session is None or
-                self.session.active_block is None or
-                self.session.active_block.active_trial is None):
-                eprint("WARNING: No active trial to draw the component.")
-                return
-            # Trial results
-            vibration_stimulus_color = (self.session.active_block
-                .getActiveTrialValue('vibration_stimulus'))
-            selected_color = (self.session.active_block
-                .getActiveTrialValue('response_action'))
-            is_correct_response = (selected_color == vibration_stimulus_color)
+
+    def _draw_fixation_cross(self, component):
+        """Fixation cross.
+        """
+        self._draw_text("+", self.font_visual_stimulus,
+                        self.getColor('fixation_cross_color'), None)
+
+    def _draw_colored_square_stimulus(self, component):
+        """Colored rectangle.
+        """
+        if (self.session is None or
+            self.session.active_block is None or
+            self.session.active_block.active_trial is None):
+            eprint("WARNING: No active trial to draw the component.")
+            return
+        self._visual_stimulus_drawn = True
+        visual_stimulus_color = (self.session.active_block
+            .getActiveTrialValue('visual_stimulus_color'))
+        rect_color = None
+        if visual_stimulus_color == Symbol.BLUE:
+            rect_color = self.getColor('color_blue')
+        elif visual_stimulus_color == Symbol.GREEN:
+            rect_color = self.getColor('color_green')
+        elif visual_stimulus_color == Symbol.RED:
+            rect_color = self.getColor('color_red')
+        elif visual_stimulus_color == Symbol.YELLOW:
+            rect_color = self.getColor('color_yellow')
+        else:
+            eprint("WARNING: Unknown color symbol.")
+            return
+        colored_rect = Rect(
+            (self.canvas.get_width()/2-
+             self.values['rectangle_stimulus_width']/2),
+            (self.canvas.get_height()/2-
+             self.values['rectangle_stimulus_height']/2),
+            self.values['rectangle_stimulus_width'],
+            self.values['rectangle_stimulus_height']
+            )
+        self._drawn(pygame.draw.rect(
+            self.canvas,
+            rect_color,
+            colored_rect))
+
+    def _draw_colored_square_answer_trial_summary(self, component):
+        """Summary with color square for answer.
+        """
+        if (self.session is None or
+            self.session.active_block is None or
+            self.session.active_block.active_trial is None):
+            eprint("WARNING: No active trial to draw the component.")
+            return
+        # Colored square
+        vibration_stimulus_color = (self.session.active_block
+            .getActiveTrialValue('vibration_stimulus'))
+        rect_color = None
+        color_text = None
+        if vibration_stimulus_color == Symbol.BLUE:
+            rect_color = self.getColor('color_blue')
+            color_text = self.getString('BLUE')
+        elif vibration_stimulus_color == Symbol.GREEN:
+            rect_color = self.getColor('color_green')
+            color_text = self.getString('GREEN')
+        elif vibration_stimulus_color == Symbol.RED:
+            rect_color = self.getColor('color_red')
+            color_text = self.getString('RED')
+        elif vibration_stimulus_color == Symbol.YELLOW:
+            rect_color = self.getColor('color_yellow')
+            color_text = self.getString('YELLOW')
+        else:
+            eprint("WARNING: Unknown color symbol.")
+            return
+        colored_rect = Rect(
+            (self.canvas.get_width()/2-
+             self.values['rectangle_stimulus_width']/2),
+            (self.canvas.get_height()/2+
+             self.values['margin_y_ui']),
+            self.values['rectangle_stimulus_width'],
+            self.values['rectangle_stimulus_height']
+            )
+        self._drawn(pygame.draw.rect(
+            self.canvas,
+            rect_color,
+            colored_rect))
+        # Correct answer label
+        correct_answer_text = (self.getString('correct_answer_label')+
+                               color_text)
+        background = (
+                self.getColor('color_background') if
+                self.isBeltConnected() else
+                self.getColor('color_background_warning'))
+        self._render_label(
+            correct_answer_text, # Text
+            self.font_instruction, # Font
+            self.getColor('color_instructions'), # Foreground color
+            background, # Background color
+            None, # Decoration color (or None)
+            self.values['padding_x_ui'], # Padding x
+            self.values['padding_y_ui'], # Padding y
+            self.values['margin_x_ui'], # Margin x
+            self.values['margin_y_ui'], # Margin y
+            -1, # Fixed width or -1
+            -1, # Fixed height or -1
+            'left', # 'justified', 'left', 'right' or 'center'
+            None, # Action or None
+            Position.CENTER, # Relative position x
+            Position.TOP, # Relative position y
+            colored_rect # Reference rect
+            )
+        # Reaction time
+        """
+        if component == "colored_square_answer_rt_trial_summary":
             reaction_time_ms = int((self.session.active_block
                 .getActiveTrialValue('reaction_time')*1000))
             if reaction_time_ms < 0:
                 reaction_time_ms = "-"
             else:
                 reaction_time_ms = str(reaction_time_ms)
-            correct_button_index = None
-            correct_button_color = None
-            if vibration_stimulus_color == Symbol.BLUE:
-                correct_button_index = 0
-                correct_button_color = self.getColor('color_blue')
-            elif vibration_stimulus_color == Symbol.GREEN:
-                correct_button_index = 1
-                correct_button_color = self.getColor('color_green')
-            elif vibration_stimulus_color == Symbol.RED:
-                correct_button_index = 2
-                correct_button_color = self.getColor('color_red')
-            elif vibration_stimulus_color == Symbol.YELLOW:
-                correct_button_index = 3
-                correct_button_color = self.getColor('color_yellow')
-            # Is response correct label
-            is_correct_response_text = None
-            if is_correct_response:
-                is_correct_response_text = self.getString(
-                    'correct_response_label')
-            else:
-                is_correct_response_text = self.getString(
-                    'wrong_response_label')
-            background = (
-                    self.getColor('color_background') if
-                    self.isBeltConnected() else
-                    self.getColor('color_background_warning'))
-            self._render_label(
-                is_correct_response_text, # Text
-                self.font_instruction, # Font
-                self.getColor('color_instructions'), # Foreground color
-                background, # Background color
-                None, # Decoration color (or None)
-                self.values['padding_x_ui'], # Padding x
-                self.values['padding_y_ui'], # Padding y
-                self.values['margin_x_ui'], # Margin x
-                self.values['margin_y_ui'], # Margin y
-                -1, # Fixed width or -1
-                -1, # Fixed height or -1
-                'left', # 'justified', 'left', 'right' or 'center'
-                None, # Action or None
-                Position.CENTER, # Relative position x
-                Position.ALIGN_BOTTOM, # Relative position y
-                self.description_top_rect # Reference rect
+            reaction_time_text = (self.getString('reaction_time_ms_label')+
+                                   reaction_time_ms)
+            reaction_time_surface = self.font_instruction.render(
+                reaction_time_text, True,
+                self.getColor('color_instructions'),
+                self.getColor('color_background'))
+            reaction_time_rect = Rect(
+                (self.canvas.get_width()/2-
+                reaction_time_surface.get_width()/2),
+                (correct_answer_rect.y-
+                 reaction_time_surface.get_height()-
+                 self.values['margin_y_ui']),
+                reaction_time_surface.get_width(),
+                reaction_time_surface.get_height()
                 )
-            # Reaction time label
-            """
-            if component == 'color_selection_rt_trial_summary':
-                reaction_time_text = (self.getString('reaction_time_ms_label')+
-                                       reaction_time_ms)
-                reaction_time_surface = self.font_instruction.render(
-                    reaction_time_text, True,
-                    self.getColor('color_instructions'),
-                    self.getColor('color_background'))
-                reaction_time_rect = Rect(
-                    (self.screen.get_width()/2-
-                    reaction_time_surface.get_width()/2),
-                    (is_correct_response_rect.y-
-                     reaction_time_surface.get_height()-
-                     self.values['margin_y_ui']),
-                    reaction_time_surface.get_width(),
-                    reaction_time_surface.get_height()
-                    )
-                self.screen.blit(reaction_time_surface, reaction_time_rect)
-            """
-            # Correct button answer
-            top_space = int((self.screen.get_height()/2)-
-                         (self.values['margin_y_ui']/2))
-            left_space = int((self.screen.get_height()/2)-
-                          self.values['color_button_width']-
-                          (self.values['margin_x_ui']*1.5))
+            self._drawn(self.canvas.blit(reaction_time_surface,
+                                         reaction_time_rect))
+        """
+
+    def _draw_ordered_color_selection_buttons(self, component):
+        """Buttons to select the answer.
+        """
+        # Render colors buttons
+        top_space = int((self.canvas.get_height()/2)-
+                     (self.values['margin_y_ui']/2))
+        left_space = int((self.canvas.get_height()/2)-
+                      self.values['color_button_width']-
+                      (self.values['margin_x_ui']*1.5))
+        colors = [
+            (self.getColor('color_blue'), Action.RESPONSE_BLUE),
+            (self.getColor('color_green'), Action.RESPONSE_GREEN),
+            (self.getColor('color_red'), Action.RESPONSE_RED),
+            (self.getColor('color_yellow'), Action.RESPONSE_YELLOW)
+            ]
+        for i in range(4):
             color_button_rect = Rect(
-                left_space+correct_button_index*(
-                    self.values['color_button_width']+
-                    self.values['margin_x_ui']),
+                left_space+i*(self.values['color_button_width']+
+                              self.values['margin_x_ui']),
                 top_space,
                 self.values['color_button_width'],
                 self.values['color_button_height']
                 )
-            button = pygame.draw.rect(
-                self.screen,
-                correct_button_color,
-                color_button_rect)
-
-        elif component == 'intermediate_rt_accuracy_summary':
-            """ ************************************************************ """
-            """ Intermediate summary with reaction time and accuracy         """
-            """ ************************************************************ """
-            if (self.session is None or
-                self.session.active_block is None):
-                eprint("WARNING: No active block to draw the component.")
-                return
-            base_rect = self.description_bottom_rect
-            # Reaction time
-            global_reaction_time_ms = int(self.session.active_block.
-                                getAverageReactionTime()*1000.0)
-            partial_reaction_time_ms = int(self.session.active_block.
-                                getAverageReactionTime(
-                                    'intermediate_rt_accuracy_summary')*1000.0)
-            if global_reaction_time_ms >= 0:
-                # Display reaction time
-                text = (self.getString('reaction_time_ms_label')+
-                        str(global_reaction_time_ms)+" ms")
-                foreground = self.getColor('color_instructions')
-                background = (
-                    self.getColor('color_background') if
-                    self.isBeltConnected() else
-                    self.getColor('color_background_warning'))
-                decoration = None
-                base_rect = self._render_label(
-                    text, # Text
-                    self.font_instruction_bold, # Font
-                    foreground, # Foreground color
-                    background, # Background color
-                    decoration, # Decoration color (or None)
-                    self.values['padding_x_ui'], # Padding x
-                    self.values['padding_y_ui'], # Padding y
-                    self.values['margin_x_ui'], # Margin x
-                    self.values['margin_y_ui'], # Margin y
-                    -1, # Fixed width or -1
-                    -1, # Fixed height or -1
-                    'left', # 'justified', 'left', 'right' or 'center'
-                    None, # Action or None
-                    Position.CENTER, # Relative position x
-                    Position.TOP, # Relative position y
-                    self.description_bottom_rect # Reference rect
-                    )
-                # Display icon
-                if partial_reaction_time_ms >= 0:
-                    diff_reaction_time_ms = (partial_reaction_time_ms-
-                                             global_reaction_time_ms)
-                    if diff_reaction_time_ms < -50:
-                        # Better
-                        image = self.getImage('better_icon')
-                    else:
-                        # Similar
-                        image = self.getImage('similar_icon')
-
-                    if image is None:
-                        eprint("WARNING: image not found.")
-                        return
-                    image_rect = Rect(
-                        (base_rect.x+base_rect.width+
-                         self.values['margin_x_ui']),
-                        base_rect.y+base_rect.height/2-image.get_height()/2,
-                        image.get_width(),
-                        image.get_height()
-                        )
-                    self.screen.blit(image, image_rect)
-            # Accuracy
-            global_accuracy = int(self.session.active_block.
-                                  getAccuracy()*100.0)
-            partial_accuracy = int(self.session.active_block.
-                getAccuracy('intermediate_rt_accuracy_summary')*100.0)
-            if global_accuracy >= 0:
-                # Display accuracy
-                text = (self.getString('accuracy_label')+
-                        str(global_accuracy)+" %")
-                foreground = self.getColor('color_instructions')
-                background = (
-                    self.getColor('color_background') if
-                    self.isBeltConnected() else
-                    self.getColor('color_background_warning'))
-                decoration = None
-                base_rect = self._render_label(
-                    text, # Text
-                    self.font_instruction_bold, # Font
-                    foreground, # Foreground color
-                    background, # Background color
-                    decoration, # Decoration color (or None)
-                    self.values['padding_x_ui'], # Padding x
-                    self.values['padding_y_ui'], # Padding y
-                    self.values['margin_x_ui'], # Margin x
-                    self.values['margin_y_ui'], # Margin y
-                    -1, # Fixed width or -1
-                    -1, # Fixed height or -1
-                    'left', # 'justified', 'left', 'right' or 'center'
-                    None, # Action or None
-                    Position.CENTER, # Relative position x
-                    Position.TOP, # Relative position y
-                    base_rect # Reference rect
-                    )
-                # Display icon
-                if partial_accuracy >= 0:
-                    diff_accuracy = (partial_accuracy-global_accuracy)
-                    if diff_accuracy > 5 or partial_accuracy == 100:
-                        # Better
-                        image = self.getImage('better_icon')
-                    else:
-                        # Similar
-                        image = self.getImage('similar_icon')
-
-                    if image is None:
-                        eprint("WARNING: image not found.")
-                        return
-                    image_rect = Rect(
-                        (base_rect.x+base_rect.width+
-                         self.values['margin_x_ui']),
-                        base_rect.y+base_rect.height/2-image.get_height()/2,
-                        image.get_width(),
-                        image.get_height()
-                        )
-                    self.screen.blit(image, image_rect)
-
-            # Continue description
-            text = self.getString('continue_trial_instructions')
+            button = self._drawn(pygame.draw.rect(
+                self.canvas,
+                colors[i][0],
+                color_button_rect))
+            self.active_buttons.append(
+                (colors[i][1], button))
+
+    def _draw_color_selection_trial_summary(self, component):
+        """Is response correct, and correct button.
+        """
+        if (self.session is None or
+            self.session.active_block is None or
+            self.session.active_block.active_trial is None):
+            eprint("WARNING: No active trial to draw the component.")
+            return
+        # Trial results
+        vibration_stimulus_color = (self.session.active_block
+            .getActiveTrialValue('vibration_stimulus'))
+        selected_color = (self.session.active_block
+            .getActiveTrialValue('response_action'))
+        is_correct_response = (selected_color == vibration_stimulus_color)
+        reaction_time_ms = int((self.session.active_block
+            .getActiveTrialValue('reaction_time')*1000))
+        if reaction_time_ms < 0:
+            reaction_time_ms = "-"
+        else:
+            reaction_time_ms = str(reaction_time_ms)
+        correct_button_index = None
+        correct_button_color = None
+        if vibration_stimulus_color == Symbol.BLUE:
+            correct_button_index = 0
+            correct_button_color = self.getColor('color_blue')
+        elif vibration_stimulus_color == Symbol.GREEN:
+            correct_button_index = 1
+            correct_button_color = self.getColor('color_green')
+        elif vibration_stimulus_color == Symbol.RED:
+            correct_button_index = 2
+            correct_button_color = self.getColor('color_red')
+        elif vibration_stimulus_color == Symbol.YELLOW:
+            correct_button_index = 3
+            correct_button_color = self.getColor('color_yellow')
+        # Is response correct label
+        is_correct_response_text = None
+        if is_correct_response:
+            is_correct_response_text = self.getString(
+                'correct_response_label')
+        else:
+            is_correct_response_text = self.getString(
+                'wrong_response_label')
+        background = (
+                self.getColor('color_background') if
+                self.isBeltConnected() else
+                self.getColor('color_background_warning'))
+        self._render_label(
+            is_correct_response_text, # Text
+            self.font_instruction, # Font
+            self.getColor('color_instructions'), # Foreground color
+            background, # Background color
+            None, # Decoration color (or None)
+            self.values['padding_x_ui'], # Padding x
+            self.values['padding_y_ui'], # Padding y
+            self.values['margin_x_ui'], # Margin x
+            self.values['margin_y_ui'], # Margin y
+            -1, # Fixed width or -1
+            -1, # Fixed height or -1
+            'left', # 'justified', 'left', 'right' or 'center'
+            None, # Action or None
+            Position.CENTER, # Relative position x
+            Position.ALIGN_BOTTOM, # Relative position y
+            self.description_top_rect # Reference rect
+            )
+        # Reaction time label
+        """
+        if component == 'color_selection_rt_trial_summary':
+            reaction_time_text = (self.getString('reaction_time_ms_label')+
+                                   reaction_time_ms)
+            reaction_time_surface = self.font_instruction.render(
+                reaction_time_text, True,
+                self.getColor('color_instructions'),
+                self.getColor('color_background'))
+            reaction_time_rect = Rect(
+                (self.canvas.get_width()/2-
+                reaction_time_surface.get_width()/2),
+                (is_correct_response_rect.y-
+                 reaction_time_surface.get_height()-
+                 self.values['margin_y_ui']),
+                reaction_time_surface.get_width(),
+                reaction_time_surface.get_height()
+                )
+            self._drawn(self.canvas.blit(reaction_time_surface,
+                                         reaction_time_rect))
+        """
+        # Correct button answer
+        top_space = int((self.canvas.get_height()/2)-
+                     (self.values['margin_y_ui']/2))
+        left_space = int((self.canvas.get_height()/2)-
+                      self.values['color_button_width']-
+                      (self.values['margin_x_ui']*1.5))
+        color_button_rect = Rect(
+            left_space+correct_button_index*(
+                self.values['color_button_width']+
+                self.values['margin_x_ui']),
+            top_space,
+            self.values['color_button_width'],
+            self.values['color_button_height']
+            )
+        self._drawn(pygame.draw.rect(
+            self.canvas,
+            correct_button_color,
+            color_button_rect))
+
+    def _draw_intermediate_rt_accuracy_summary(self, component):
+        """Intermediate summary with reaction time and accuracy.
+        """
+        if (self.session is None or
+            self.session.active_block is None):
+            eprint("WARNING: No active block to draw the component.")
+            return
+        base_rect = self.description_bottom_rect
+        # Reaction time
+        global_reaction_time_ms = int(self.session.active_block.
+                            getAverageReactionTime()*1000.0)
+        partial_reaction_time_ms = int(self.session.active_block.
+                            getAverageReactionTime(
+                                'intermediate_rt_accuracy_summary')*1000.0)
+        if global_reaction_time_ms >= 0:
+            # Display reaction time
+            text = (self.getString('reaction_time_ms_label')+
+                    str(global_reaction_time_ms)+" ms")
             foreground = self.getColor('color_instructions')
             background = (
-                    self.getColor('color_background') if
-                    self.isBeltConnected() else
-                    self.getColor('color_background_warning'))
+                self.getColor('color_background') if
+                self.isBeltConnected() else
+                self.getColor('color_background_warning'))
             decoration = None
-            self._render_label(
+            base_rect = self._render_label(
                 text, # Text
-                self.font_instruction, # Font
+                self.font_instruction_bold, # Font
                 foreground, # Foreground color
                 background, # Background color
                 decoration, # Decoration color (or None)
@@ -1380,18 +1486,49 @@ class Experiment(threading.Thread):
                 'left', # 'justified', 'left', 'right' or 'center'
                 None, # Action or None
                 Position.CENTER, # Relative position x
-                Position.ALIGN_TOP, # Relative position y
+                Position.TOP, # Relative position y
                 self.description_bottom_rect # Reference rect
                 )
-
-            # Continue button
-            text = self.getString('continue_button_label')
-            foreground = self.getColor('color_go_button_foreground')
-            background = self.getColor('color_go_button_background')
-            decoration = self.getColor('color_go_button_decoration')
-            button_rect = self._render_label(
+            # Display icon
+            if partial_reaction_time_ms >= 0:
+                diff_reaction_time_ms = (partial_reaction_time_ms-
+                                         global_reaction_time_ms)
+                if diff_reaction_time_ms < -50:
+                    # Better
+                    image = self.getImage('better_icon')
+                else:
+                    # Similar
+                    image = self.getImage('similar_icon')
+
+                if image is None:
+                    eprint("WARNING: image not found.")
+                    return
+                image_rect = Rect(
+                    (base_rect.x+base_rect.width+
+                     self.values['margin_x_ui']),
+                    base_rect.y+base_rect.height/2-image.get_height()/2,
+                    image.get_width(),
+                    image.get_height()
+                    )
+                self._drawn(self.canvas.blit(image, image_rect))
+        # Accuracy
+        global_accuracy = int(self.session.active_block.
+                              getAccuracy()*100.0)
+        partial_accuracy = int(self.session.active_block.
+            getAccuracy('intermediate_rt_accuracy_summary')*100.0)
+        if global_accuracy >= 0:
+            # Display accuracy
+            text = (self.getString('accuracy_label')+
+                    str(global_accuracy)+" %")
+            foreground = self.getColor('color_instructions')
+            background = (
+                self.getColor('color_background') if
+                self.isBeltConnected() else
+                self.getColor('color_background_warning'))
+            decoration = None
+            base_rect = self._render_label(
                 text, # Text
-                self.font_button, # Font
+                self.font_instruction_bold, # Font
                 foreground, # Foreground color
                 background, # Background color
                 decoration, # Decoration color (or None)
@@ -1402,95 +1539,108 @@ class Experiment(threading.Thread):
                 -1, # Fixed width or -1
                 -1, # Fixed height or -1
                 'left', # 'justified', 'left', 'right' or 'center'
-                Action.NEXT, # Action or None
-                Position.ALIGN_RIGHT, # Relative position x
-                Position.CENTER, # Relative position y
-                self.command_rect # Reference rect
+                None, # Action or None
+                Position.CENTER, # Relative position x
+                Position.TOP, # Relative position y
+                base_rect # Reference rect
                 )
-
-        elif component == 'rt_accuracy_summary':
-            """ ************************************************************ """
-            """ Summary with reaction time and accuracy                      """
-            """ ************************************************************ """
-            if (self.session is None or
-                self.session.active_block is None):
-                eprint("WARNING: No active block to draw the component.")
-                return
-            base_rect = self.description_bottom_rect
-            # Reaction time
-            reaction_time_ms = int(self.session.active_block.
-                                getAverageReactionTime()*1000.0)
-            if reaction_time_ms >= 0:
-                # Display reaction time
-                text = (self.getString('reaction_time_ms_label')+
-                        str(reaction_time_ms)+" ms")
-                foreground = self.getColor('color_instructions')
-                background = (
-                    self.getColor('color_background') if
-                    self.isBeltConnected() else
-                    self.getColor('color_background_warning'))
-                decoration = None
-                base_rect = self._render_label(
-                    text, # Text
-                    self.font_instruction_bold, # Font
-                    foreground, # Foreground color
-                    background, # Background color
-                    decoration, # Decoration color (or None)
-                    self.values['padding_x_ui'], # Padding x
-                    self.values['padding_y_ui'], # Padding y
-                    self.values['margin_x_ui'], # Margin x
-                    self.values['margin_y_ui'], # Margin y
-                    -1, # Fixed width or -1
-                    -1, # Fixed height or -1
-                    'left', # 'justified', 'left', 'right' or 'center'
-                    None, # Action or None
-                    Position.CENTER, # Relative position x
-                    Position.TOP, # Relative position y
-                    self.description_bottom_rect # Reference rect
-                    )
-            # Accuracy
-            accuracy = int(self.session.active_block.
-                                getAccuracy()*100.0)
-            if accuracy >= 0:
-                # Display accuracy
-                text = (self.getString('accuracy_label')+
-                        str(accuracy)+" %")
-                foreground = self.getColor('color_instructions')
-                background = (
-                    self.getColor('color_background') if
-                    self.isBeltConnected() else
-                    self.getColor('color_background_warning'))
-                decoration = None
-                self._render_label(
-                    text, # Text
-                    self.font_instruction_bold, # Font
-                    foreground, # Foreground color
-                    background, # Background color
-                    decoration, # Decoration color (or None)
-                    self.values['padding_x_ui'], # Padding x
-                    self.values['padding_y_ui'], # Padding y
-                    self.values['margin_x_ui'], # Margin x
-                    self.values['margin_y_ui'], # Margin y
-                    -1, # Fixed width or -1
-                    -1, # Fixed height or -1
-                    'left', # 'justified', 'left', 'right' or 'center'
-                    None, # Action or None
-                    Position.CENTER, # Relative position x
-                    Position.TOP, # Relative position y
-                    base_rect # Reference rect
+            # Display icon
+            if partial_accuracy >= 0:
+                diff_accuracy = (partial_accuracy-global_accuracy)
+                if diff_accuracy > 5 or partial_accuracy == 100:
+                    # Better
+                    image = self.getImage('better_icon')
+                else:
+                    # Similar
+                    image = self.getImage('similar_icon')
+
+                if image is None:
+                    eprint("WARNING: image not found.")
+                    return
+                image_rect = Rect(
+                    (base_rect.x+base_rect.width+
+                     self.values['margin_x_ui']),
+                    base_rect.y+base_rect.height/2-image.get_height()/2,
+                    image.get_width(),
+                    image.get_height()
                     )
+                self._drawn(self.canvas.blit(image, image_rect))
+
+        # Continue description
+        text = self.getString('continue_trial_instructions')
+        foreground = self.getColor('color_instructions')
+        background = (
+                self.getColor('color_background') if
+                self.isBeltConnected() else
+                self.getColor('color_background_warning'))
+        decoration = None
+        self._render_label(
+            text, # Text
+            self.font_instruction, # Font
+            foreground, # Foreground color
+            background, # Background color
+            decoration, # Decoration color (or None)
+            self.values['padding_x_ui'], # Padding x
+            self.values['padding_y_ui'], # Padding y
+            self.values['margin_x_ui'], # Margin x
+            self.values['margin_y_ui'], # Margin y
+            -1, # Fixed width or -1
+            -1, # Fixed height or -1
+            'left', # 'justified', 'left', 'right' or 'center'
+            None, # Action or None
+            Position.CENTER, # Relative position x
+            Position.ALIGN_TOP, # Relative position y
+            self.description_bottom_rect # Reference rect
+            )
+
+        # Continue button
+        text = self.getString('continue_button_label')
+        foreground = self.getColor('color_go_button_foreground')
+        background = self.getColor('color_go_button_background')
+        decoration = self.getColor('color_go_button_decoration')
+        self._render_label(
+            text, # Text
+            self.font_button, # Font
+            foreground, # Foreground color
+            background, # Background color
+            decoration, # Decoration color (or None)
+            self.values['padding_x_ui'], # Padding x
+            self.values['padding_y_ui'], # Padding y
+            self.values['margin_x_ui'], # Margin x
+            self.values['margin_y_ui'], # Margin y
+            -1, # Fixed width or -1
+            -1, # Fixed height or -1
+            'left', # 'justified', 'left', 'right' or 'center'
+            Action.NEXT, # Action or None
+            Position.ALIGN_RIGHT, # Relative position x
+            Position.CENTER, # Relative position y
+            self.command_rect # Reference rect
+            )
 
-            # Continue description
-            text = self.getString('continue_trial_instructions')
+    def _draw_rt_accuracy_summary(self, component):
+        """Summary with reaction time and accuracy.
+        """
+        if (self.session is None or
+            self.session.active_block is None):
+            eprint("WARNING: No active block to draw the component.")
+            return
+        base_rect = self.description_bottom_rect
+        # Reaction time
+        reaction_time_ms = int(self.session.active_block.
+                            getAverageReactionTime()*1000.0)
+        if reaction_time_ms >= 0:
+            # Display reaction time
+            text = (self.getString('reaction_time_ms_label')+
+                    str(reaction_time_ms)+" ms")
             foreground = self.getColor('color_instructions')
             background = (
-                    self.getColor('color_background') if
-                    self.isBeltConnected() else
-                    self.getColor('color_background_warning'))
+                self.getColor('color_background') if
+                self.isBeltConnected() else
+                self.getColor('color_background_warning'))
             decoration = None
-            self._render_label(
+            base_rect = self._render_label(
                 text, # Text
-                self.font_instruction, # Font
+                self.font_instruction_bold, # Font
                 foreground, # Foreground color
                 background, # Background color
                 decoration, # Decoration color (or None)
@@ -1503,18 +1653,25 @@ class Experiment(threading.Thread):
                 'left', # 'justified', 'left', 'right' or 'center'
                 None, # Action or None
                 Position.CENTER, # Relative position x
-                Position.ALIGN_TOP, # Relative position y
+                Position.TOP, # Relative position y
                 self.description_bottom_rect # Reference rect
                 )
-
-            # Continue button
-            text = self.getString('continue_button_label')
-            foreground = self.getColor('color_go_button_foreground')
-            background = self.getColor('color_go_button_background')
-            decoration = self.getColor('color_go_button_decoration')
-            button_rect = self._render_label(
+        # Accuracy
+        accuracy = int(self.session.active_block.
+                            getAccuracy()*100.0)
+        if accuracy >= 0:
+            # Display accuracy
+            text = (self.getString('accuracy_label')+
+                    str(accuracy)+" %")
+            foreground = self.getColor('color_instructions')
+            background = (
+                self.getColor('color_background') if
+                self.isBeltConnected() else
+                self.getColor('color_background_warning'))
+            decoration = None
+            self._render_label(
                 text, # Text
-                self.font_button, # Font
+                self.font_instruction_bold, # Font
                 foreground, # Foreground color
                 background, # Background color
                 decoration, # Decoration color (or None)
@@ -1525,662 +1682,705 @@ class Experiment(threading.Thread):
                 -1, # Fixed width or -1
                 -1, # Fixed height or -1
                 'left', # 'justified', 'left', 'right' or 'center'
-                Action.NEXT, # Action or None
-                Position.ALIGN_RIGHT, # Relative position x
-                Position.CENTER, # Relative position y
-                self.command_rect # Reference rect
+                None, # Action or None
+                Position.CENTER, # Relative position x
+                Position.TOP, # Relative position y
+                base_rect # Reference rect
                 )
 
-        elif component == "fixation_microphone":
-            """ ************************************************************ """
-            """ Microphone image                                             """
-            """ ************************************************************ """
-            mic_image = self.getImage('mic')
-            if mic_image is None:
-                eprint("WARNING: image not found, 'mic'.")
-                return
-            mic_rect = mic_image.get_rect(center=(
-                self.screen.get_width()/2,
-                self.screen.get_height()/2))
-            self.screen.blit(mic_image, mic_rect)
-
-        elif component == "fixation_button":
-            """ ************************************************************ """
-            """ Button image                                                 """
-            """ ************************************************************ """
-            button_image = self.getImage('button')
-            if button_image is None:
-                eprint("WARNING: image not found, 'button'.")
-                return
-            button_image_rect = button_image.get_rect(center=(
-                self.screen.get_width()/2,
-                self.screen.get_height()/2))
-            self.screen.blit(button_image, button_image_rect)
-
-        elif component == 'logo':
-            """ ************************************************************ """
-            """ Logo on top left corner                                      """
-            """ ************************************************************ """
-            logo_image = self.getImage('logo')
-            if logo_image is None:
-                eprint("WARNING: image not found, 'logo'.")
-                return
-            logo_rect = Rect(
-                self.title_rect.x,
-                (self.title_rect.y+self.title_rect.height/2-
-                 logo_image.get_height()/2),
-                logo_image.get_width(),
-                logo_image.get_height()
+        # Continue description
+        text = self.getString('continue_trial_instructions')
+        foreground = self.getColor('color_instructions')
+        background = (
+                self.getColor('color_background') if
+                self.isBeltConnected() else
+                self.getColor('color_background_warning'))
+        decoration = None
+        self._render_label(
+            text, # Text
+            self.font_instruction, # Font
+            foreground, # Foreground color
+            background, # Background color
+            decoration, # Decoration color (or None)
+            self.values['padding_x_ui'], # Padding x
+            self.values['padding_y_ui'], # Padding y
+            self.values['margin_x_ui'], # Margin x
+            self.values['margin_y_ui'], # Margin y
+            -1, # Fixed width or -1
+            -1, # Fixed height or -1
+            'left', # 'justified', 'left', 'right' or 'center'
+            None, # Action or None
+            Position.CENTER, # Relative position x
+            Position.ALIGN_TOP, # Relative position y
+            self.description_bottom_rect # Reference rect
+            )
+
+        # Continue button
+        text = self.getString('continue_button_label')
+        foreground = self.getColor('color_go_button_foreground')
+        background = self.getColor('color_go_button_background')
+        decoration = self.getColor('color_go_button_decoration')
+        self._render_label(
+            text, # Text
+            self.font_button, # Font
+            foreground, # Foreground color
+            background, # Background color
+            decoration, # Decoration color (or None)
+            self.values['padding_x_ui'], # Padding x
+            self.values['padding_y_ui'], # Padding y
+            self.values['margin_x_ui'], # Margin x
+            self.values['margin_y_ui'], # Margin y
+            -1, # Fixed width or -1
+            -1, # Fixed height or -1
+            'left', # 'justified', 'left', 'right' or 'center'
+            Action.NEXT, # Action or None
+            Position.ALIGN_RIGHT, # Relative position x
+            Position.CENTER, # Relative position y
+            self.command_rect # Reference rect
+            )
+
+    def _draw_fixation_microphone(self, component):
+        """Microphone image.
+        """
+        mic_image = self.getImage('mic')
+        if mic_image is None:
+            eprint("WARNING: image not found, 'mic'.")
+            return
+        mic_rect = mic_image.get_rect(center=(
+            self.canvas.get_width()/2,
+            self.canvas.get_height()/2))
+        self._drawn(self.canvas.blit(mic_image, mic_rect))
+
+    def _draw_fixation_button(self, component):
+        """Button image.
+        """
+        button_image = self.getImage('button')
+        if button_image is None:
+            eprint("WARNING: image not found, 'button'.")
+            return
+        button_image_rect = button_image.get_rect(center=(
+            self.canvas.get_width()/2,
+            self.canvas.get_height()/2))
+        self._drawn(self.canvas.blit(button_image, button_image_rect))
+
+    def _draw_logo(self, component):
+        """Logo on top left corner.
+        """
+        logo_image = self.getImage('logo')
+        if logo_image is None:
+            eprint("WARNING: image not found, 'logo'.")
+            return
+        logo_rect = Rect(
+            self.title_rect.x,
+            (self.title_rect.y+self.title_rect.height/2-
+             logo_image.get_height()/2),
+            logo_image.get_width(),
+            logo_image.get_height()
+            )
+        self._drawn(self.canvas.blit(logo_image, logo_rect))
+
+    def _draw_colored_color_label(self, component):
+        """Standard stroop visual stimulus.
+        """
+        if (self.session is None or
+            self.session.active_block is None or
+            self.session.active_block.active_trial is None):
+            eprint("WARNING: No active trial to draw the component.")
+            return
+        self._visual_stimulus_drawn = True
+        # Colored text
+        colored_text = self.session.active_block.getActiveTrialValue('visual_stimulus_text')
+        text_color = self.getColor(self.session.active_block
+            .getActiveTrialValue('visual_stimulus_color'))
+        background = (
+                self.getColor('color_background') if
+                self.isBeltConnected() else
+                self.getColor('color_background_warning'))
+        self._draw_text(colored_text, self.font_visual_stimulus,
+                        text_color, background)
+
+    def _draw_start_experiment_title_button(self, component):
+        """Start experiment button in title area.
+        """
+        self._render_label(
+            self.getString('start_experiment_button_label'), # Text
+            self.font_button, # Font
+            self.getColor('color_go_button_foreground'), # Foreground color
+            self.getColor('color_go_button_background'), # Background color
+            self.getColor('color_go_button_decoration'), # Decoration color (or None)
+            self.values['padding_x_ui'], # Padding x
+            self.values['padding_y_ui'], # Padding y
+            self.values['margin_x_ui'], # Margin x
+            self.values['margin_y_ui'], # Margin y
+            -1, # Fixed width or -1
+            -1, # Fixed height or -1
+            'center', # 'justified', 'left', 'right' or 'center'
+            Action.NEXT, # Action or None
+            Position.CENTER, # Relative position x
+            Position.CENTER, # Relative position y
+            self.title_rect # Reference rect
+            )
+
+    def _draw_quit_experiment_button(self, component):
+        """Quit experiment button in title area.
+        """
+        self._render_label(
+            self.getString('quit_experiment_button_label'), # Text
+            self.font_button, # Font
+            self.getColor('color_button_foreground'), # Foreground color
+            self.getColor('color_button_background'), # Background color
+            self.getColor('color_button_decoration'), # Decoration color (or None)
+            self.values['padding_x_ui'], # Padding x
+            self.values['padding_y_ui'], # Padding y
+            self.values['margin_x_ui'], # Margin x
+            self.values['margin_y_ui'], # Margin y
+            -1, # Fixed width or -1
+            -1, # Fixed height or -1
+            'center', # 'justified', 'left', 'right' or 'center'
+            Action.QUIT, # Action or None
+            Position.ALIGN_LEFT, # Relative position x
+            Position.CENTER, # Relative position y
+            self.command_rect # Reference rect
+            )
+
+    def _draw_next_command(self, component):
+        """Next button in command area.
+        """
+        self._render_label(
+            self.getString('next_button_label'), # Text
+            self.font_button, # Font
+            self.getColor('color_button_foreground'), # Foreground color
+            self.getColor('color_button_background'), # Background color
+            self.getColor('color_button_decoration'), # Decoration color (or None)
+            self.values['padding_x_ui'], # Padding x
+            self.values['padding_y_ui'], # Padding y
+            self.values['margin_x_ui'], # Margin x
+            self.values['margin_y_ui'], # Margin y
+            -1, # Fixed width or -1
+            -1, # Fixed height or -1
+            'left', # 'justified', 'left', 'right' or 'center'
+            Action.NEXT, # Action or None
+            Position.ALIGN_RIGHT, # Relative position x
+            Position.CENTER, # Relative position y
+            self.command_rect # Reference rect
+            )
+
+    def _draw_retry_command(self, component):
+        """Retry button in command area.
+        """
+        self._render_label(
+            self.getString('retry_button_label'), # Text
+            self.font_button, # Font
+            self.getColor('color_button_foreground'), # Foreground color
+            self.getColor('color_button_background'), # Background color
+            self.getColor('color_button_decoration'), # Decoration color (or None)
+            self.values['padding_x_ui'], # Padding x
+            self.values['padding_y_ui'], # Padding y
+            self.values['margin_x_ui'], # Margin x
+            self.values['margin_y_ui'], # Margin y
+            -1, # Fixed width or -1
+            -1, # Fixed height or -1
+            'left', # 'justified', 'left', 'right' or 'center'
+            Action.RESTART, # Action or None
+            Position.CENTER, # Relative position x
+            Position.CENTER, # Relative position y
+            self.command_rect # Reference rect
+            )
+
+    def _draw_block_list_menu(self, component):
+        """Menu with a button for each block.
+        """
+
+        if self.session is None:
+            return
+        if self.session.blocks is None or len(self.session.blocks) == 0:
+            return
+        blocks_titles = []
+        blocks_completed = []
+        blocks_id = []
+        width = 0
+        for block in self.session.blocks:
+            title = block.config['block_title']
+            if self.getString(title):
+                title = self.getString(title)
+            blocks_titles.append(title)
+            blocks_completed.append(block.state == BlockState.COMPLETED)
+            blocks_id.append(block.config['block_id'])
+            width = max(width, self._label_rect(
+                title,
+                self.font_button,
+                self.values['padding_x_ui'],
+                self.values['padding_y_ui']).width)
+        height = (self._label_rect(blocks_titles[0],
+                                  self.font_button,
+                                  self.values['padding_x_ui'],
+                                  self.values['padding_y_ui']).height +
+                  self.values['margin_y_ui'])
+        nb_rows = (self.description_rect.height/height)
+        nb_columns = (len(self.session.blocks)/nb_rows)+1
+        row = 0
+        column = 0
+        block_idx = 0
+        for block in self.session.blocks:
+            # Cell rect
+            cell_rect = Rect(
+                (self.description_rect.x+
+                 (self.description_rect.width/nb_columns)*column),
+                (self.description_rect.y+
+                 (self.description_rect.height/nb_rows)*row),
+                 self.description_rect.width/nb_columns,
+                 self.description_rect.height/nb_rows
                 )
-            self.screen.blit(logo_image, logo_rect)
-
-        elif component == "colored_color_label":
-            """ ************************************************************ """
-            """ Standard stroop visual stimulus                              """
-            """ ************************************************************ """
-            if (self.session is None or
-                self.session.active_block is None or
-                self.session.active_block.active_trial is None):
-                eprint("WARNING: No active trial to draw the component.")
-                return
-            # Colored text
-            colored_text = self.session.active_block.getActiveTrialValue('visual_stimulus_text')
-            text_color = self.getColor(self.session.active_block
-                .getActiveTrialValue('visual_stimulus_color'))
+            # Render button
+            foreground = (
+                self.getColor('color_button_disabled_foreground') if
+                blocks_completed[block_idx] else
+                self.getColor('color_button_foreground'))
             background = (
-                    self.getColor('color_background') if
-                    self.isBeltConnected() else
-                    self.getColor('color_background_warning'))
-            self._draw_text(colored_text, self.font_visual_stimulus,
-                            text_color, background)
-
-        elif component == 'start_experiment_title_button':
-            """ ************************************************************ """
-            """ Start experiment button in title area                        """
-            """ ************************************************************ """
+                self.getColor('color_button_disabled_background') if
+                blocks_completed[block_idx] else
+                self.getColor('color_button_background'))
+            decoration = (
+                self.getColor('color_button_disabled_decoration') if
+                blocks_completed[block_idx] else
+                self.getColor('color_button_decoration'))
             self._render_label(
-                self.getString('start_experiment_button_label'), # Text
+                blocks_titles[block_idx], # Text
                 self.font_button, # Font
-                self.getColor('color_go_button_foreground'), # Foreground color
-                self.getColor('color_go_button_background'), # Background color
-                self.getColor('color_go_button_decoration'), # Decoration color (or None)
+                foreground, # Foreground color
+                background, # Background color
+                decoration, # Decoration color (or None)
                 self.values['padding_x_ui'], # Padding x
                 self.values['padding_y_ui'], # Padding y
                 self.values['margin_x_ui'], # Margin x
                 self.values['margin_y_ui'], # Margin y
-                -1, # Fixed width or -1
+                width, # Fixed width or -1
                 -1, # Fixed height or -1
                 'center', # 'justified', 'left', 'right' or 'center'
-                Action.NEXT, # Action or None
+                blocks_id[block_idx], # Action or None
                 Position.CENTER, # Relative position x
                 Position.CENTER, # Relative position y
-                self.title_rect # Reference rect
-                )
-
-        elif component == 'quit_experiment_button':
-            """ ************************************************************ """
-            """ Quit experiment button in title area                        """
-            """ ************************************************************ """
-            self._render_label(
-                self.getString('quit_experiment_button_label'), # Text
-                self.font_button, # Font
-                self.getColor('color_button_foreground'), # Foreground color
-                self.getColor('color_button_background'), # Background color
-                self.getColor('color_button_decoration'), # Decoration color (or None)
-                self.values['padding_x_ui'], # Padding x
-                self.values['padding_y_ui'], # Padding y
-                self.values['margin_x_ui'], # Margin x
-                self.values['margin_y_ui'], # Margin y
-                -1, # Fixed width or -1
-                -1, # Fixed height or -1
-                'center', # 'justified', 'left', 'right' or 'center'
-                Action.QUIT, # Action or None
-                Position.ALIGN_LEFT, # Relative position x
-                Position.CENTER, # Relative position y
-                self.command_rect # Reference rect
-                )
-
-        elif component == 'next_command':
-            """ ************************************************************ """
-            """ Next button in command area                                  """
-            """ ************************************************************ """
-            self._render_label(
-                self.getString('next_button_label'), # Text
-                self.font_button, # Font
-                self.getColor('color_button_foreground'), # Foreground color
-                self.getColor('color_button_background'), # Background color
-                self.getColor('color_button_decoration'), # Decoration color (or None)
-                self.values['padding_x_ui'], # Padding x
-                self.values['padding_y_ui'], # Padding y
-                self.values['margin_x_ui'], # Margin x
-                self.values['margin_y_ui'], # Margin y
-                -1, # Fixed width or -1
-                -1, # Fixed height or -1
-                'left', # 'justified', 'left', 'right' or 'center'
-                Action.NEXT, # Action or None
-                Position.ALIGN_RIGHT, # Relative position x
-                Position.CENTER, # Relative position y
-                self.command_rect # Reference rect
+                cell_rect # Reference rect
                 )
+            # New cell
+            block_idx += 1
+            row += 1
+            if (block_idx == 8 or block_idx == 11):
+                column += 1
+                row = 0
+
+    def _draw_connect_test_start_command(self, component):
+        """Connect, test and start buttons in command area.
+        """
+        # Start button
+        text = self.getString('start_block_button_label')
+        foreground = (
+            self.getColor('color_go_button_foreground') if
+            self.isBeltConnected() else
+            self.getColor('color_button_disabled_foreground')
+            )
+        background = (
+            self.getColor('color_go_button_background') if
+            self.isBeltConnected() else
+            self.getColor('color_button_disabled_background')
+            )
+        decoration = (
+            self.getColor('color_go_button_decoration') if
+            self.isBeltConnected() else
+            self.getColor('color_button_disabled_decoration')
+            )
+        button_rect = self._render_label(
+            text, # Text
+            self.font_button, # Font
+            foreground, # Foreground color
+            background, # Background color
+            decoration, # Decoration color (or None)
+            self.values['padding_x_ui'], # Padding x
+            self.values['padding_y_ui'], # Padding y
+            self.values['margin_x_ui'], # Margin x
+            self.values['margin_y_ui'], # Margin y
+            -1, # Fixed width or -1
+            -1, # Fixed height or -1
+            'left', # 'justified', 'left', 'right' or 'center'
+            Action.NEXT, # Action or None
+            Position.ALIGN_RIGHT, # Relative position x
+            Position.CENTER, # Relative position y
+            self.command_rect # Reference rect
+            )
+        # Test vibration
+        text = self.getString('test_belt_button_label')
+        foreground = (
+            self.getColor('color_button_foreground') if
+            self.isBeltConnected() else
+            self.getColor('color_button_disabled_foreground')
+            )
+        background = (
+            self.getColor('color_button_background') if
+            self.isBeltConnected() else
+            self.getColor('color_button_disabled_background')
+            )
+        decoration = (
+            self.getColor('color_button_decoration') if
+            self.isBeltConnected() else
+            self.getColor('color_button_disabled_decoration')
+            )
+        button_rect = self._render_label(
+            text, # Text
+            self.font_button, # Font
+            foreground, # Foreground color
+            background, # Background color
+            decoration, # Decoration color (or None)
+            self.values['padding_x_ui'], # Padding x
+            self.values['padding_y_ui'], # Padding y
+            self.values['margin_x_ui'], # Margin x
+            self.values['margin_y_ui'], # Margin y
+            -1, # Fixed width or -1
+            -1, # Fixed height or -1
+            'left', # 'justified', 'left', 'right' or 'center'
+            Action.TEST_VIBRATION, # Action or None
+            Position.LEFT, # Relative position x
+            Position.CENTER, # Relative position y
+            button_rect # Reference rect
+            )
+        # Connect belt
+        text = self.getString('connect_button_label')
+        foreground = (
+            self.getColor('color_button_disabled_foreground') if
+            self.isBeltConnected() else
+            self.getColor('color_warning_button_foreground')
+            )
+        background = (
+            self.getColor('color_button_disabled_background') if
+            self.isBeltConnected() else
+            self.getColor('color_warning_button_background')
+            )
+        decoration = (
+            self.getColor('color_button_disabled_decoration') if
+            self.isBeltConnected() else
+            self.getColor('color_warning_button_decoration')
+            )
+        button_rect = self._render_label(
+            text, # Text
+            self.font_button, # Font
+            foreground, # Foreground color
+            background, # Background color
+            decoration, # Decoration color (or None)
+            self.values['padding_x_ui'], # Padding x
+            self.values['padding_y_ui'], # Padding y
+            self.values['margin_x_ui'], # Margin x
+            self.values['margin_y_ui'], # Margin y
+            -1, # Fixed width or -1
+            -1, # Fixed height or -1
+            'left', # 'justified', 'left', 'right' or 'center'
+            Action.CONNECT_BELT, # Action or None
+            Position.LEFT, # Relative position x
+            Position.CENTER, # Relative position y
+            button_rect # Reference rect
+            )
 
-        elif component == "retry_command":
-            """ ************************************************************ """
-            """ Retry button in command area                                  """
-            """ ************************************************************ """
-            self._render_label(
-                self.getString('retry_button_label'), # Text
-                self.font_button, # Font
-                self.getColor('color_button_foreground'), # Foreground color
-                self.getColor('color_button_background'), # Background color
-                self.getColor('color_button_decoration'), # Decoration color (or None)
-                self.values['padding_x_ui'], # Padding x
-                self.values['padding_y_ui'], # Padding y
-                self.values['margin_x_ui'], # Margin x
-                self.values['margin_y_ui'], # Margin y
-                -1, # Fixed width or -1
-                -1, # Fixed height or -1
-                'left', # 'justified', 'left', 'right' or 'center'
-                Action.RESTART, # Action or None
-                Position.CENTER, # Relative position x
-                Position.CENTER, # Relative position y
-                self.command_rect # Reference rect
-                )
+    def _draw_setting_commands(self, component):
+        """Fullscreen, connect and test buttons in command area.
+        """
+        # Connect belt
+        text = self.getString('connect_button_label')
+        foreground = (
+            self.getColor('color_button_disabled_foreground') if
+            self.isBeltConnected() else
+            self.getColor('color_warning_button_foreground')
+            )
+        background = (
+            self.getColor('color_button_disabled_background') if
+            self.isBeltConnected() else
+            self.getColor('color_warning_button_background')
+            )
+        decoration = (
+            self.getColor('color_button_disabled_decoration') if
+            self.isBeltConnected() else
+            self.getColor('color_warning_button_decoration')
+            )
+        button_rect = self._render_label(
+            text, # Text
+            self.font_button, # Font
+            foreground, # Foreground color
+            background, # Background color
+            decoration, # Decoration color (or None)
+            self.values['padding_x_ui'], # Padding x
+            self.values['padding_y_ui'], # Padding y
+            self.values['margin_x_ui'], # Margin x
+            self.values['margin_y_ui'], # Margin y
+            -1, # Fixed width or -1
+            -1, # Fixed height or -1
+            'left', # 'justified', 'left', 'right' or 'center'
+            Action.CONNECT_BELT, # Action or None
+            Position.CENTER, # Relative position x
+            Position.CENTER, # Relative position y
+            self.command_rect # Reference rect
+            )
+        # Fullscreen button
+        text = self.getString('toggle_fullscreen_button_label')
+        foreground = self.getColor('color_button_foreground')
+        background = self.getColor('color_button_background')
+        decoration = self.getColor('color_button_decoration')
+        self._render_label(
+            text, # Text
+            self.font_button, # Font
+            foreground, # Foreground color
+            background, # Background color
+            decoration, # Decoration color (or None)
+            self.values['padding_x_ui'], # Padding x
+            self.values['padding_y_ui'], # Padding y
+            self.values['margin_x_ui'], # Margin x
+            self.values['margin_y_ui'], # Margin y
+            -1, # Fixed width or -1
+            -1, # Fixed height or -1
+            'left', # 'justified', 'left', 'right' or 'center'
+            Action.TOGGLE_FULLSCREEN, # Action or None
+            Position.LEFT, # Relative position x
+            Position.CENTER, # Relative position y
+            button_rect # Reference rect
+            )
+        # Test vibration
+        text = self.getString('test_belt_button_label')
+        foreground = (
+            self.getColor('color_button_foreground') if
+            self.isBeltConnected() else
+            self.getColor('color_button_disabled_foreground')
+            )
+        background = (
+            self.getColor('color_button_background') if
+            self.isBeltConnected() else
+            self.getColor('color_button_disabled_background')
+            )
+        decoration = (
+            self.getColor('color_button_decoration') if
+            self.isBeltConnected() else
+            self.getColor('color_button_disabled_decoration')
+            )
+        button_rect = self._render_label(
+            text, # Text
+            self.font_button, # Font
+            foreground, # Foreground color
+            background, # Background color
+            decoration, # Decoration color (or None)
+            self.values['padding_x_ui'], # Padding x
+            self.values['padding_y_ui'], # Padding y
+            self.values['margin_x_ui'], # Margin x
+            self.values['margin_y_ui'], # Margin y
+            -1, # Fixed width or -1
+            -1, # Fixed height or -1
+            'justified', # 'justified', 'left', 'right' or 'center'
+            Action.TEST_VIBRATION, # Action or None
+            Position.RIGHT, # Relative position x
+            Position.CENTER, # Relative position y
+            button_rect # Reference rect
+            )
 
-        elif component == 'block_list_menu':
-            """ ************************************************************ """
-            """ Menu with a button for each block                            """
-            """ ************************************************************ """
+    def _draw_back_to_menu_command(self, component):
+        """Back to menu in command area.
+        """
+        text = self.getString('back_to_menu_button_label')
+        foreground = self.getColor('color_button_foreground')
+        background = self.getColor('color_button_background')
+        decoration = self.getColor('color_button_decoration')
+        self._render_label(
+            text, # Text
+            self.font_button, # Font
+            foreground, # Foreground color
+            background, # Background color
+            decoration, # Decoration color (or None)
+            self.values['padding_x_ui'], # Padding x
+            self.values['padding_y_ui'], # Padding y
+            self.values['margin_x_ui'], # Margin x
+            self.values['margin_y_ui'], # Margin y
+            -1, # Fixed width or -1
+            -1, # Fixed height or -1
+            'left', # 'justified', 'left', 'right' or 'center'
+            Action.CANCEL, # Action or None
+            Position.ALIGN_LEFT, # Relative position x
+            Position.CENTER, # Relative position y
+            self.command_rect # Reference rect
+            )
 
-            if self.session is None:
-                return
-            if self.session.blocks is None or len(self.session.blocks) == 0:
-                return
-            blocks_titles = []
-            blocks_completed = []
-            blocks_id = []
-            width = 0
-            for block in self.session.blocks:
-                title = block.config['block_title']
-                if self.getString(title):
-                    title = self.getString(title)
-                blocks_titles.append(title)
-                blocks_completed.append(block.state == BlockState.COMPLETED)
-                blocks_id.append(block.config['block_id'])
-                width = max(width, self._label_rect(
-                    title,
-                    self.font_button,
-                    self.values['padding_x_ui'],
-                    self.values['padding_y_ui']).width)
-            height = (self._label_rect(blocks_titles[0],
-                                      self.font_button,
-                                      self.values['padding_x_ui'],
-                                      self.values['padding_y_ui']).height +
-                      self.values['margin_y_ui'])
-            nb_rows = (self.description_rect.height/height)
-            nb_columns = (len(self.session.blocks)/nb_rows)+1
-            row = 0
-            column = 0
-            block_idx = 0
-            for block in self.session.blocks:
-                # Cell rect
-                cell_rect = Rect(
-                    (self.description_rect.x+
-                     (self.description_rect.width/nb_columns)*column),
-                    (self.description_rect.y+
-                     (self.description_rect.height/nb_rows)*row),
-                     self.description_rect.width/nb_columns,
-                     self.description_rect.height/nb_rows
-                    )
-                # Render button
-                foreground = (
-                    self.getColor('color_button_disabled_foreground') if
-                    blocks_completed[block_idx] else
-                    self.getColor('color_button_foreground'))
-                background = (
-                    self.getColor('color_button_disabled_background') if
-                    blocks_completed[block_idx] else
-                    self.getColor('color_button_background'))
-                decoration = (
-                    self.getColor('color_button_disabled_decoration') if
-                    blocks_completed[block_idx] else
-                    self.getColor('color_button_decoration'))
-                self._render_label(
-                    blocks_titles[block_idx], # Text
-                    self.font_button, # Font
-                    foreground, # Foreground color
-                    background, # Background color
-                    decoration, # Decoration color (or None)
-                    self.values['padding_x_ui'], # Padding x
-                    self.values['padding_y_ui'], # Padding y
-                    self.values['margin_x_ui'], # Margin x
-                    self.values['margin_y_ui'], # Margin y
-                    width, # Fixed width or -1
-                    -1, # Fixed height or -1
-                    'center', # 'justified', 'left', 'right' or 'center'
-                    blocks_id[block_idx], # Action or None
-                    Position.CENTER, # Relative position x
-                    Position.CENTER, # Relative position y
-                    cell_rect # Reference rect
-                    )
-                # New cell
-                block_idx += 1
-                row += 1
-                if (block_idx == 8 or block_idx == 11):
-                    column += 1
-                    row = 0
-
-        elif component == 'connect_test_start_command':
-            """ ************************************************************ """
-            """ Connect, test and start buttons in command area              """
-            """ ************************************************************ """
-            # Start button
-            text = self.getString('start_block_button_label')
-            foreground = (
-                self.getColor('color_go_button_foreground') if
-                self.isBeltConnected() else
-                self.getColor('color_button_disabled_foreground')
-                )
-            background = (
-                self.getColor('color_go_button_background') if
-                self.isBeltConnected() else
-                self.getColor('color_button_disabled_background')
-                )
-            decoration = (
-                self.getColor('color_go_button_decoration') if
-                self.isBeltConnected() else
-                self.getColor('color_button_disabled_decoration')
-                )
-            button_rect = self._render_label(
-                text, # Text
-                self.font_button, # Font
-                foreground, # Foreground color
-                background, # Background color
-                decoration, # Decoration color (or None)
-                self.values['padding_x_ui'], # Padding x
-                self.values['padding_y_ui'], # Padding y
-                self.values['margin_x_ui'], # Margin x
-                self.values['margin_y_ui'], # Margin y
-                -1, # Fixed width or -1
-                -1, # Fixed height or -1
-                'left', # 'justified', 'left', 'right' or 'center'
-                Action.NEXT, # Action or None
-                Position.ALIGN_RIGHT, # Relative position x
-                Position.CENTER, # Relative position y
-                self.command_rect # Reference rect
-                )
-            # Test vibration
-            text = self.getString('test_belt_button_label')
-            foreground = (
-                self.getColor('color_button_foreground') if
-                self.isBeltConnected() else
-                self.getColor('color_button_disabled_foreground')
-                )
-            background = (
-                self.getColor('color_button_background') if
-                self.isBeltConnected() else
-                self.getColor('color_button_disabled_background')
-                )
-            decoration = (
-                self.getColor('color_button_decoration') if
-                self.isBeltConnected() else
-                self.getColor('color_button_disabled_decoration')
-                )
-            button_rect = self._render_label(
-                text, # Text
-                self.font_button, # Font
-                foreground, # Foreground color
-                background, # Background color
-                decoration, # Decoration color (or None)
-                self.values['padding_x_ui'], # Padding x
-                self.values['padding_y_ui'], # Padding y
-                self.values['margin_x_ui'], # Margin x
-                self.values['margin_y_ui'], # Margin y
-                -1, # Fixed width or -1
-                -1, # Fixed height or -1
-                'left', # 'justified', 'left', 'right' or 'center'
-                Action.TEST_VIBRATION, # Action or None
-                Position.LEFT, # Relative position x
-                Position.CENTER, # Relative position y
-                button_rect # Reference rect
-                )
-            # Connect belt
-            text = self.getString('connect_button_label')
-            foreground = (
-                self.getColor('color_button_disabled_foreground') if
-                self.isBeltConnected() else
-                self.getColor('color_warning_button_foreground')
-                )
-            background = (
-                self.getColor('color_button_disabled_background') if
-                self.isBeltConnected() else
-                self.getColor('color_warning_button_background')
-                )
-            decoration = (
-                self.getColor('color_button_disabled_decoration') if
+    def _draw_block_title(self, component):
+        """Block title in title area.
+        """
+        if (self.session is None or
+            self.session.active_block is None):
+            eprint("WARNING: No active block to draw the component.")
+            return
+        title = self.session.active_block.config['block_title']
+        if self.getString(title):
+            title = self.getString(title)
+        background = (
+                self.getColor('color_background') if
                 self.isBeltConnected() else
-                self.getColor('color_warning_button_decoration')
-                )
-            button_rect = self._render_label(
-                text, # Text
-                self.font_button, # Font
-                foreground, # Foreground color
-                background, # Background color
-                decoration, # Decoration color (or None)
-                self.values['padding_x_ui'], # Padding x
-                self.values['padding_y_ui'], # Padding y
-                self.values['margin_x_ui'], # Margin x
-                self.values['margin_y_ui'], # Margin y
-                -1, # Fixed width or -1
-                -1, # Fixed height or -1
-                'left', # 'justified', 'left', 'right' or 'center'
-                Action.CONNECT_BELT, # Action or None
-                Position.LEFT, # Relative position x
-                Position.CENTER, # Relative position y
-                button_rect # Reference rect
-                )
+                self.getColor('color_background_warning'))
+        self._render_label(
+            title, # Text
+            self.font_title, # Font
+            self.getColor('color_instructions'), # Foreground color
+            background, # Background color
+            None, # Decoration color (or None)
+            self.values['padding_x_ui'], # Padding x
+            self.values['padding_y_ui'], # Padding y
+            self.values['margin_x_ui'], # Margin x
+            self.values['margin_y_ui'], # Margin y
+            -1, # Fixed width or -1
+            -1, # Fixed height or -1
+            'center', # 'justified', 'left', 'right' or 'center'
+            None, # Action or None
+            Position.CENTER, # Relative position x
+            Position.CENTER, # Relative position y
+            self.title_rect # Reference rect
+            )
 
-        elif component == 'setting_commands':
-            """ ************************************************************ """
-            """ Fullscreen, connect and test buttons in command area         """
-            """ ************************************************************ """
-            # Connect belt
-            text = self.getString('connect_button_label')
-            foreground = (
-                self.getColor('color_button_disabled_foreground') if
-                self.isBeltConnected() else
-                self.getColor('color_warning_button_foreground')
-                )
-            background = (
-                self.getColor('color_button_disabled_background') if
-                self.isBeltConnected() else
-                self.getColor('color_warning_button_background')
-                )
-            decoration = (
-                self.getColor('color_button_disabled_decoration') if
-                self.isBeltConnected() else
-                self.getColor('color_warning_button_decoration')
-                )
-            button_rect = self._render_label(
-                text, # Text
-                self.font_button, # Font
-                foreground, # Foreground color
-                background, # Background color
-                decoration, # Decoration color (or None)
-                self.values['padding_x_ui'], # Padding x
-                self.values['padding_y_ui'], # Padding y
-                self.values['margin_x_ui'], # Margin x
-                self.values['margin_y_ui'], # Margin y
-                -1, # Fixed width or -1
-                -1, # Fixed height or -1
-                'left', # 'justified', 'left', 'right' or 'center'
-                Action.CONNECT_BELT, # Action or None
-                Position.CENTER, # Relative position x
-                Position.CENTER, # Relative position y
-                self.command_rect # Reference rect
-                )
-            # Fullscreen button
-            text = self.getString('toggle_fullscreen_button_label')
-            foreground = self.getColor('color_button_foreground')
-            background = self.getColor('color_button_background')
-            decoration = self.getColor('color_button_decoration')
-            self._render_label(
-                text, # Text
-                self.font_button, # Font
-                foreground, # Foreground color
-                background, # Background color
-                decoration, # Decoration color (or None)
-                self.values['padding_x_ui'], # Padding x
-                self.values['padding_y_ui'], # Padding y
-                self.values['margin_x_ui'], # Margin x
-                self.values['margin_y_ui'], # Margin y
-                -1, # Fixed width or -1
-                -1, # Fixed height or -1
-                'left', # 'justified', 'left', 'right' or 'center'
-                Action.TOGGLE_FULLSCREEN, # Action or None
-                Position.LEFT, # Relative position x
-                Position.CENTER, # Relative position y
-                button_rect # Reference rect
-                )
-            # Test vibration
-            text = self.getString('test_belt_button_label')
-            foreground = (
-                self.getColor('color_button_foreground') if
-                self.isBeltConnected() else
-                self.getColor('color_button_disabled_foreground')
-                )
-            background = (
-                self.getColor('color_button_background') if
-                self.isBeltConnected() else
-                self.getColor('color_button_disabled_background')
-                )
-            decoration = (
-                self.getColor('color_button_decoration') if
+    def _draw_trials_pause_page(self, component):
+        """Pause instructions and continue button.
+        """
+        text = self.getString('pause_instructions')
+        background = (
+                self.getColor('color_background') if
                 self.isBeltConnected() else
-                self.getColor('color_button_disabled_decoration')
-                )
-            button_rect = self._render_label(
-                text, # Text
-                self.font_button, # Font
-                foreground, # Foreground color
-                background, # Background color
-                decoration, # Decoration color (or None)
-                self.values['padding_x_ui'], # Padding x
-                self.values['padding_y_ui'], # Padding y
-                self.values['margin_x_ui'], # Margin x
-                self.values['margin_y_ui'], # Margin y
-                -1, # Fixed width or -1
-                -1, # Fixed height or -1
-                'justified', # 'justified', 'left', 'right' or 'center'
-                Action.TEST_VIBRATION, # Action or None
-                Position.RIGHT, # Relative position x
-                Position.CENTER, # Relative position y
-                button_rect # Reference rect
-                )
-
-        elif component == 'back_to_menu_command':
-            """ ************************************************************ """
-            """ Back to menu in command area                                 """
-            """ ************************************************************ """
-            text = self.getString('back_to_menu_button_label')
-            foreground = self.getColor('color_button_foreground')
-            background = self.getColor('color_button_background')
-            decoration = self.getColor('color_button_decoration')
-            button_rect = self._render_label(
-                text, # Text
-                self.font_button, # Font
-                foreground, # Foreground color
-                background, # Background color
-                decoration, # Decoration color (or None)
-                self.values['padding_x_ui'], # Padding x
-                self.values['padding_y_ui'], # Padding y
-                self.values['margin_x_ui'], # Margin x
-                self.values['margin_y_ui'], # Margin y
-                -1, # Fixed width or -1
-                -1, # Fixed height or -1
-                'left', # 'justified', 'left', 'right' or 'center'
-                Action.CANCEL, # Action or None
-                Position.ALIGN_LEFT, # Relative position x
-                Position.CENTER, # Relative position y
-                self.command_rect # Reference rect
-                )
-
-        elif component == 'block_title':
-            """ ************************************************************ """
-            """ Block title in title area                                    """
-            """ ************************************************************ """
-            if (self.session is None or
-                self.session.active_block is None):
-                eprint("WARNING: No active block to draw the component.")
-                return
-            title = self.session.active_block.config['block_title']
-            if self.getString(title):
-                title = self.getString(title)
-            background = (
-                    self.getColor('color_background') if
-                    self.isBeltConnected() else
-                    self.getColor('color_background_warning'))
-            self._render_label(
-                title, # Text
-                self.font_title, # Font
-                self.getColor('color_instructions'), # Foreground color
-                background, # Background color
-                None, # Decoration color (or None)
-                self.values['padding_x_ui'], # Padding x
-                self.values['padding_y_ui'], # Padding y
-                self.values['margin_x_ui'], # Margin x
-                self.values['margin_y_ui'], # Margin y
-                -1, # Fixed width or -1
-                -1, # Fixed height or -1
-                'center', # 'justified', 'left', 'right' or 'center'
-                None, # Action or None
-                Position.CENTER, # Relative position x
-                Position.CENTER, # Relative position y
-                self.title_rect # Reference rect
-                )
-
-        elif component == 'trials_pause_page':
-            """ ************************************************************ """
-            """ Pause instructions and continue button                       """
-            """ ************************************************************ """
-            text = self.getString('pause_instructions')
-            background = (
-                    self.getColor('color_background') if
-                    self.isBeltConnected() else
-                    self.getColor('color_background_warning'))
-            self._render_label(
-                text, # Text
-                self.font_instruction, # Font
-                self.getColor('color_instructions'), # Foreground color
-                background, # Background color
-                None, # Decoration color (or None)
-                self.values['padding_x_ui'], # Padding x
-                self.values['padding_y_ui'], # Padding y
-                0, # Margin x
-                0, # Margin y
-                self.description_rect.width, # Fixed width or -1
-                self.description_rect.height, # Fixed height or -1
-                'center', # 'justified', 'left', 'right' or 'center'
-                None, # Action or None
-                Position.ALIGN_LEFT, # Relative position x
-                Position.ALIGN_TOP, # Relative position y
-                self.description_rect # Reference rect
-                )
-            text = self.getString('continue_button_label')
-            foreground = self.getColor('color_go_button_foreground')
-            background = self.getColor('color_go_button_background')
-            decoration = self.getColor('color_go_button_decoration')
-            button_rect = self._render_label(
-                text, # Text
-                self.font_button, # Font
-                foreground, # Foreground color
-                background, # Background color
-                decoration, # Decoration color (or None)
-                self.values['padding_x_ui'], # Padding x
-                self.values['padding_y_ui'], # Padding y
-                self.values['margin_x_ui'], # Margin x
-                self.values['margin_y_ui'], # Margin y
-                -1, # Fixed width or -1
-                -1, # Fixed height or -1
-                'left', # 'justified', 'left', 'right' or 'center'
-                Action.NEXT, # Action or None
-                Position.ALIGN_RIGHT, # Relative position x
-                Position.CENTER, # Relative position y
-                self.command_rect # Reference rect
-                )
-
-        elif component == 'countdown_fixation_cross':
-            """ ************************************************************ """
-            """ Countdown with fixation cross in the last second             """
-            """ ************************************************************ """
-            if (self.session is None or
-                self.session.active_block is None or
-                self.session.active_block.active_page is None):
-                eprint("WARNING: No active page to draw the component.")
-                return
-            remaining = int(self.session.active_block.active_page
-                            .get_remaining_page_time())
-            if remaining <= 0:
-                # draw fixation cross
-                self._draw_text("+", self.font_visual_stimulus,
-                            self.getColor('fixation_cross_color'), None)
-            else:
-                # Draw remaining seconds
-                self._draw_text(str(remaining), self.font_visual_stimulus,
-                            self.getColor('fixation_cross_color'), None)
-            # Continuously redraw
-            self.redraw = True
-
-        elif component == 'happy_message':
-            """ ************************************************************ """
-            """ Encouraging message displayed in the description area        """
-            """ ************************************************************ """
-            background = (
-                    self.getColor('color_background') if
-                    self.isBeltConnected() else
-                    self.getColor('color_background_warning'))
-            self._render_label(
-                self.messages[random.randrange(0,3)], # Text
-                self.font_title, # Font
-                self.getColor('color_instructions'), # Foreground color
-                background, # Background color
-                None, # Decoration color (or None)
-                self.values['padding_x_ui'], # Padding x
-                self.values['padding_y_ui'], # Padding y
-                self.values['margin_x_ui'], # Margin x
-                self.values['margin_y_ui'], # Margin y
-                -1, # Fixed width or -1
-                -1, # Fixed height or -1
-                'center', # 'justified', 'left', 'right' or 'center'
-                None, # Action or None
-                Position.ALIGN_LEFT, # Relative position x
-                Position.CENTER, # Relative position y
-                self.title_rect # Reference rect
+                self.getColor('color_background_warning'))
+        self._render_label(
+            text, # Text
+            self.font_instruction, # Font
+            self.getColor('color_instructions'), # Foreground color
+            background, # Background color
+            None, # Decoration color (or None)
+            self.values['padding_x_ui'], # Padding x
+            self.values['padding_y_ui'], # Padding y
+            0, # Margin x
+            0, # Margin y
+            self.description_rect.width, # Fixed width or -1
+            self.description_rect.height, # Fixed height or -1
+            'center', # 'justified', 'left', 'right' or 'center'
+            None, # Action or None
+            Position.ALIGN_LEFT, # Relative position x
+            Position.ALIGN_TOP, # Relative position y
+            self.description_rect # Reference rect
             )
-
-        elif self.getString(component):
-            """ ************************************************************ """
-            """ Render text in the description area                          """
-            """ ************************************************************ """
-            background = (
-                    self.getColor('color_background') if
-                    self.isBeltConnected() else
-                    self.getColor('color_background_warning'))
-            self._render_label(
-                self.getString(component), # Text
-                self.font_instruction, # Font
-                self.getColor('color_instructions'), # Foreground color
-                background, # Background color
-                None, # Decoration color (or None)
-                self.values['padding_x_ui'], # Padding x
-                self.values['padding_y_ui'], # Padding y
-                0, # Margin x
-                0, # Margin y
-                self.description_rect.width, # Fixed width or -1
-                self.description_rect.height, # Fixed height or -1
-                'left', # 'justified', 'left', 'right' or 'center'
-                None, # Action or None
-                Position.ALIGN_LEFT, # Relative position x
-                Position.ALIGN_TOP, # Relative position y
-                self.description_rect # Reference rect
+        text = self.getString('continue_button_label')
+        foreground = self.getColor('color_go_button_foreground')
+        background = self.getColor('color_go_button_background')
+        decoration = self.getColor('color_go_button_decoration')
+        self._render_label(
+            text, # Text
+            self.font_button, # Font
+            foreground, # Foreground color
+            background, # Background color
+            decoration, # Decoration color (or None)
+            self.values['padding_x_ui'], # Padding x
+            self.values['padding_y_ui'], # Padding y
+            self.values['margin_x_ui'], # Margin x
+            self.values['margin_y_ui'], # Margin y
+            -1, # Fixed width or -1
+            -1, # Fixed height or -1
+            'left', # 'justified', 'left', 'right' or 'center'
+            Action.NEXT, # Action or None
+            Position.ALIGN_RIGHT, # Relative position x
+            Position.CENTER, # Relative position y
+            self.command_rect # Reference rect
             )
 
-        else:
-            eprint ("WARNING: Unknown component to draw: "+str(component))
+    def _draw_countdown_fixation_cross(self, component):
+        """Countdown with fixation cross in the last second.
+        """
+        if (self.session is None or
+            self.session.active_block is None or
+            self.session.active_block.active_page is None):
+            eprint("WARNING: No active page to draw the component.")
+            return
+        self._countdown_text = self._getCountdownText()
+        self._draw_text(self._countdown_text, self.font_visual_stimulus,
+                        self.getColor('fixation_cross_color'), None)
+
+    def _getCountdownText(self):
+        """Returns the remaining seconds of the active page, or the fixation
+        cross in the last second.
+        """
+        remaining = int(self.session.active_block.active_page
+                        .get_remaining_page_time())
+        if remaining <= 0:
+            return "+"
+        return str(remaining)
+
+    def _updateCountdown(self):
+        """Redraws the countdown layer only when the displayed text changes.
+        """
+        if ('countdown_fixation_cross' not in self.active_components or
+            self.session is None or
+            self.session.active_block is None or
+            self.session.active_block.active_page is None):
+            return
+        if self._getCountdownText() != self._countdown_text:
+            self.invalidateUI('countdown_fixation_cross')
+
+    def _draw_happy_message(self, component):
+        """Encouraging message displayed in the description area.
+        """
+        background = (
+                self.getColor('color_background') if
+                self.isBeltConnected() else
+                self.getColor('color_background_warning'))
+        self._render_label(
+            self.messages[random.randrange(0,3)], # Text
+            self.font_title, # Font
+            self.getColor('color_instructions'), # Foreground color
+            background, # Background color
+            None, # Decoration color (or None)
+            self.values['padding_x_ui'], # Padding x
+            self.values['padding_y_ui'], # Padding y
+            self.values['margin_x_ui'], # Margin x
+            self.values['margin_y_ui'], # Margin y
+            -1, # Fixed width or -1
+            -1, # Fixed height or -1
+            'center', # 'justified', 'left', 'right' or 'center'
+            None, # Action or None
+            Position.ALIGN_LEFT, # Relative position x
+            Position.CENTER, # Relative position y
+            self.title_rect # Reference rect
+        )
+
+    def _draw_description_text(self, component):
+        """Render text in the description area.
+        """
+        background = (
+                self.getColor('color_background') if
+                self.isBeltConnected() else
+                self.getColor('color_background_warning'))
+        self._render_label(
+            self.getString(component), # Text
+            self.font_instruction, # Font
+            self.getColor('color_instructions'), # Foreground color
+            background, # Background color
+            None, # Decoration color (or None)
+            self.values['padding_x_ui'], # Padding x
+            self.values['padding_y_ui'], # Padding y
+            0, # Margin x
+            0, # Margin y
+            self.description_rect.width, # Fixed width or -1
+            self.description_rect.height, # Fixed height or -1
+            'left', # 'justified', 'left', 'right' or 'center'
+            None, # Action or None
+            Position.ALIGN_LEFT, # Relative position x
+            Position.ALIGN_TOP, # Relative position y
+            self.description_rect # Reference rect
+        )
 
     def _draw_text(self, text, font, color, background):
         if not color:
             eprint("WARNING: invalid color")
             return
-        text_surface = font.render(text, True, color, background)
+        text_surface = self.text_cache.render(text, font, color, background)
         text_rect = text_surface.get_rect(center=(
-            self.screen.get_width()/2,
-            self.screen.get_height()/2))
-        self.screen.blit(text_surface, text_rect)
+            self.canvas.get_width()/2,
+            self.canvas.get_height()/2))
+        self._drawn(self.canvas.blit(text_surface, text_rect))
 
     def _label_rect(self, text, font,
                     padding_x, padding_y):
-        text_rect = font.render(
-            text, True, (0, 0, 0)).get_rect()
+        text_rect = Rect((0, 0), self.text_cache.size(text, font))
         text_rect.width += padding_x*2
         text_rect.height += padding_y*2
         return text_rect
@@ -2190,156 +2390,71 @@ class Experiment(threading.Thread):
                       padding_x, padding_y, margin_x, margin_y,
                       fixed_width, fixed_height, justify,
                       action,
-                      rel_position_x, rel_position_y, ref_rect,
-                      keep_surface_glyph_id = None):
+                      rel_position_x, rel_position_y, ref_rect):
         # Render text
         text_surface = None
         text_rect = Rect(0, 0,
                          fixed_width-2*padding_x,
                          fixed_height-2*padding_y)
         if text is not None:
-            if (keep_surface_glyph_id and
-                keep_surface_glyph_id in self.stored_surfaces_glyphs):
-                # Retrieve existing surface or glyph
-                stored = self.stored_surfaces_glyphs[keep_surface_glyph_id]
-                if isinstance(stored, Glyph):
-                    text_surface = stored.image
-                else:
-                    text_surface = stored
-                    text_rect = text_surface.get_rect()
-            elif (fixed_width is not None and fixed_width > 0 and
+            if (fixed_width is not None and fixed_width > 0 and
                 fixed_height is not None and fixed_height > 0):
                 # Use Glyph
-                text_glyph = Glyph(
-                    text_rect,
-                    bkg = color_background,
-                    color = color_foreground,
-                    font = font)
-                text_glyph.input(text, justify, True)
-                text_surface = text_glyph.image
-                if keep_surface_glyph_id:
-                    # Store glyph
-                    self.stored_surfaces_glyphs[keep_surface_glyph_id] = (
-                        text_glyph)
+                text_surface = self._render_glyph(
+                    text, font, color_foreground, color_background,
+                    text_rect.size, justify)
             else:
                 # One line text
-                text_surface = font.render(
-                    text, True, color_foreground,
-                    color_background)
+                text_surface = self.text_cache.render(
+                    text, font, color_foreground, color_background)
                 text_rect = text_surface.get_rect()
-                if keep_surface_glyph_id:
-                    # Store surface
-                    self.stored_surfaces_glyphs[keep_surface_glyph_id] = (
-                        text_surface)
-        # Background rect
-        back_rect = ref_rect.copy()
-
-        back_rect.width = text_rect.width+2*padding_x
-        if fixed_width is not None:
-            back_rect.width = max(back_rect.width, fixed_width+2*padding_x)
-
-        back_rect.height = text_rect.height+2*padding_y
-        if fixed_height is not None:
-            back_rect.height = max(back_rect.height, fixed_height+2*padding_y)
-
-        if rel_position_x == Position.CENTER:
-            # *** CENTER ***
-            back_rect.x = ((ref_rect.x+ref_rect.width/2)-
-                            back_rect.width/2)
-
-        elif rel_position_x == Position.LEFT:
-            # *** LEFT ***
-            back_rect.x = (ref_rect.x-margin_x-
-                            back_rect.width)
-
-        elif rel_position_x == Position.ALIGN_LEFT:
-            # *** ALIGN_LEFT ***
-            back_rect.x = ref_rect.x+margin_x
-
-        elif rel_position_x == Position.RIGHT:
-            # *** RIGHT ***
-            back_rect.x = ref_rect.x+ref_rect.width+margin_x
-
-        elif rel_position_x == Position.ALIGN_RIGHT:
-            # *** ALIGN_RIGHT ***
-            back_rect.x = ((ref_rect.x+ref_rect.width)-
-                            back_rect.width-margin_x)
-
-        if rel_position_y == Position.CENTER:
-            # *** CENTER ***
-            back_rect.y = ((ref_rect.y+ref_rect.height/2)-
-                            back_rect.height/2)
-
-        elif rel_position_y == Position.TOP:
-            # *** TOP ***
-            back_rect.y = (ref_rect.y-margin_y-
-                            back_rect.height)
-
-        elif rel_position_y == Position.ALIGN_TOP:
-            # *** ALIGN_TOP ***
-            back_rect.y = ref_rect.y+margin_y
-
-        elif rel_position_y == Position.BOTTOM:
-            # *** BOTTOM ***
-            back_rect.y = ref_rect.y+ref_rect.height+margin_y
-
-        elif rel_position_y == Position.ALIGN_BOTTOM:
-            # *** ALIGN_BOTTOM ***
-            back_rect.y = ((ref_rect.y+ref_rect.height)-
-                            back_rect.height-margin_y)
-
-        # Text position
-        text_rect.x = back_rect.x+padding_x
-        text_rect.y = back_rect.y+padding_y
-        if justify == 'center':
-            text_rect.x = (back_rect.x+back_rect.width/2-
-                           text_rect.width/2)
-        elif justify == 'right':
-            text_rect.x = (back_rect.x+back_rect.width-
-                           text_rect.width-padding_x)
+        # Background and text rects
+        back_rect, text_rect = self.layout.placeLabel(
+            text_rect.size, padding_x, padding_y, margin_x, margin_y,
+            fixed_width, fixed_height, justify,
+            rel_position_x, rel_position_y, ref_rect)
 
         # Draw background
-        button = pygame.draw.rect(
-                self.screen,
+        self._drawn(pygame.draw.rect(
+                self.canvas,
                 color_background,
-                back_rect)
+                back_rect))
         if action is not None:
             self.active_buttons.append(
-                (action, button))
+                (action, back_rect))
         # Draw text
-        self.screen.blit(text_surface, text_rect)
+        self._drawn(self.canvas.blit(text_surface, text_rect))
         # Draw decoration for button
         if color_decoration is not None:
             corner_size = self.values['button_corner_size']
             corner_border = self.values['button_corner_border_size']
-            pygame.draw.polygon(
-                self.screen, color_decoration,
+            self._drawn(pygame.draw.polygon(
+                self.canvas, color_decoration,
                 [(back_rect.x+corner_border, back_rect.y+corner_border),
                  (back_rect.x+corner_border+corner_size,
                   back_rect.y+corner_border),
                  (back_rect.x+corner_border,
                   back_rect.y+corner_border+corner_size),
-                 (back_rect.x+corner_border, back_rect.y+corner_border)])
+                 (back_rect.x+corner_border, back_rect.y+corner_border)]))
         return back_rect
 
-class Position:
-    CENTER = 0
-    TOP = 1
-    ALIGN_TOP = 2
-    BOTTOM = 3
-    ALIGN_BOTTOM = 4
-    LEFT = 1
-    ALIGN_LEFT = 2
-    RIGHT = 3
-    ALIGN_RIGHT = 4
-
-class Justify:
-    LEFT = 'left'
-    RIGTH = 'right'
-    CENTER = 'center'
-    JUSTIFIED = 'justified'
-    TOP = 'top'
-    BOTTOM = 'bottom'
+    def _render_glyph(self, text, font, color_foreground, color_background,
+                      size, justify):
+        """Renders a multi-line text in a box of the given size, or retrieves
+        it from the text cache.
+        """
+        def render():
+            text_glyph = Glyph(
+                Rect((0, 0), size),
+                bkg = color_background,
+                color = color_foreground,
+                font = font)
+            text_glyph.input(text, justify, True)
+            return text_glyph.image
+        key = (textKey(text, font, color_foreground, color_background)+
+               (tuple(size), justify))
+        return self.text_cache.get(key, render)
+
 
 def main():
     """ experiment. """
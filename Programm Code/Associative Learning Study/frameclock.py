@@ -0,0 +1,128 @@
+# Frame clock for the update loop of the experiment.
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+import sys
+import time
+from pybelt.clock import clockSec
+
+DEFAULT_FRAME_RATE = 60
+# Frame rate used when the refresh rate of the display is unknown
+
+IDLE_SLICE = 0.001
+# Duration in seconds of the sleep between two calls of the idle function
+
+class FrameClock(object):
+    """Clock that locks a loop to a fixed frame rate.
+
+    At the end of each frame the clock sleeps with the OS timer for most of the
+    remaining time, and spin-waits only for the last part of the frame (the
+    busy-wait budget). Frames that end after their deadline are counted as
+    missed deadlines.
+    """
+
+    def __init__(self, frame_rate=0, spin_budget=0.0005):
+        """Constructor.
+
+        Parameters
+        ----------
+        :param float frame_rate:
+            The frame rate in Hz, or 0 to use the refresh rate of the display.
+        :param float spin_budget:
+            The duration in seconds of the busy-wait at the end of each frame.
+        """
+        if frame_rate is None or frame_rate <= 0:
+            frame_rate = getDisplayRefreshRate()
+        self.frame_rate = float(frame_rate)
+        self.frame_period = 1.0/self.frame_rate
+        self.spin_budget = spin_budget
+        # Statistics
+        self.frame_count = 0
+        self.missed_deadlines = 0
+        # Deadline of the current frame
+        self._deadline = None
+        self._timer_period_set = False
+
+    def start(self):
+        """Starts the first frame.
+        """
+        if sys.platform == 'win32' and not self._timer_period_set:
+            # Set the resolution of the OS timer to 1 ms for sleep
+            try:
+                import ctypes
+                ctypes.windll.winmm.timeBeginPeriod(1)
+                self._timer_period_set = True
+            except Exception:
+                pass
+        self.frame_count = 0
+        self.missed_deadlines = 0
+        self._deadline = clockSec()+self.frame_period
+
+    def stop(self):
+        """Stops the clock and restores the resolution of the OS timer.
+        """
+        if self._timer_period_set:
+            try:
+                import ctypes
+                ctypes.windll.winmm.timeEndPeriod(1)
+            except Exception:
+                pass
+            self._timer_period_set = False
+        self._deadline = None
+
+    def tick(self, idle_function=None):
+        """Waits for the end of the current frame and starts the next one.
+
+        Parameters
+        ----------
+        :param function idle_function:
+            Function without argument called repeatedly while the clock
+            sleeps, e.g. to poll input events. The function must return
+            quickly.
+        """
+        if self._deadline is None:
+            self.start()
+            return
+        self.frame_count += 1
+        remaining = self._deadline-clockSec()
+        if remaining < 0:
+            # Missed deadline, realign on the next frame boundary
+            self.missed_deadlines += 1
+            missed_frames = int(-remaining/self.frame_period)+1
+            self._deadline += missed_frames*self.frame_period
+            return
+        # Sleep with the OS timer
+        sleep_time = remaining-self.spin_budget
+        if idle_function is None:
+            if sleep_time > 0:
+                time.sleep(sleep_time)
+        else:
+            # Sleep in slices and call the idle function between slices
+            sleep_end = clockSec()+sleep_time
+            idle_function()
+            remaining_sleep = sleep_end-clockSec()
+            while remaining_sleep > 0:
+                time.sleep(min(remaining_sleep, IDLE_SLICE))
+                idle_function()
+                remaining_sleep = sleep_end-clockSec()
+        # Busy-wait until the deadline
+        while clockSec() < self._deadline:
+            pass
+        self._deadline += self.frame_period
+
+def getDisplayRefreshRate():
+    """Returns the refresh rate of the display, or the default frame rate if
+    the refresh rate cannot be retrieved.
+    """
+    try:
+        import pygame
+        refresh_rate = pygame.display.get_current_refresh_rate()
+        if refresh_rate > 0:
+            return refresh_rate
+    except Exception:
+        pass
+    return DEFAULT_FRAME_RATE
@@ -0,0 +1,217 @@
+# Polling of gamepad buttons in a dedicated thread.
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+from __future__ import print_function
+import sys
+import threading
+import time
+from common import eprint
+from pybelt.clock import clockNs, clockSec
+
+GAMEPAD_POLLING_RATE = 1000
+# Default polling rate of the gamepad buttons in Hz
+
+RESPONSE_BUFFER_SIZE = 256
+# Default capacity of the response buffer
+
+THREAD_JOIN_TIMEOUT_SEC = 1.0
+# Timeout for joining the polling thread
+
+class ResponseRingBuffer(object):
+    """Fixed-size ring buffer for one producer thread and one consumer thread.
+
+    The producer only writes the head index and the consumer only writes the
+    tail index, so that no lock is needed. Items pushed when the buffer is
+    full are dropped and counted.
+    """
+
+    def __init__(self, capacity=RESPONSE_BUFFER_SIZE):
+        """Constructor.
+
+        Parameters
+        ----------
+        :param int capacity:
+            The maximum number of items in the buffer.
+        """
+        self._items = [None]*(capacity+1)
+        self._size = capacity+1
+        # Index of the next item to write, only modified by the producer
+        self._head = 0
+        # Index of the next item to read, only modified by the consumer
+        self._tail = 0
+        # Number of items dropped because the buffer was full
+        self.dropped_count = 0
+
+    def push(self, item):
+        """Adds an item to the buffer (producer side).
+
+        Return
+        ------
+        :rtype bool
+            'False' if the buffer is full and the item has been dropped.
+        """
+        head = self._head
+        next_head = (head+1)%self._size
+        if next_head == self._tail:
+            self.dropped_count += 1
+            return False
+        self._items[head] = item
+        # Publish the item only once it has been written
+        self._head = next_head
+        return True
+
+    def drain(self):
+        """Removes and returns all items of the buffer (consumer side).
+
+        Return
+        ------
+        :rtype list
+            The items in order of arrival.
+        """
+        items = []
+        tail = self._tail
+        head = self._head
+        while tail != head:
+            items.append(self._items[tail])
+            self._items[tail] = None
+            tail = (tail+1)%self._size
+        self._tail = tail
+        return items
+
+class GamepadPoller(threading.Thread):
+    """Thread that polls the gamepad buttons and timestamps button presses.
+
+    Presses of mapped buttons are pushed in a :class:`ResponseRingBuffer` as
+    (action, clock_time) tuples, where the clock time is the time of the poll
+    that detected the press.
+
+    The buttons are read with the joystick API of Windows, which does not
+    depend on the pygame event loop. pygame must only be used by the main
+    thread, so the poller is not available on other platforms, see
+    :meth:`isAvailable`, and the buttons are read from the pygame events.
+    """
+
+    def __init__(self, button_actions, polling_rate=GAMEPAD_POLLING_RATE,
+                 joystick_index=0):
+        """Constructor.
+
+        Parameters
+        ----------
+        :param dict button_actions:
+            The actions by button index.
+        :param float polling_rate:
+            The polling rate in Hz.
+        :param int joystick_index:
+            The index of the joystick to poll.
+        """
+        threading.Thread.__init__(self, name="GamepadPoller")
+        self.daemon = True
+        self._button_actions = dict(button_actions)
+        self._polling_period = 1.0/polling_rate
+        self._joystick_index = joystick_index
+        # Function that returns the pressed buttons as a bit mask, or None
+        self._read_buttons = None
+        if sys.platform == 'win32':
+            self._read_buttons = _getWinMMButtonReader(joystick_index)
+        self.responses = ResponseRingBuffer()
+        # Flag for stopping the thread
+        self.stop_flag = False
+
+    def isAvailable(self):
+        """Returns 'True' if the gamepad can be polled by the thread.
+        """
+        return self._read_buttons is not None
+
+    def getResponses(self):
+        """Returns the responses detected since the last call.
+
+        Return
+        ------
+        :rtype list
+            List of (action, clock_time) tuples in order of arrival.
+        """
+        return self.responses.drain()
+
+    def stop(self):
+        """Stops and joins the polling thread.
+        """
+        self.stop_flag = True
+        if self.is_alive():
+            self.join(THREAD_JOIN_TIMEOUT_SEC)
+
+    def run(self):
+        """Starts the thread."""
+        self.stop_flag = False
+        read_buttons = self._read_buttons
+        if read_buttons is None:
+            eprint("WARNING: No gamepad to poll.")
+            return
+        print("GamepadPoller: Start polling gamepad.")
+        previous_buttons = 0
+        next_poll = clockSec()
+        while not self.stop_flag:
+            try:
+                buttons = read_buttons()
+            except Exception as e:
+                eprint("WARNING: Error when reading gamepad buttons.")
+                eprint(e)
+                break
+            clock_time = clockNs()
+            pressed = buttons & ~previous_buttons
+            previous_buttons = buttons
+            if pressed:
+                for button, action in self._button_actions.items():
+                    if pressed & (1 << button):
+                        self.responses.push((action, clock_time))
+            # Wait for next poll
+            next_poll += self._polling_period
+            remaining = next_poll-clockSec()
+            if remaining > 0:
+                time.sleep(remaining)
+            else:
+                next_poll = clockSec()
+        print("GamepadPoller: Stop polling gamepad.")
+
+def _getWinMMButtonReader(joystick_index):
+    """Returns a button reader using the Windows multimedia joystick API.
+    """
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class JOYINFOEX(ctypes.Structure):
+            _fields_ = [('dwSize', wintypes.DWORD),
+                        ('dwFlags', wintypes.DWORD),
+                        ('dwXpos', wintypes.DWORD),
+                        ('dwYpos', wintypes.DWORD),
+                        ('dwZpos', wintypes.DWORD),
+                        ('dwRpos', wintypes.DWORD),
+                        ('dwUpos', wintypes.DWORD),
+                        ('dwVpos', wintypes.DWORD),
+                        ('dwButtons', wintypes.DWORD),
+                        ('dwButtonNumber', wintypes.DWORD),
+                        ('dwPOV', wintypes.DWORD),
+                        ('dwReserved1', wintypes.DWORD),
+                        ('dwReserved2', wintypes.DWORD)]
+
+        JOY_RETURNBUTTONS = 0x00000080
+        joy_get_pos_ex = ctypes.windll.winmm.joyGetPosEx
+        info = JOYINFOEX()
+        info.dwSize = ctypes.sizeof(JOYINFOEX)
+        info.dwFlags = JOY_RETURNBUTTONS
+        info_ref = ctypes.byref(info)
+        if joy_get_pos_ex(joystick_index, info_ref) != 0:
+            return None
+
+        def read_buttons():
+            if joy_get_pos_ex(joystick_index, info_ref) != 0:
+                raise IOError("Gamepad disconnected.")
+            return info.dwButtons
+        return read_buttons
+    except Exception:
+        return None
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+# Test of the polling of gamepad buttons
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+import sys
+import threading
+import unittest
+from gamepadinput import ResponseRingBuffer, GamepadPoller
+
+class ResponseRingBufferTest(unittest.TestCase):
+
+    def testDrainInOrder(self):
+        buffer = ResponseRingBuffer(4)
+        for item in range(3):
+            self.assertTrue(buffer.push(item))
+        self.assertEqual(buffer.drain(), [0, 1, 2])
+        self.assertEqual(buffer.drain(), [])
+
+    def testFullBufferDropsItems(self):
+        buffer = ResponseRingBuffer(2)
+        self.assertTrue(buffer.push('a'))
+        self.assertTrue(buffer.push('b'))
+        self.assertFalse(buffer.push('c'))
+        self.assertEqual(buffer.dropped_count, 1)
+        self.assertEqual(buffer.drain(), ['a', 'b'])
+        self.assertTrue(buffer.push('d'))
+        self.assertEqual(buffer.drain(), ['d'])
+
+    def testWrapAround(self):
+        buffer = ResponseRingBuffer(3)
+        items = []
+        for item in range(10):
+            buffer.push(item)
+            if item%2 == 1:
+                items.extend(buffer.drain())
+        self.assertEqual(items, list(range(10)))
+        self.assertEqual(buffer.dropped_count, 0)
+
+    def testProducerAndConsumerThreads(self):
+        buffer = ResponseRingBuffer(16)
+        item_count = 1000
+        items = []
+
+        def produce():
+            item = 0
+            while item < item_count:
+                if buffer.push(item):
+                    item += 1
+        producer = threading.Thread(target=produce)
+        producer.start()
+        while len(items) < item_count:
+            items.extend(buffer.drain())
+        producer.join()
+        self.assertEqual(items, list(range(item_count)))
+
+class GamepadPollerTest(unittest.TestCase):
+
+    @unittest.skipIf(sys.platform == 'win32', "Polling available on Windows")
+    def testNotAvailableWithoutWindows(self):
+        poller = GamepadPoller({0: 'response'})
+        self.assertFalse(poller.isAvailable())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+# Timestamped input events of the experiment.
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+import pygame
+from pybelt.clock import clockNs, NS_PER_MS
+
+class InputQueue(object):
+    """Queue of pygame events with the clock time of each event.
+
+    Events are timestamped when they are polled. The queue is polled while the
+    update loop waits for the next frame, so that the timestamp is taken
+    within about one millisecond of the event instead of at the next loop
+    iteration. When SDL provides the time of an event, the event time is
+    converted to the clock time of the experiment.
+
+    Note: SDL events can only be retrieved from the main thread, therefore the
+    events are polled by the update loop and not by an input thread.
+    """
+
+    def __init__(self):
+        # Events as (event, clock_time) in order of arrival
+        self._events = []
+        # Clock time of the last poll
+        self._last_poll_clock_time = None
+
+    def poll(self):
+        """Retrieves the pending pygame events and timestamps them.
+        """
+        events = pygame.event.get()
+        poll_clock_time = clockNs()
+        if events:
+            poll_ticks = pygame.time.get_ticks()
+            for event in events:
+                self._events.append(
+                    (event, self._getClockTime(event, poll_clock_time,
+                                               poll_ticks)))
+        self._last_poll_clock_time = poll_clock_time
+
+    def get(self):
+        """Polls the pending events and returns all queued events.
+
+        Return
+        ------
+        :rtype list
+            List of (event, clock_time) tuples in order of arrival.
+        """
+        self.poll()
+        events = self._events
+        self._events = []
+        return events
+
+    def _getClockTime(self, event, poll_clock_time, poll_ticks):
+        """Returns the clock time of an event.
+        """
+        event_ticks = getattr(event, 'timestamp', None)
+        if event_ticks is None or event_ticks <= 0:
+            return poll_clock_time
+        clock_time = poll_clock_time-(poll_ticks-event_ticks)*NS_PER_MS
+        # The event cannot be older than the previous poll, and SDL ticks have
+        # a resolution of 1 ms
+        if (self._last_poll_clock_time is not None and
+            clock_time < self._last_poll_clock_time):
+            clock_time = self._last_poll_clock_time
+        return min(clock_time, poll_clock_time)
@@ -0,0 +1,234 @@
+# Layout of the UI areas and labels of the experiment.
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+from pygame.rect import Rect
+
+class Layout(object):
+    """Layout of the window areas and of the labels placed in these areas.
+
+    The areas are computed once for a window size. The placement of each label
+    is resolved on its first use and reused until the layout is updated, e.g.
+    when the window mode changes.
+    """
+
+    def __init__(self):
+        # Window areas
+        self.drawing_rect = None
+        self.title_rect = None
+        self.description_rect = None
+        self.description_top_rect = None
+        self.description_bottom_rect = None
+        self.description_left_rect = None
+        self.description_right_rect = None
+        self.command_rect = None
+        # Label placements by placement parameters
+        self._placements = {}
+
+    def update(self, screen_width, screen_height, values):
+        """Computes the window areas and clears the label placements.
+
+        Parameters
+        ----------
+        :param int screen_width:
+            The width of the window.
+        :param int screen_height:
+            The height of the window.
+        :param dict values:
+            The values of the experiment with the paddings and margins.
+        """
+        self._placements = {}
+        self.drawing_rect = Rect(
+            values['screen_padding_x'],
+            values['screen_padding_y'],
+            screen_width-values['screen_padding_x']*2,
+            screen_height-values['screen_padding_y']*2
+            )
+        self.title_rect = Rect(
+            self.drawing_rect.x,
+            self.drawing_rect.y,
+            self.drawing_rect.width,
+            self.drawing_rect.height//5
+            )
+        self.description_rect = Rect(
+            self.drawing_rect.x,
+            self.drawing_rect.height//5+values['margin_y_ui'],
+            self.drawing_rect.width,
+            self.drawing_rect.height//5*3-values['margin_y_ui']*2+20
+            )
+        self.description_top_rect = Rect(
+            self.description_rect.x,
+            self.description_rect.y,
+            self.description_rect.width,
+            self.description_rect.height//2
+            )
+        self.description_bottom_rect = Rect(
+            self.description_rect.x,
+            self.description_rect.y+self.description_rect.height//2,
+            self.description_rect.width,
+            self.description_rect.height//2
+            )
+        self.description_left_rect = Rect(
+            self.description_rect.x,
+            self.description_rect.y,
+            self.description_rect.width//2,
+            self.description_rect.height
+            )
+        self.description_right_rect = Rect(
+            self.description_rect.x+self.description_rect.width//2,
+            self.description_rect.y,
+            self.description_rect.width//2,
+            self.description_rect.height
+            )
+        self.command_rect = Rect(
+            self.drawing_rect.x,
+            self.drawing_rect.height//5*4,
+            self.drawing_rect.width//5*4,
+            self.drawing_rect.height//5
+            )
+
+    def placeLabel(self, text_size, padding_x, padding_y, margin_x, margin_y,
+                   fixed_width, fixed_height, justify,
+                   rel_position_x, rel_position_y, ref_rect):
+        """Returns the background and text rectangles of a label.
+
+        Parameters
+        ----------
+        :param tuple text_size:
+            The size (width, height) of the rendered text.
+        :param int padding_x:
+            Horizontal padding between background and text.
+        :param int padding_y:
+            Vertical padding between background and text.
+        :param int margin_x:
+            Horizontal margin between the label and the reference rect.
+        :param int margin_y:
+            Vertical margin between the label and the reference rect.
+        :param int fixed_width:
+            Fixed width of the text, or -1.
+        :param int fixed_height:
+            Fixed height of the text, or -1.
+        :param str justify:
+            Justification of the text, see :class:`Justify`.
+        :param int rel_position_x:
+            Horizontal position relative to the reference rect, see
+            :class:`Position`.
+        :param int rel_position_y:
+            Vertical position relative to the reference rect, see
+            :class:`Position`.
+        :param Rect ref_rect:
+            The reference rect.
+
+        Return
+        ------
+        :rtype tuple
+            The background rect and the text rect. The returned rects must not
+            be modified.
+        """
+        key = (tuple(text_size), padding_x, padding_y, margin_x, margin_y,
+               fixed_width, fixed_height, justify,
+               rel_position_x, rel_position_y, tuple(ref_rect))
+        placement = self._placements.get(key)
+        if placement is None:
+            placement = _placeLabel(
+                Rect((0, 0), text_size), padding_x, padding_y,
+                margin_x, margin_y, fixed_width, fixed_height, justify,
+                rel_position_x, rel_position_y, ref_rect)
+            self._placements[key] = placement
+        return placement
+
+def _placeLabel(text_rect, padding_x, padding_y, margin_x, margin_y,
+                fixed_width, fixed_height, justify,
+                rel_position_x, rel_position_y, ref_rect):
+    """Computes the background and text rectangles of a label.
+    """
+    # Background rect
+    back_rect = ref_rect.copy()
+
+    back_rect.width = text_rect.width+2*padding_x
+    if fixed_width is not None:
+        back_rect.width = max(back_rect.width, fixed_width+2*padding_x)
+
+    back_rect.height = text_rect.height+2*padding_y
+    if fixed_height is not None:
+        back_rect.height = max(back_rect.height, fixed_height+2*padding_y)
+
+    if rel_position_x == Position.CENTER:
+        # *** CENTER ***
+        back_rect.x = ((ref_rect.x+ref_rect.width//2)-
+                        back_rect.width//2)
+
+    elif rel_position_x == Position.LEFT:
+        # *** LEFT ***
+        back_rect.x = (ref_rect.x-margin_x-
+                        back_rect.width)
+
+    elif rel_position_x == Position.ALIGN_LEFT:
+        # *** ALIGN_LEFT ***
+        back_rect.x = ref_rect.x+margin_x
+
+    elif rel_position_x == Position.RIGHT:
+        # *** RIGHT ***
+        back_rect.x = ref_rect.x+ref_rect.width+margin_x
+
+    elif rel_position_x == Position.ALIGN_RIGHT:
+        # *** ALIGN_RIGHT ***
+        back_rect.x = ((ref_rect.x+ref_rect.width)-
+                        back_rect.width-margin_x)
+
+    if rel_position_y == Position.CENTER:
+        # *** CENTER ***
+        back_rect.y = ((ref_rect.y+ref_rect.height//2)-
+                        back_rect.height//2)
+
+    elif rel_position_y == Position.TOP:
+        # *** TOP ***
+        back_rect.y = (ref_rect.y-margin_y-
+                        back_rect.height)
+
+    elif rel_position_y == Position.ALIGN_TOP:
+        # *** ALIGN_TOP ***
+        back_rect.y = ref_rect.y+margin_y
+
+    elif rel_position_y == Position.BOTTOM:
+        # *** BOTTOM ***
+        back_rect.y = ref_rect.y+ref_rect.height+margin_y
+
+    elif rel_position_y == Position.ALIGN_BOTTOM:
+        # *** ALIGN_BOTTOM ***
+        back_rect.y = ((ref_rect.y+ref_rect.height)-
+                        back_rect.height-margin_y)
+
+    # Text position
+    text_rect.x = back_rect.x+padding_x
+    text_rect.y = back_rect.y+padding_y
+    if justify == Justify.CENTER:
+        text_rect.x = (back_rect.x+back_rect.width//2-
+                       text_rect.width//2)
+    elif justify == Justify.RIGTH:
+        text_rect.x = (back_rect.x+back_rect.width-
+                       text_rect.width-padding_x)
+    return (back_rect, text_rect)
+
+class Position:
+    CENTER = 0
+    TOP = 1
+    ALIGN_TOP = 2
+    BOTTOM = 3
+    ALIGN_BOTTOM = 4
+    LEFT = 1
+    ALIGN_LEFT = 2
+    RIGHT = 3
+    ALIGN_RIGHT = 4
+
+class Justify:
+    LEFT = 'left'
+    RIGTH = 'right'
+    CENTER = 'center'
+    JUSTIFIED = 'justified'
+    TOP = 'top'
+    BOTTOM = 'bottom'
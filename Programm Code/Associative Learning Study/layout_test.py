@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+# Test of the layout of the UI areas and labels
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+import unittest
+from pygame.rect import Rect
+from layout import Layout, Position, Justify
+
+VALUES = {
+    'screen_padding_x': 10,
+    'screen_padding_y': 20,
+    'margin_y_ui': 5
+    }
+# Paddings and margins of the experiment
+
+class LayoutTest(unittest.TestCase):
+
+    def setUp(self):
+        self.layout = Layout()
+        self.layout.update(1020, 1040, VALUES)
+        self.ref_rect = Rect(100, 100, 200, 100)
+
+    def _place(self, rel_position_x, rel_position_y, justify=Justify.LEFT,
+               fixed_width=None):
+        return self.layout.placeLabel((40, 10), 4, 2, 8, 6, fixed_width, None,
+                                      justify, rel_position_x, rel_position_y,
+                                      self.ref_rect)
+
+    def testAreas(self):
+        self.assertEqual(self.layout.drawing_rect, Rect(10, 20, 1000, 1000))
+        self.assertEqual(self.layout.title_rect, Rect(10, 20, 1000, 200))
+        self.assertEqual(self.layout.description_rect,
+                         Rect(10, 205, 1000, 610))
+        self.assertEqual(self.layout.description_bottom_rect,
+                         Rect(10, 510, 1000, 305))
+        self.assertEqual(self.layout.description_right_rect,
+                         Rect(510, 205, 500, 610))
+        self.assertEqual(self.layout.command_rect, Rect(10, 800, 800, 200))
+
+    def testCenter(self):
+        back_rect, text_rect = self._place(Position.CENTER, Position.CENTER)
+        self.assertEqual(back_rect, Rect(176, 143, 48, 14))
+        self.assertEqual(text_rect, Rect(180, 145, 40, 10))
+
+    def testOutsideReferenceRect(self):
+        back_rect, _ = self._place(Position.LEFT, Position.TOP)
+        self.assertEqual(back_rect.topleft, (100-8-48, 100-6-14))
+        back_rect, _ = self._place(Position.RIGHT, Position.BOTTOM)
+        self.assertEqual(back_rect.topleft, (300+8, 200+6))
+
+    def testAlignedInReferenceRect(self):
+        back_rect, _ = self._place(Position.ALIGN_LEFT, Position.ALIGN_TOP)
+        self.assertEqual(back_rect.topleft, (108, 106))
+        back_rect, _ = self._place(Position.ALIGN_RIGHT, Position.ALIGN_BOTTOM)
+        self.assertEqual(back_rect.bottomright, (292, 194))
+
+    def testJustifyInFixedWidth(self):
+        back_rect, text_rect = self._place(Position.ALIGN_LEFT,
+                                           Position.ALIGN_TOP,
+                                           Justify.CENTER, 100)
+        self.assertEqual(back_rect.width, 108)
+        self.assertEqual(text_rect.centerx, back_rect.centerx)
+        back_rect, text_rect = self._place(Position.ALIGN_LEFT,
+                                           Position.ALIGN_TOP,
+                                           Justify.RIGTH, 100)
+        self.assertEqual(text_rect.right, back_rect.right-4)
+
+    def testPlacementIsReused(self):
+        placement = self._place(Position.CENTER, Position.CENTER)
+        self.assertIs(self._place(Position.CENTER, Position.CENTER),
+                      placement)
+        self.layout.update(1020, 1040, VALUES)
+        self.assertIsNot(self._place(Position.CENTER, Position.CENTER),
+                         placement)
+
+    def testPlacementDependsOnReferenceRect(self):
+        back_rect, _ = self._place(Position.CENTER, Position.CENTER)
+        self.ref_rect = Rect(0, 0, 200, 100)
+        moved_rect, _ = self._place(Position.CENTER, Position.CENTER)
+        self.assertEqual(moved_rect.topleft,
+                         (back_rect.x-100, back_rect.y-100))
+
+if __name__ == "__main__":
+    unittest.main()
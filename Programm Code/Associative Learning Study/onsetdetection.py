@@ -0,0 +1,138 @@
+# Streaming detection of sound onsets and offsets on the power of audio chunks
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+import numpy as np
+
+def chunkPower(chunk):
+    """Returns the power of an audio chunk, as the root mean square of the
+    samples.
+
+    Parameters
+    ----------
+    :param numpy.ndarray chunk:
+        The samples of the chunk.
+
+    Return
+    ------
+    :rtype float
+        The power of the chunk.
+    """
+    return float(np.sqrt(np.mean(np.square(chunk, dtype=np.float64))))
+
+class ThresholdOnsetDetector(object):
+    """Streaming detector of onsets and offsets based on thresholds.
+
+    An onset is detected when the power of the last `onset_window` chunks is
+    above the onset threshold, and an offset when the power of the last
+    `offset_window` chunks is below the offset threshold. The thresholds are
+    levels multiplied by the baseline power.
+
+    The detector keeps the number of consecutive chunks above and below the
+    thresholds, so that each chunk is processed in constant time. The power of
+    the last chunks is kept in a fixed-size buffer, from which the counts are
+    computed again when the baseline changes.
+    """
+
+    def __init__(self, threshold_level_onset, threshold_level_offset,
+                 onset_window, offset_window):
+        """Constructor.
+
+        Parameters
+        ----------
+        :param float threshold_level_onset:
+            The threshold level for detecting onset.
+        :param float threshold_level_offset:
+            The threshold level for detecting offset.
+        :param int onset_window:
+            The number of chunks of the onset condition.
+        :param int offset_window:
+            The number of chunks of the offset condition.
+        """
+        self._threshold_level_onset = threshold_level_onset
+        self._threshold_level_offset = threshold_level_offset
+        self._onset_window = onset_window
+        self._offset_window = offset_window
+        # Power of the last chunks
+        self._powers = np.zeros(max(onset_window, offset_window, 1))
+        self.reset()
+
+    def reset(self):
+        """Clears the chunks and the detection state.
+        """
+        # Number of chunks processed
+        self._count = 0
+        self._baseline = None
+        self._threshold_onset = None
+        self._threshold_offset = None
+        # Consecutive last chunks above onset and below offset thresholds
+        self._above_count = 0
+        self._below_count = 0
+        # Detection state
+        self.active_onset = False
+
+    def process(self, power, baseline):
+        """Processes the power of a chunk.
+
+        Parameters
+        ----------
+        :param float power:
+            The power of the chunk.
+        :param float baseline:
+            The baseline power of the record.
+
+        Return
+        ------
+        :rtype bool
+            'True' if an onset is detected, 'False' if an offset is detected,
+            or None.
+        """
+        self._powers[self._count%len(self._powers)] = power
+        self._count += 1
+        if baseline != self._baseline:
+            self._setBaseline(baseline)
+        else:
+            if power > self._threshold_onset:
+                self._above_count += 1
+            else:
+                self._above_count = 0
+            if power < self._threshold_offset:
+                self._below_count += 1
+            else:
+                self._below_count = 0
+        if self.active_onset:
+            # Less chunks than the window are enough for offset
+            if self._below_count >= min(self._offset_window, self._count):
+                self.active_onset = False
+                return False
+        elif (self._count >= self._onset_window and
+              self._above_count >= self._onset_window):
+            self.active_onset = True
+            return True
+        return None
+
+    def _setBaseline(self, baseline):
+        """Sets the thresholds and counts the consecutive chunks again.
+        """
+        self._baseline = baseline
+        self._threshold_onset = self._threshold_level_onset*baseline
+        self._threshold_offset = self._threshold_level_offset*baseline
+        # Buffered power in chronological order
+        size = len(self._powers)
+        end = self._count%size
+        powers = np.concatenate((self._powers[end:], self._powers[:end]))
+        powers = powers[size-min(self._count, size):]
+        self._above_count = _trailingCount(powers > self._threshold_onset)
+        self._below_count = _trailingCount(powers < self._threshold_offset)
+
+def _trailingCount(conditions):
+    """Returns the number of consecutive 'True' at the end of an array.
+    """
+    false_indexes = np.flatnonzero(~conditions)
+    if len(false_indexes) == 0:
+        return len(conditions)
+    return len(conditions)-1-int(false_indexes[-1])
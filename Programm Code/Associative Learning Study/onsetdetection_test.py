@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+
+# Test of the streaming detection of sound onsets and offsets
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+import random
+import unittest
+import numpy as np
+from onsetdetection import chunkPower, ThresholdOnsetDetector
+
+def _detectInWindows(powers, baselines, level_onset, level_offset,
+                     onset_window, offset_window):
+    """Detects onsets and offsets by checking the whole windows at each chunk.
+    """
+    results = []
+    active_onset = False
+    for count in range(1, len(powers)+1):
+        baseline = baselines[count-1]
+        result = None
+        if active_onset:
+            window = powers[max(0, count-offset_window):count]
+            if all(power < level_offset*baseline for power in window):
+                active_onset = False
+                result = False
+        elif count >= onset_window:
+            window = powers[count-onset_window:count]
+            if all(power > level_onset*baseline for power in window):
+                active_onset = True
+                result = True
+        results.append(result)
+    return results
+
+class ThresholdOnsetDetectorTest(unittest.TestCase):
+
+    def testOnsetAndOffset(self):
+        detector = ThresholdOnsetDetector(8, 2, 3, 4)
+        powers = [1, 1, 10, 10, 10, 10, 1, 1, 1, 1, 1]
+        results = [detector.process(power, 1.0) for power in powers]
+        self.assertEqual(results, [None, None, None, None, True, None, None,
+                                   None, None, False, None])
+        self.assertFalse(detector.active_onset)
+
+    def testShortBurstIsIgnored(self):
+        detector = ThresholdOnsetDetector(8, 2, 3, 4)
+        results = [detector.process(power, 1.0)
+                   for power in [10, 10, 1, 10, 10, 1]]
+        self.assertEqual(results, [None]*6)
+
+    def testBaselineChangeUsesBufferedChunks(self):
+        detector = ThresholdOnsetDetector(8, 2, 3, 4)
+        for power in [10, 10]:
+            self.assertIsNone(detector.process(power, 2.0))
+        # Chunks above the new onset threshold of 8
+        self.assertTrue(detector.process(10, 1.0))
+
+    def testReset(self):
+        detector = ThresholdOnsetDetector(8, 2, 1, 1)
+        self.assertTrue(detector.process(10, 1.0))
+        detector.reset()
+        self.assertFalse(detector.active_onset)
+        self.assertTrue(detector.process(10, 1.0))
+
+    def testSameResultsAsWindows(self):
+        rng = random.Random(3)
+        powers = [rng.choice([0.5, 1.5, 5.0, 12.0]) for _ in range(2000)]
+        baselines = []
+        baseline = 1.0
+        for _ in powers:
+            if rng.random() < 0.02:
+                baseline = rng.choice([0.5, 1.0, 2.0])
+            baselines.append(baseline)
+        detector = ThresholdOnsetDetector(4, 2, 3, 5)
+        results = [detector.process(power, baseline)
+                   for power, baseline in zip(powers, baselines)]
+        self.assertEqual(results, _detectInWindows(powers, baselines, 4, 2,
+                                                   3, 5))
+
+class ChunkPowerTest(unittest.TestCase):
+
+    def testRootMeanSquare(self):
+        chunk = np.array([3, -3, 3, -3], dtype=np.int16)
+        self.assertAlmostEqual(chunkPower(chunk), 3.0)
+
+    def testNoOverflow(self):
+        chunk = np.full(4, -32768, dtype=np.int16)
+        self.assertAlmostEqual(chunkPower(chunk), 32768.0)
+
+if __name__ == "__main__":
+    unittest.main()
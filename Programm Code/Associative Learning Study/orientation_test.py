@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+# Test of the ring buffer of orientation notifications
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+import unittest
+from pybelt.clock import NS_PER_MS
+from pybelt.orientation import OrientationRingBuffer
+
+class OrientationRingBufferTest(unittest.TestCase):
+
+    def _push(self, buffer, count, first=0):
+        for sample in range(first, first+count):
+            buffer.push(sample*20*NS_PER_MS, sample, -sample)
+
+    def testSnapshot(self):
+        buffer = OrientationRingBuffer(8)
+        self._push(buffer, 3)
+        first, clock_times, headings, offsets = buffer.getSnapshot()
+        self.assertEqual(first, 0)
+        self.assertEqual(list(clock_times), [0, 20*NS_PER_MS, 40*NS_PER_MS])
+        self.assertEqual(list(headings), [0, 1, 2])
+        self.assertEqual(list(offsets), [0, -1, -2])
+
+    def testEmpty(self):
+        buffer = OrientationRingBuffer(8)
+        first, clock_times, _, _ = buffer.getSnapshot()
+        self.assertEqual((first, len(clock_times)), (0, 0))
+        self.assertIsNone(buffer.getRateStatistics())
+
+    def testOverwriteKeepsNextSlotOut(self):
+        buffer = OrientationRingBuffer(8)
+        self._push(buffer, 20)
+        first, segments = buffer.getSegments()
+        # The slot of the next sample is not returned
+        self.assertEqual(first, 13)
+        self.assertEqual(len(segments), 2)
+        self.assertEqual(list(buffer.getSnapshot()[2]), list(range(13, 20)))
+
+    def testSince(self):
+        buffer = OrientationRingBuffer(8)
+        self._push(buffer, 10)
+        first, _, headings, _ = buffer.getSnapshot(since=7)
+        self.assertEqual((first, list(headings)), (7, [7, 8, 9]))
+        # Samples already overwritten are skipped
+        self.assertEqual(buffer.getSnapshot(since=0)[0], 3)
+        self.assertEqual(len(buffer.getSnapshot(since=10)[1]), 0)
+
+    def testIsValid(self):
+        buffer = OrientationRingBuffer(8)
+        self._push(buffer, 10)
+        self.assertTrue(buffer.isValid(3))
+        self.assertFalse(buffer.isValid(2))
+
+    def testHeadingHistoryIsContinuous(self):
+        buffer = OrientationRingBuffer(8)
+        for sample, heading in enumerate([350, 355, 0, 5, 10]):
+            buffer.push(sample*NS_PER_MS, heading, 0)
+        _, headings = buffer.getHeadingHistory()
+        self.assertEqual([int(round(heading)) for heading in headings],
+                         [350, 355, 360, 365, 370])
+
+    def testRateStatistics(self):
+        buffer = OrientationRingBuffer(8)
+        self._push(buffer, 5)
+        statistics = buffer.getRateStatistics()
+        self.assertEqual(statistics['count'], 5)
+        self.assertAlmostEqual(statistics['rate'], 50.0)
+        self.assertAlmostEqual(statistics['max_gap'], 0.02)
+        self.assertAlmostEqual(statistics['jitter'], 0.0)
+
+    def testClear(self):
+        buffer = OrientationRingBuffer(8)
+        self._push(buffer, 5)
+        buffer.clear()
+        self.assertEqual(buffer.getCount(), 0)
+        self.assertEqual(len(buffer.getSnapshot()[1]), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,7 +7,7 @@
 # Last update: 20.08.2018
 
 from common import eprint, Action
-import time
+from pybelt.clock import clockNs, toSec
 
 class Page:
     """Page with information for a block.
@@ -37,7 +37,7 @@ class Page:
         if self.state == PageState.ACTIVE:
             eprint("WARNING: Start a page already active.")
             return
-        self.start_page_clock_time = time.clock()
+        self.start_page_clock_time = clockNs()
         self.experiment.showUIComponents(
             components=self.config['page_gui'])
         self.state = PageState.ACTIVE
@@ -58,7 +58,7 @@ class Page:
         if (self.state == PageState.ACTIVE and
             self.config['page_timeout'] > 0):
             remaining = (float(self.config['page_timeout'])-
-                         (time.clock()-self.start_page_clock_time))
+                         toSec(clockNs()-self.start_page_clock_time))
             if remaining > 0:
                 return remaining
             else:
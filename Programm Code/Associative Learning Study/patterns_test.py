@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+
+# Test of the vibration pattern compiler of pybelt
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+import unittest
+from pybelt.patterns import VibrationPattern, compilePattern
+
+STOP_PACKET = b'\x84\x00\x00\x00\xAA\x0A'
+# Stop packet of channel 0 before firmware version 30
+
+class VibrationPatternTest(unittest.TestCase):
+
+    def testOverlappingVibrationsAreRejected(self):
+        pattern = VibrationPattern()
+        pattern.addVibration([3], 0, 200)
+        with self.assertRaises(ValueError):
+            pattern.addVibration([3], 100, 200)
+        with self.assertRaises(ValueError):
+            pattern.addVibration([16], 0, 100)
+
+    def testIntensityFrames(self):
+        pattern = VibrationPattern.fromIntensityFrames(
+            [[50, 0], [50, 50], [0, 50]], 100)
+        self.assertEqual(pattern.getSegments(0), [(0, 200, 50)])
+        self.assertEqual(pattern.getSegments(1), [(100, 300, 50)])
+        self.assertEqual(pattern.getDuration(), 300)
+
+class PulseCommandTest(unittest.TestCase):
+    """Firmware version 33 and above, command 0x8A.
+    """
+
+    def testSingleVibration(self):
+        pattern = VibrationPattern()
+        pattern.addVibration([4], 0, 500, 80)
+        compiled = compilePattern(pattern, 40)
+        self.assertEqual(compiled.commands, [
+            (0, 1, bytes(bytearray([0x8A, 0x01, 0x04, 0x00, 80, 1,
+                                    0xF4, 0x01, 0xF4, 0x01, 0x00, 0x0A])),
+             0xCA, 0)])
+        self.assertEqual(compiled.getByteCount(), 12)
+
+    def testPulsesAreMergedInOneCommand(self):
+        pattern = VibrationPattern()
+        pattern.addPulses([0, 8], 100, 100, 150, 4)
+        compiled = compilePattern(pattern, 40)
+        # Mask of vibromotors 0 and 8, 4 pulses of 100 ms every 250 ms
+        self.assertEqual(compiled.commands, [
+            (100, 1, bytes(bytearray([0x8A, 0x00, 0x01, 0x01, 170, 4,
+                                      0x64, 0x00, 0xFA, 0x00, 0x00, 0x0A])),
+             0xCA, 0)])
+        self.assertEqual(compiled.duration_ms, 950)
+
+    def testIrregularPulsesAreSplit(self):
+        pattern = VibrationPattern()
+        pattern.addPulses([2], 0, 100, 100, 2)
+        pattern.addVibration([2], 500, 100)
+        compiled = compilePattern(pattern, 40)
+        self.assertEqual([(command[0], bytearray(command[2])[5])
+                          for command in compiled.commands],
+                         [(0, 2), (500, 1)])
+
+    def testOverlappingVibrationsUseFreeChannels(self):
+        pattern = VibrationPattern()
+        pattern.addVibration([0], 0, 500)
+        pattern.addVibration([4], 200, 200)
+        pattern.addVibration([8], 500, 100)
+        compiled = compilePattern(pattern, 40)
+        self.assertEqual([(command[0], bytearray(command[2])[1], command[4])
+                          for command in compiled.commands],
+                         [(0, 0x01, 0), (200, 0x11, 1), (500, 0x01, 0)])
+
+    def testTooManyVibrationsAtTheSameTime(self):
+        pattern = VibrationPattern()
+        for position in range(7):
+            pattern.addVibration([position], 0, 100+10*position)
+        with self.assertRaises(ValueError):
+            compilePattern(pattern, 40)
+
+    def testDurationOutOfResolutionUsesStopCommand(self):
+        pattern = VibrationPattern()
+        pattern.addVibration([1], 0, 505)
+        compiled = compilePattern(pattern, 40)
+        self.assertEqual(compiled.commands, [
+            (0, 1, b'\x87\x01\x01\x00\xAA\x00\x0A', 0xC7, 0),
+            (505, 0, b'\x88\x01\x00\x00\x00\x0A', 0xC8, 0)])
+
+    def testAdjustIndex(self):
+        pattern = VibrationPattern()
+        pattern.addVibration([15], 0, 100)
+        compiled = compilePattern(pattern, 40,
+                                  adjust_index=lambda index: (index+2)%16)
+        self.assertEqual(bytearray(compiled.commands[0][2])[2], 1)
+
+class ChannelCommandTest(unittest.TestCase):
+    """Firmware versions 30 to 32, commands 0x87 and 0x88.
+    """
+
+    def testPulsesAreSeparateCommands(self):
+        pattern = VibrationPattern()
+        pattern.addPulses([2], 0, 100, 100, 3)
+        compiled = compilePattern(pattern, 31)
+        start = b'\x87\x01\x02\x00\xAA\x00\x0A'
+        stop = b'\x88\x01\x00\x00\x00\x0A'
+        self.assertEqual(compiled.commands, [
+            (0, 1, start, 0xC7, 0), (100, 0, stop, 0xC8, 0),
+            (200, 1, start, 0xC7, 0), (300, 0, stop, 0xC8, 0),
+            (400, 1, start, 0xC7, 0), (500, 0, stop, 0xC8, 0)])
+
+    def testNoStopBetweenContiguousVibrations(self):
+        pattern = VibrationPattern()
+        pattern.addVibration([2], 0, 100, 50)
+        pattern.addVibration([2], 100, 100, 80)
+        compiled = compilePattern(pattern, 31)
+        self.assertEqual(compiled.commands, [
+            (0, 1, b'\x87\x01\x02\x00\x32\x00\x0A', 0xC7, 0),
+            (100, 1, b'\x87\x01\x02\x00\x50\x00\x0A', 0xC7, 0),
+            (200, 0, b'\x88\x01\x00\x00\x00\x0A', 0xC8, 0)])
+
+    def testStopIsSentBeforeStartAtSameTime(self):
+        pattern = VibrationPattern()
+        pattern.addVibration([0, 1], 0, 100)
+        pattern.addVibration([5], 100, 100)
+        compiled = compilePattern(pattern, 31)
+        self.assertEqual([(command[0], command[1], command[3])
+                          for command in compiled.commands],
+                         [(0, 1, 0xC7), (100, 0, 0xC8), (100, 1, 0xC7),
+                          (200, 0, 0xC8)])
+        # Mask of vibromotors 0 and 1
+        self.assertEqual(compiled.commands[0][2],
+                         b'\x87\x00\x03\x00\xAA\x00\x0A')
+
+class SingleChannelTest(unittest.TestCase):
+    """Firmware versions below 30, commands 0x84 and 0x86.
+    """
+
+    def testMaskChangesWithVibrations(self):
+        pattern = VibrationPattern()
+        pattern.addVibration([0], 0, 200)
+        pattern.addVibration([4], 100, 200)
+        compiled = compilePattern(pattern, 20)
+        self.assertEqual(compiled.commands, [
+            (0, 1, b'\x86\x20\x00\x00\xAA\x0A', 0xC6, 0),
+            (100, 1, b'\x86\x22\x00\x00\xAA\x0A', 0xC6, 0),
+            (200, 1, b'\x86\x02\x00\x00\xAA\x0A', 0xC6, 0),
+            (300, 0, STOP_PACKET, 0xC4, 0)])
+
+    def testSameStateIsNotSentAgain(self):
+        pattern = VibrationPattern()
+        pattern.addVibration([3], 0, 100, 60)
+        pattern.addVibration([3], 100, 100, 60)
+        compiled = compilePattern(pattern, 20)
+        self.assertEqual(compiled.getCommandCount(), 2)
+        self.assertEqual(compiled.commands[1], (200, 0, STOP_PACKET, 0xC4, 0))
+
+    def testDifferentIntensitiesAtTheSameTime(self):
+        pattern = VibrationPattern()
+        pattern.addVibration([0], 0, 200, 50)
+        pattern.addVibration([4], 100, 200, 80)
+        with self.assertRaises(ValueError):
+            compilePattern(pattern, 20)
+
+if __name__ == "__main__":
+    unittest.main()
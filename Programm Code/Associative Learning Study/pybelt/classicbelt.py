@@ -6,24 +6,34 @@
 
 # Last update: 19.02.2019
 
-#import bluetooth # Bluetooth module from pyBluez
 import serial #@UnusedImport # PySerial for USB connection
 import serial.tools.list_ports
 import threading # For socket listener and event notifier
 import time # For timeouts
+# Monotonic clock of the experiment
+from pybelt.clock import clockSec, clockNs, toNs, toSec, NS_PER_MS
 import math # For fmod on float
 import queue
-from psychopy import core 
-import sys # Only for Python version
+import collections # For pending acknowledgments
+import heapq # For scheduled commands
+from concurrent.futures import Future # For acknowledgments
+from concurrent.futures import TimeoutError as FutureTimeoutError
+# For lookup and capability refresh
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import sys # For Python version and platform
+import os # For capability cache
+import json # For capability cache
 from builtins import bytes # For Python 2.7/3 compatibility
-import traceback
+from pybelt.transport import (SerialTransport, RfcommTransport,
+                              _PacketFramer, THREAD_JOIN_TIMEOUT_SEC,
+                              SERIAL_BAUDRATE, SERIAL_READ_MIN_BATCH,
+                              SERIAL_READ_LATENCY_CAP)
+from pybelt.orientation import OrientationRingBuffer, ORIENTATION_BUFFER_SIZE
+from pybelt.patterns import VibrationPattern, compilePattern
 
 BELT_UUID = "00001101-0000-1000-8000-00805F9B34FB"
 # Belt BT UUID
 
-BELT_BT_COMM_PORT = 1
-# Bluetooth communication port
-
 BT_LOOKUP_DURATION = 3
 # Bluetooth lookup duration in seconds
 
@@ -36,38 +46,74 @@ VIBROMOTORS_ANGLE = 22.5
 WAIT_ACK_TIMEOUT_SEC = 0.5
 # Timeout for waiting ACK
 
-INCOMING_PACKET_TIMEOUT = 0.5
-# Timeout to receive a complete packet
+RTT_SMOOTHING_FACTOR = 0.125
+# Weight of a new sample in the smoothed round-trip time
+
+RTT_DEVIATION_FACTOR = 0.25
+# Weight of a new sample in the round-trip time deviation
+
+RTT_DEVIATION_BOUND = 2
+# Number of round-trip time deviations in the bound of unacknowledged commands
+
+RTO_DEVIATION_FACTOR = 4
+# Number of round-trip time deviations in the timeout of tracked ACK
+
+TRACKED_ACK_MIN_TIMEOUT_SEC = 0.02
+# Minimum timeout of tracked ACK, the maximum is the timeout for waiting ACK
 
 HANDSHAKE_TIMEOUT_SEC = 3.0
 # Timeout for handshake
 
-THREAD_JOIN_TIMEOUT_SEC = 2.0
-# Timeout to wait thread termination
+DEFERRED_WRITE_MAX_DELAY = 0.05
+# Maximum delay in seconds of keep-alive replies and background requests
+
+KEEP_ALIVE_REPLY = b'\xF1\xAA\xAA\xAA\xAA\x0A'
+# Acknowledgment of a keep-alive notification
 
-SERIAL_BAUDRATE = 115200
-# Baudrate for serial connection
+SCHEDULER_SPIN_DURATION = 0.002
+# Duration in seconds of the busy wait before a scheduled command, longer than
+# the sleep granularity of the OS with a timer resolution of 1 ms
 
 SERIAL_CONNECTION_INIT_WAIT = 5.0
-# Waiting time between connection and communication
+# Maximum waiting time for the first keep-alive after a serial connection
 
 SERIAL_LOOKUP_WRITE_TIMEOUT = 1.0
 # Timeout for write operation when testing ports
 
-SERIAL_READ_TIMEOUT = 1.0
-# Timeout to read one byte on serial port
-
 SERIAL_LOOKUP_ACK_TIMEOUT = 2.0
 # Timeout to received the ACK during port testing
 
+SERIAL_LOOKUP_REQUEST = b'\x90\x02\xAA\xAA\xAA\x0A'
+# Firmware request sent to test a port
+
+SERIAL_LOOKUP_READ_TIMEOUT = 0.05
+# Timeout of read operations during port testing
+
+SERIAL_LOOKUP_MAX_THREADS = 16
+# Maximum number of ports tested in parallel
+
+CAPABILITY_CACHE_FILE = os.path.join(os.path.expanduser('~'), '.pybelt',
+                                     'capabilities.json')
+# File of the firmware version and default intensity by device
+
+SERIAL_PORT_CACHE_FILE = os.path.join(os.path.expanduser('~'), '.pybelt',
+                                      'serial_port.json')
+# File with the USB identifiers of the last serial port connected to a belt
+
+VIBRATION_CACHE_MAX_ENTRIES = 256
+# Maximum number of precompiled vibration commands
+
 
 class BeltController():
     """Class to send commands to the belt via bluetooth.
 
     Required module
     ---------------
-    This module requires PyBluez (https://github.com/karulis/pybluez) and
-    PySerial (https://pythonhosted.org/pyserial).
+    This module requires PySerial (https://pythonhosted.org/pyserial), and
+    PyBluez (https://github.com/karulis/pybluez) for Bluetooth connections.
+    Under Python 2.7, the 'futures' backport of concurrent.futures is also
+    required. The connections are made by the transports of
+    :mod:`pybelt.transport`.
 
     Bluetooth pairing and passkey
     -----------------------------
@@ -130,24 +176,50 @@ class BeltController():
         self._invert_signal = invert_signal;
         # Delegate
         self._delegate = delegate
+        # Precompiled vibration commands as (packets, ACK IDs) by parameters,
+        # and lock for compiling them from the capability worker
+        self._vibration_packets = {}
+        self._vibration_packets_lock = threading.Lock()
+        # Capabilities loaded from the cache at connection, and worker thread
+        # updating them when refreshed values are received
+        self._cached_capabilities = None
+        self._capability_executor = ThreadPoolExecutor(max_workers=1)
         # Variable initialization
         self._belt_connection_state = BeltConnectionState.DISCONNECTED
         self._event_notifier = None
-        self._bt_socket = None
-        self._serial_port = None
-        self._belt_listener = None
+        self._transport = None
         self._belt_mode = BeltMode.UNKNOWN
         self._belt_firm_version = None
         self._default_vibration_intensity = None
         self._belt_heading = None
         self._belt_heading_offset = None
-        # Variables for incoming packets
-        self._incoming_packet = []
-        self._incoming_packet_start_time = time.time();
-        # Variables for ACK
-        self._wait_ack_id = None
-        self._wait_ack_event = threading.Event()
-        # Lock for synchronizing output packets (avoid mix of packets)
+        # Orientation samples and notification of the delegate
+        self._orientation_buffer = OrientationRingBuffer(
+            ORIENTATION_BUFFER_SIZE)
+        self._notify_orientation = True
+        # Framer for incoming packets
+        self._packet_framer = _PacketFramer(self._PY3)
+        # Batching of serial reads
+        self._serial_read_min_batch = SERIAL_READ_MIN_BATCH
+        self._serial_read_latency_cap = SERIAL_READ_LATENCY_CAP
+        # Futures of pending acknowledgments by (ACK ID, parameter ID)
+        self._pending_acks = {}
+        self._pending_acks_lock = threading.Lock()
+        self._ack_sequence = 0
+        # Pipelined acknowledgments of the calling thread
+        self._ack_pipeline = threading.local()
+        # Event set when the first keep-alive is received
+        self._belt_ready_event = threading.Event()
+        # Round-trip time of commands and clock time of the last data received
+        self._round_trip_time = _RoundTripEstimator()
+        self._receive_clock_time = None
+        # Identifier of the connected device for the capability cache
+        self._device_id = None
+        # Writer thread of the connection
+        self._writer = None
+        # Scheduler thread of the vibration timelines, started when needed
+        self._scheduler = None
+        # Lock for synchronizing output packets without writer thread
         self._output_lock = threading.RLock()
 
 
@@ -205,6 +277,105 @@ class BeltController():
                       serial_port_name=port)
 
 
+    def setSerialReadBatching(self, min_batch=SERIAL_READ_MIN_BATCH,
+                              latency_cap=SERIAL_READ_LATENCY_CAP):
+        """Configures the batching of the data read on the serial port. The
+        configuration applies to the next serial connection.
+
+        Larger batches reduce the CPU load of the listener thread, at the cost
+        of a delay of at most the latency cap on incoming packets.
+
+        Parameters
+        ----------
+        :param int min_batch:
+            The minimum number of bytes read before the data are handled. With
+            1, data are handled as soon as they are received.
+        :param float latency_cap:
+            The maximum time in seconds to wait for the minimum number of
+            bytes.
+        """
+        self._serial_read_min_batch = max(1, int(min_batch))
+        self._serial_read_latency_cap = max(0.0, latency_cap)
+
+
+    def setSignalOrientation(self, vibromotor_offset=0, invert_signal=False):
+        """Sets the orientation parameters of the vibration signals, see
+        the constructor. Precompiled vibration commands are discarded.
+
+        Parameters
+        ----------
+        :param int vibromotor_offset:
+            The offset of vibromotor indexes.
+        :param bool invert_signal:
+            If true, positions and orientations are inverted.
+        """
+        if (vibromotor_offset == self._vibromotor_offset and
+            invert_signal == self._invert_signal):
+            return
+        self._vibromotor_offset = vibromotor_offset
+        self._invert_signal = invert_signal
+        with self._vibration_packets_lock:
+            self._vibration_packets = {}
+
+    def precompileVibrations(self, commands):
+        """Precompiles the packets of vibration commands used frequently.
+
+        The packets are compiled for the connected belt, and are used by
+        :meth:`vibrateAtPositions` until the belt is disconnected or the
+        orientation parameters change. Commands that are not precompiled are
+        compiled and cached on first use.
+
+        Parameters
+        ----------
+        :param list commands:
+            List of dict with the parameters of :meth:`vibrateAtPositions`:
+            'indexes', and optionally 'channel_idx', 'intensity', 'pattern'
+            and 'stop_other_channels'.
+
+        Return
+        ------
+        :rtype int
+            The number of commands precompiled.
+        """
+        if self._belt_connection_state != BeltConnectionState.CONNECTED:
+            print("BeltController: Unable to precompile commands. "+
+                  "No connection.")
+            return 0
+        compiled_count = 0
+        for command in commands:
+            if self._getVibrationPackets(
+                    command['indexes'],
+                    command.get('channel_idx', 0),
+                    command.get('intensity', -1),
+                    command.get('pattern', 0),
+                    command.get('stop_other_channels', False)) is not None:
+                compiled_count += 1
+        return compiled_count
+
+    def sendPacket(self, packet, wait_ack=False, ack_id=None):
+        """Sends a raw packet to the belt.
+
+        Parameters
+        ----------
+        :param bytes packet:
+            The packet, or several packets concatenated.
+        :param bool wait_ack:
+            If 'True' the function waits the command acknowledgment before
+            returning.
+        :param int ack_id:
+            The acknowledgment ID of the packet.
+
+        Exception
+        ---------
+        The function raises a BeltTimeoutException if the timeout is reached
+        when waiting for the command acknowledgment.
+        """
+        if self._belt_connection_state != BeltConnectionState.CONNECTED:
+            print("BeltController: Unable to send the command. No connection.")
+            return
+        self._send(packet, wait_ack, ack_id)
+
+
     def _connect(self, connection_interface, serial_port_name=None,
                  bt_address=None, bt_name=None):
         """Connects to a belt with either USB or BT.
@@ -225,15 +396,7 @@ class BeltController():
         if connection_interface is None:
             print("BeltController: No connection interface.")
             return
-        # Disconnect if necessary
-        self.disconnectBelt(True)
-        # Start event notifier
-        if (self._delegate is not None):
-            self._event_notifier = _BeltEventNotifier(self._delegate, self)
-            self._event_notifier.start()
-        # Connection state
-        self._belt_connection_state = BeltConnectionState.CONNECTING
-        self._notifyConnectionState()
+        self._startConnection()
         # Lookup for device
         if (connection_interface == _BeltConnectionInterface.USB_INTERFACE):
             if serial_port_name is None:
@@ -252,53 +415,102 @@ class BeltController():
                 print("BeltController: No belt serial port found.")
                 self.disconnectBelt(True)
                 return
-            try:
-                # Open port
-                self._serial_port = serial.Serial(serial_port_name,
-                                                  SERIAL_BAUDRATE,
-                                                  timeout=SERIAL_READ_TIMEOUT)
-                # Flush input until ready
-                time_ready = time.time()+SERIAL_CONNECTION_INIT_WAIT
-                while time.time() < time_ready:
-                    self._serial_port.read(1)
-                # Start listener
-                self._belt_listener = _SerialPortListener(self._serial_port,
-                                                          self)
-                self._belt_listener.start()
-            except Exception as e:
-                print("BeltController: Serial connection failed.")
-                print(str(e))
-                self.disconnectBelt(True)
-                return
-        elif (connection_interface ==
-              _BeltConnectionInterface.BT_CLASSIC_INTERFACE):
+            transport = SerialTransport(serial_port_name,
+                                        self._serial_read_min_batch,
+                                        self._serial_read_latency_cap)
+        else:
             if bt_address is None:
                 print("BeltController: No Bluetooth device found.")
                 self.disconnectBelt(True)
                 return
-            try:
-                self._bt_socket = bluetooth.BluetoothSocket(bluetooth.RFCOMM)
-                self._bt_socket.connect((bt_address, BELT_BT_COMM_PORT))
-                self._belt_listener = _BTSocketListener(self._bt_socket, self)
-                self._belt_listener.start()
-            except:
-                print("BeltController: Bluetooth connection failed.")
-                traceback.print_exc()
-                self.disconnectBelt(True)
-                return
-        # Handshake
+            transport = RfcommTransport(bt_address)
+        self._openTransport(transport)
+
+
+    def connectBeltTransport(self, transport):
+        """Connects a belt via a transport, e.g. a
+        :class:`pybelt.transport.MemoryTransport` for a simulated belt.
+
+        Parameters
+        ----------
+        :param BeltTransport transport:
+            The transport to the belt, not opened.
+        """
+        self._startConnection()
+        self._openTransport(transport)
+
+
+    def _startConnection(self):
+        """Disconnects the current belt and starts a new connection.
+        """
+        # Disconnect if necessary
+        self.disconnectBelt(True)
+        # Start event notifier
+        if (self._delegate is not None):
+            self._event_notifier = _BeltEventNotifier(self._delegate, self)
+            self._event_notifier.start()
+        # Connection state
+        self._belt_connection_state = BeltConnectionState.CONNECTING
+        self._notifyConnectionState()
+
+
+    def _openTransport(self, transport):
+        """Opens a transport and makes the handshake with the belt.
+
+        Parameters
+        ----------
+        :param BeltTransport transport:
+            The transport to the belt, not opened.
+        """
         try:
-            self._send(b'\x90\x08\xAA\xAA\xAA\x0A', True, 0xD0,
-                       HANDSHAKE_TIMEOUT_SEC)
-            self._send(b'\x90\x02\xAA\xAA\xAA\x0A', True, 0xD0,
-                       HANDSHAKE_TIMEOUT_SEC)
-            self._send(b'\x90\x09\xAA\xAA\xAA\x0A', True, 0xD0,
-                       HANDSHAKE_TIMEOUT_SEC)
+            self._packet_framer.reset()
+            self._belt_ready_event.clear()
+            self._orientation_buffer.clear()
+            self._transport = transport
+            self._writer = _BeltWriter(transport, self)
+            self._writer.start()
+            transport.open(self._handleDataReceived, self.disconnectBelt)
+            self._device_id = transport.getDeviceId()
+            # The belt is ready when it sends a keep-alive
+            if (transport.WAIT_KEEP_ALIVE and
+                not self._belt_ready_event.wait(SERIAL_CONNECTION_INIT_WAIT)):
+                print("BeltController: No keep-alive received.")
+        except Exception as e:
+            print("BeltController: Connection failed.")
+            print(str(e))
+            self.disconnectBelt(True)
+            return
+        # Handshake, the requests are acknowledged together
+        capabilities = _loadCapabilities(self._device_id)
+        self._cached_capabilities = capabilities
+        try:
+            with self.pipelineAcks(HANDSHAKE_TIMEOUT_SEC):
+                self._send(b'\x90\x08\xAA\xAA\xAA\x0A', True, 0xD0,
+                           HANDSHAKE_TIMEOUT_SEC, 0x08)
+                if capabilities is None:
+                    self._send(b'\x90\x02\xAA\xAA\xAA\x0A', True, 0xD0,
+                               HANDSHAKE_TIMEOUT_SEC, 0x02)
+                    self._send(b'\x90\x09\xAA\xAA\xAA\x0A', True, 0xD0,
+                               HANDSHAKE_TIMEOUT_SEC, 0x09)
         except Exception as e:
             print("BeltController: Handshake failed.")
             print(str(e))
             self.disconnectBelt(True)
             return
+        if capabilities is None:
+            self._saveCapabilities()
+        else:
+            # Use cached values, and refresh them without waiting
+            self._belt_firm_version = capabilities['firmware_version']
+            self._default_vibration_intensity = (
+                capabilities['default_vibration_intensity'])
+            for packet, ack_param in (
+                    (b'\x90\x02\xAA\xAA\xAA\x0A', 0x02),
+                    (b'\x90\x09\xAA\xAA\xAA\x0A', 0x09)):
+                ack_future = self._sendAsync(packet, 0xD0, ack_param,
+                                             deferred=True)
+                if ack_future is not None:
+                    ack_future.add_done_callback(self._onCapabilityRefreshed)
         # Connection state
         self._belt_connection_state = BeltConnectionState.CONNECTED
         self._notifyConnectionState()
@@ -319,31 +531,28 @@ class BeltController():
         self._belt_connection_state = BeltConnectionState.DISCONNECTING
         self._belt_mode = BeltMode.UNKNOWN
         self._notifyConnectionState()
-        # Stop listener thread
-        if (self._belt_listener is not None):
-            self._belt_listener.stop_flag = True
-            if join:
-                self._belt_listener.join(THREAD_JOIN_TIMEOUT_SEC)
-            self._belt_listener = None
-        # Close BT socket
-        if (self._bt_socket is not None):
-            try:
-                self._bt_socket.close()
-            except:
-                print("BeltController: Failed to close BT socket.")
-            finally:
-                self._bt_socket = None
-        # Close serial port
-        if (self._serial_port is not None):
-            try:
-                self._serial_port.close()
-            except:
-                print("BeltController: Failed to close serial port.")
-            finally:
-                self._serial_port = None
+        # Stop scheduler thread, scheduled commands are cancelled
+        if (self._scheduler is not None):
+            self._scheduler.stop(join)
+            self._scheduler = None
+        # Stop writer thread, queued packets are discarded
+        if (self._writer is not None):
+            self._writer.stop(join)
+            self._writer = None
+        # Close connection and stop listener thread
+        if (self._transport is not None):
+            self._transport.close(join)
+            self._transport = None
+        # Cancel pending acknowledgments
+        self._cancelPendingAcks()
         # Clear belt values
         self._belt_firm_version = None
         self._default_vibration_intensity = None
+        self._device_id = None
+        self._cached_capabilities = None
+        with self._vibration_packets_lock:
+            self._vibration_packets = {}
+        self._round_trip_time = _RoundTripEstimator()
         # Set connection state
         self._belt_connection_state = BeltConnectionState.DISCONNECTED
         self._notifyBeltMode()
@@ -603,8 +812,9 @@ class BeltController():
                                 stop_other_channels, wait_ack)
 
 
-    def vibrateAtPositions(self, indexes, trigger_number, channel_idx=0, intensity=-1,
-                          pattern=0, stop_other_channels=False, wait_ack=False):
+    def vibrateAtPositions(self, indexes, channel_idx=0, intensity=-1,
+                           pattern=0, stop_other_channels=False,
+                           wait_ack=False):
         """Starts a vibration at one or multiple positions (vibromotor indexes).
 
         The positions are vibromotors' indexes. Value 0 represents the heading
@@ -641,45 +851,107 @@ class BeltController():
         when waiting for the command acknowledgment.
         No exception is raised when parameter values are invalid or the belt is
         not connected.
+
+        Return
+        ------
+        :rtype CommandTiming
+            The timing of the command, or None if the command has not been
+            sent.
         """
         # Check connection status
         if self._belt_connection_state != BeltConnectionState.CONNECTED:
             print("BeltController: Unable to send the command. No connection.")
-            return
+            return None
+        compiled = self._getVibrationPackets(indexes, channel_idx, intensity,
+                                             pattern, stop_other_channels)
+        if compiled is None:
+            return None
+        # Change mode
+        if self._belt_mode != BeltMode.APP_MODE:
+            self.switchToMode(BeltMode.APP_MODE, False, wait_ack)
+        # Send packets
+        return self._sendCompiled(compiled, wait_ack)
+
+    def _getVibrationPackets(self, indexes, channel_idx, intensity, pattern,
+                             stop_other_channels):
+        """Returns the precompiled packets of a vibration at positions, and
+        compiles them if necessary.
+
+        Return
+        ------
+        :rtype tuple
+            The packets concatenated and the list of ACK IDs, or None if the
+            parameters are invalid.
+        """
+        key = (tuple(indexes), channel_idx, intensity, pattern,
+               stop_other_channels)
+        with self._vibration_packets_lock:
+            compiled = self._vibration_packets.get(key)
+            if compiled is None:
+                compiled = self._compileVibrationAtPositions(
+                    indexes, channel_idx, intensity, pattern,
+                    stop_other_channels)
+                if compiled is None:
+                    return None
+                if len(self._vibration_packets) >= VIBRATION_CACHE_MAX_ENTRIES:
+                    self._vibration_packets = {}
+                self._vibration_packets[key] = compiled
+        return compiled
+
+    def _rebuildVibrationPackets(self):
+        """Compiles again the precompiled packets of vibrations, after a change
+        of the firmware version.
+        """
+        with self._vibration_packets_lock:
+            vibration_packets = {}
+            for key in self._vibration_packets:
+                compiled = self._compileVibrationAtPositions(
+                    list(key[0]), key[1], key[2], key[3], key[4])
+                if compiled is not None:
+                    vibration_packets[key] = compiled
+            self._vibration_packets = vibration_packets
+
+    def _compileVibrationAtPositions(self, indexes, channel_idx, intensity,
+                                     pattern, stop_other_channels):
+        """Creates the packets of a vibration at positions.
+
+        Return
+        ------
+        :rtype tuple
+            The packets concatenated and the list of ACK IDs, or None if the
+            parameters are invalid.
+        """
         # Check parameters
         if self._belt_firm_version<30:
             if channel_idx<0 or channel_idx>1:
                 print("BeltController: Unable to send the command. " +
                       "Illegal argument: channel_idx.")
-                return
+                return None
             if pattern!=0:
                 print("BeltController: Unable to send the command. "+
                       "Illegal argument: pattern.")
-                return
+                return None
             if len(indexes) < 1:
                 print("BeltController: Unable to send the command. "+
                       "Illegal argument: indexes.")
-                return
+                return None
             if len(indexes) > 1 and channel_idx!=0:
                 print("BeltController: Unable to send the command. " +
                       "Multiple positions are available only for channel 0.")
-                return
+                return None
         else:
             if channel_idx<0 or channel_idx>5:
                 print("BeltController: Unable to send the command. " +
                       "Illegal argument: channel_idx.")
-                return
+                return None
             if pattern<0:
                 print("BeltController: Unable to send the command. "+
                       "Illegal argument: pattern.")
-                return
+                return None
             if len(indexes) < 1:
                 print("BeltController: Unable to send the command. "+
                       "Illegal argument: indexes.")
-                return
-        # Change mode
-        if self._belt_mode != BeltMode.APP_MODE:
-            self.switchToMode(BeltMode.APP_MODE, False, wait_ack)
+                return None
         # Adjust indexes
         adjusted_positions = []
         if self._belt_firm_version<30:
@@ -725,14 +997,15 @@ class BeltController():
                                 intensity,
                                 0x0A])
                 ack_id = 0xC5
-            # Send packet
-            self._send(packet, wait_ack, ack_id)
             # Stop other channels
             if stop_other_channels:
                 if channel_idx == 0:
-                    self.stopVibration(1, wait_ack)
+                    return (packet+b'\x85\x00\x00\x00\xAA\x0A',
+                            [ack_id, 0xC5])
                 else:
-                    self.stopVibration(0, wait_ack)
+                    return (packet+b'\x84\x00\x00\x00\xAA\x0A',
+                            [ack_id, 0xC4])
+            return (packet, [ack_id])
         else:
             # Use command 0x87
             sct_byte = 0
@@ -759,8 +1032,7 @@ class BeltController():
                             intensity,
                             pattern,
                             0x0A])
-            # Send packet
-            self._send(packet, wait_ack, 0xC7)
+            return (packet, [0xC7])
 
     def pulseAtMagneticBearing(self, direction, on_duration_ms, off_duration_ms,
                                iterations=-1, channel_idx=0, intensity=-1,
@@ -1161,9 +1433,213 @@ class BeltController():
                 # Send packet
                 self._send(packet, wait_ack, 0xC8)
 
-    def startOrientationNotifications(self, period=0.15, wait_ack=False):
+    def scheduleVibrations(self, events, start_clock_time=None):
+        """Schedules a timeline of vibrations at positions.
+
+        The commands are compiled when the function is called and sent by a
+        scheduler thread at the time of each event, so that the function
+        returns immediately. Overlapping vibrations are played on different
+        channels. Commands with the same time are sent in a single write.
+
+        >>> timeline = belt_controller.scheduleVibrations([
+        >>>     (0.0, [0], -1, BeltVibrationPattern.CONTINUOUS, 0.5),
+        >>>     (0.5, [4], -1, BeltVibrationPattern.CONTINUOUS, 0.5)])
+        >>> timeline.cancel()
+
+        If the belt is not in APP_MODE, then the mode is changed before
+        scheduling the commands.
+
+        Parameters
+        ----------
+        :param list[tuple] events:
+            The events as (t_offset, positions, intensity, pattern, duration)
+            tuples, where 't_offset' is the time of the event in seconds from
+            the start of the timeline, 'positions' the list of vibromotor
+            indexes, 'intensity' and 'pattern' as in
+            :meth:`vibrateAtPositions`, and 'duration' the duration of the
+            vibration in seconds, or None to not stop the vibration.
+        :param int start_clock_time:
+            The clock time in ns of the start of the timeline, or None to
+            start now.
+
+        Return
+        ------
+        :rtype VibrationTimeline
+            The handle of the timeline, or None if the parameters are invalid
+            or the belt is not connected.
+        """
+        # Check connection status
+        if self._belt_connection_state != BeltConnectionState.CONNECTED:
+            print("BeltController: Unable to send the command. No connection.")
+            return None
+        if self._belt_firm_version<30:
+            channels = [0, 1]
+        else:
+            channels = list(range(6))
+        # Time from which each channel is free, or None if never
+        channel_free_times = dict((channel, 0.0) for channel in channels)
+        commands = []
+        for index in sorted(range(len(events)), key=lambda i: events[i][0]):
+            t_offset, positions, intensity, pattern, duration = events[index]
+            if t_offset < 0 or (duration is not None and duration <= 0):
+                print("BeltController: Unable to schedule the vibrations. " +
+                      "Illegal event time or duration.")
+                return None
+            channel = None
+            for candidate in channels:
+                free_time = channel_free_times[candidate]
+                if free_time is not None and free_time <= t_offset:
+                    channel = candidate
+                    break
+            if channel is None:
+                print("BeltController: Unable to schedule the vibrations. " +
+                      "Too many simultaneous vibrations.")
+                return None
+            compiled = self._getVibrationPackets(positions, channel, intensity,
+                                                 pattern, False)
+            if compiled is None:
+                return None
+            # Stops are sent before starts of the same time
+            commands.append((toNs(t_offset), 1, index, compiled, channel))
+            if duration is None:
+                channel_free_times[channel] = None
+            else:
+                channel_free_times[channel] = t_offset+duration
+                commands.append((toNs(t_offset+duration), 0, -1,
+                                 self._compileStopVibration(channel), channel))
+        return self._startTimeline(commands, len(events), start_clock_time)
+
+    def compileVibrationPattern(self, pattern):
+        """Compiles a vibration pattern into the fewest commands for the
+        firmware of the connected belt, see
+        :func:`pybelt.patterns.compilePattern`.
+
+        The commands depend on the signal orientation parameters, so the
+        pattern must be compiled again when they change.
+
+        Parameters
+        ----------
+        :param VibrationPattern pattern:
+            The pattern to compile.
+
+        Return
+        ------
+        :rtype CompiledPattern
+            The compiled pattern, or None if the pattern cannot be played with
+            the firmware of the belt or the belt is not connected.
+        """
+        if self._belt_connection_state != BeltConnectionState.CONNECTED:
+            print("BeltController: Unable to compile the pattern. "+
+                  "No connection.")
+            return None
+        try:
+            return compilePattern(pattern, self._belt_firm_version,
+                                  self._adjustIndex)
+        except ValueError as e:
+            print("BeltController: Unable to compile the pattern. "+str(e))
+            return None
+
+    def playVibrationPattern(self, pattern, start_clock_time=None):
+        """Plays a vibration pattern.
+
+        The commands are sent by the scheduler thread, see
+        :meth:`scheduleVibrations`.
+
+        Parameters
+        ----------
+        :param object pattern:
+            The VibrationPattern to play, or a CompiledPattern from
+            :meth:`compileVibrationPattern`.
+        :param int start_clock_time:
+            The clock time in ns of the start of the pattern, or None to
+            start now.
+
+        Return
+        ------
+        :rtype VibrationTimeline
+            The handle of the pattern, or None if the pattern cannot be played.
+        """
+        if isinstance(pattern, VibrationPattern):
+            pattern = self.compileVibrationPattern(pattern)
+            if pattern is None:
+                return None
+        if self._belt_connection_state != BeltConnectionState.CONNECTED:
+            print("BeltController: Unable to send the command. No connection.")
+            return None
+        if pattern.firmware_version != self._belt_firm_version:
+            print("BeltController: Unable to play the pattern. The pattern "+
+                  "has been compiled for another firmware version.")
+            return None
+        # Events of the timeline are the commands that start vibrations
+        commands = []
+        event_count = 0
+        for t_offset, priority, packet, ack_id, channel in pattern.commands:
+            if priority == 0:
+                index = -1
+            else:
+                index = event_count
+                event_count += 1
+            commands.append((t_offset*NS_PER_MS, priority, index,
+                             (packet, [ack_id]), channel))
+        return self._startTimeline(commands, event_count, start_clock_time)
+
+    def _startTimeline(self, commands, event_count, start_clock_time):
+        """Schedules the commands of a timeline.
+
+        Parameters
+        ----------
+        :param list[tuple] commands:
+            The commands as (time offset in ns, priority, event index,
+            compiled packets, channel) tuples, see :class:`_BeltScheduler`.
+        :param int event_count:
+            The number of events of the timeline.
+        :param int start_clock_time:
+            The clock time in ns of the start of the timeline, or None to
+            start now.
+
+        Return
+        ------
+        :rtype VibrationTimeline
+            The handle of the timeline.
+        """
+        # Change mode
+        if self._belt_mode != BeltMode.APP_MODE:
+            self.switchToMode(BeltMode.APP_MODE)
+        if start_clock_time is None:
+            start_clock_time = clockNs()
+        timeline = VibrationTimeline(event_count, start_clock_time)
+        scheduler = self._scheduler
+        if scheduler is None:
+            scheduler = _BeltScheduler(self)
+            scheduler.start()
+            self._scheduler = scheduler
+        scheduler.schedule(timeline, [
+            (start_clock_time+command[0],)+command[1:] for command in commands])
+        return timeline
+
+    def _compileStopVibration(self, channel_idx):
+        """Creates the packet that stops the vibration of one channel.
+
+        Return
+        ------
+        :rtype tuple
+            The packet and the list of ACK IDs.
+        """
+        if self._belt_firm_version<30:
+            if channel_idx == 0:
+                return (b'\x84\x00\x00\x00\xAA\x0A', [0xC4])
+            return (b'\x85\x00\x00\x00\xAA\x0A', [0xC5])
+        mask = 2**channel_idx
+        return (bytes([0x88, mask&0xFF, (mask>>8)&0xFF, 0x00, 0x00, 0x0A]),
+                [0xC8])
+
+    def startOrientationNotifications(self, period=0.15, wait_ack=False,
+                                      notify_delegate=True):
         """Starts the orientation notifications.
 
+        The orientation notifications are always recorded in the orientation
+        buffer, see :meth:`getOrientationBuffer`.
+
         Parameters
         ----------
         :param float period:
@@ -1172,6 +1648,10 @@ class BeltController():
             If 'True' the function waits the command acknowledgment before
             returning. A timeout is defined, and if reached a
             BeltTimeoutException is raised.
+        :param bool notify_delegate:
+            If 'False' the delegate is not informed of the orientation
+            notifications, which avoids one event per notification at high
+            rates.
         """
         if self._belt_connection_state != BeltConnectionState.CONNECTED:
             print("BeltController: Unable to send the command. No connection.")
@@ -1181,7 +1661,7 @@ class BeltController():
                   "Orientation notifications are available only from "+
                   "firmware version 34.")
             return
-
+        self._notify_orientation = notify_delegate
         packet = bytes([0x92,
                         0x01,
                         (int(period*1000))&0xFF,
@@ -1259,6 +1739,19 @@ class BeltController():
         orientation = (self._belt_heading, self._belt_heading_offset)
         return orientation
 
+    def getOrientationBuffer(self):
+        """Returns the buffer of the orientation notifications received.
+
+        The buffer is cleared when a belt is connected.
+
+        Return
+        ------
+        :rtype OrientationRingBuffer
+            The buffer of (clock time, heading, heading offset) samples, where
+            the clock time is the reception time of the notification.
+        """
+        return self._orientation_buffer
+
 
     def _adjustAngle(self, angle):
         """Adjusts an angle according to the offset and invert parameters.
@@ -1324,8 +1817,30 @@ class BeltController():
         return index
 
 
+    def pipelineAcks(self, timeout_sec=WAIT_ACK_TIMEOUT_SEC):
+        """Returns a context in which the commands sent with 'wait_ack' do not
+        block. The acknowledgments of all these commands are awaited together
+        at the end of the context.
+
+        >>> with belt_controller.pipelineAcks():
+        >>>     belt_controller.stopVibration(wait_ack=True)
+        >>>     belt_controller.vibrateAtPositions([0], wait_ack=True)
+
+        Parameters
+        ----------
+        :param float timeout_sec:
+            The timeout in seconds for receiving all acknowledgments, counted
+            from the end of the context.
+
+        Exception
+        ---------
+        At the end of the context, a BeltTimeoutException is raised if an
+        acknowledgment is not received within the timeout.
+        """
+        return _AckPipeline(self, timeout_sec)
+
     def _send(self, packet, wait_ack=False, ack_id=None,
-              timeout_sec=WAIT_ACK_TIMEOUT_SEC):
+              timeout_sec=WAIT_ACK_TIMEOUT_SEC, ack_param=None):
         """Sends a packet and possibly waits for the acknowledgment.
 
         Parameters
@@ -1333,44 +1848,331 @@ class BeltController():
         :param bytes packet:
             The packet to send.
         :param bool wait_ack:
-            If 'true', waits for the ACK.
+            If 'true', waits for the ACK, or adds the ACK to the pipeline of
+            the calling thread.
         :param int ack_id:
             The acknowledgment ID to wait for, or None to not wait for
             acknowledgment.
         :param float timeout_sec:
             The timeout duration in seconds.
+        :param int ack_param:
+            The parameter ID of the acknowledgment (second byte), or None to
+            accept any parameter ID.
 
         Exception
         ---------
         Raises a BeltTimeoutException if the timeout is reached when waiting for
         the command acknowledgment.
         """
+        if not wait_ack or ack_id is None:
+            self._sendAsync(packet)
+            return
+        ack_future = self._sendAsync(packet, ack_id, ack_param)
+        if ack_future is None:
+            return
+        pipeline = getattr(self._ack_pipeline, 'futures', None)
+        if pipeline is not None:
+            # Acknowledgment awaited at the end of the pipeline
+            pipeline.append(ack_future)
+            return
+        self._waitAcks([ack_future], timeout_sec)
+
+    def _sendAsync(self, packet, ack_id=None, ack_param=None, deferred=False):
+        """Sends a packet without waiting for the acknowledgment.
+
+        Parameters
+        ----------
+        :param bytes packet:
+            The packet to send.
+        :param int ack_id:
+            The acknowledgment ID to track, or None.
+        :param int ack_param:
+            The parameter ID of the acknowledgment, or None to accept any
+            parameter ID.
+        :param bool deferred:
+            'True' for a background request that nobody waits for, written
+            after the stimulus commands within the maximum delay of deferred
+            writes.
+
+        Return
+        ------
+        :rtype Future
+            The future of the acknowledgment, with the acknowledgment packet as
+            result, or None if no acknowledgment is tracked or the packet has
+            not been sent.
+        """
+        if self._belt_connection_state == BeltConnectionState.DISCONNECTED:
+            print("BeltCOntroller: Cannot send command without connection.")
+            return None
+        ack_future = None
+        if ack_id is not None:
+            # Register the ACK before sending to not miss a fast response
+            ack_future = self._registerAck(ack_id, ack_param)
+            ack_futures = [ack_future]
+        else:
+            ack_futures = ()
+        self._write(packet, ack_futures, deferred=deferred)
+        return ack_future
+
+    def _sendCompiled(self, compiled, wait_ack):
+        """Sends precompiled packets in a single write.
+
+        The acknowledgment of the first packet is tracked even when not
+        awaited, to time the command.
+
+        Parameters
+        ----------
+        :param tuple compiled:
+            The packets concatenated and the list of ACK IDs.
+        :param bool wait_ack:
+            If 'true', waits for the ACKs, or adds the ACKs to the pipeline of
+            the calling thread.
+
+        Return
+        ------
+        :rtype CommandTiming
+            The timing of the first packet, or None if not sent.
+        """
         if self._belt_connection_state == BeltConnectionState.DISCONNECTED:
             print("BeltCOntroller: Cannot send command without connection.")
+            return None
+        packets, ack_ids = compiled
+        if not wait_ack:
+            ack_future = self._registerAck(ack_ids[0], tracking=True)
+            self._write(packets, [ack_future])
+            return CommandTiming(ack_future, self._round_trip_time)
+        ack_futures = [self._registerAck(ack_id) for ack_id in ack_ids]
+        self._write(packets, ack_futures)
+        timing = CommandTiming(ack_futures[0], self._round_trip_time)
+        pipeline = getattr(self._ack_pipeline, 'futures', None)
+        if pipeline is not None:
+            pipeline.extend(ack_futures)
+            return timing
+        self._waitAcks(ack_futures, WAIT_ACK_TIMEOUT_SEC)
+        return timing
+
+    def _registerAck(self, ack_id, ack_param=None, tracking=False):
+        """Registers a pending acknowledgment and returns its future.
+
+        Parameters
+        ----------
+        :param int ack_id:
+            The acknowledgment ID.
+        :param int ack_param:
+            The parameter ID of the acknowledgment, or None to accept any
+            parameter ID.
+        :param bool tracking:
+            'True' if the acknowledgment is only tracked for timing and not
+            awaited. Tracked acknowledgments that are not received within the
+            retransmission timeout of the round-trip time are discarded.
+        """
+        ack_future = Future()
+        ack_future.ack_key = (ack_id, ack_param)
+        ack_future.tracking = tracking
+        ack_future.send_clock_time = None
+        ack_future.ack_clock_time = None
+        with self._pending_acks_lock:
+            self._ack_sequence += 1
+            ack_future.ack_sequence = self._ack_sequence
+            pending = self._pending_acks.setdefault(
+                ack_future.ack_key, collections.deque())
+            self._discardExpiredAcks(pending, clockNs())
+            pending.append(ack_future)
+        return ack_future
+
+    def _write(self, packet, ack_futures=(), deferred=False,
+               coalesce_key=None):
+        """Writes packets on the connection, and sets the send time of the
+        acknowledgments of the packets.
+
+        When connected, the packets are queued for the writer thread and the
+        function returns without waiting for the write.
+
+        Parameters
+        ----------
+        :param bytes packet:
+            The packets to write.
+        :param list ack_futures:
+            The futures of the acknowledgments of the packets.
+        :param bool deferred:
+            'True' to write the packets after the stimulus commands, within
+            the maximum delay of deferred writes.
+        :param object coalesce_key:
+            Key of deferred packets that are written only once when queued
+            several times, or None.
+        """
+        writer = self._writer
+        if writer is not None:
+            if deferred:
+                writer.writeDeferred(packet, ack_futures, coalesce_key)
+            else:
+                writer.write(packet, ack_futures)
             return
-        if wait_ack and ack_id is not None:
-            # Set ACK flag
-            self._wait_ack_id = ack_id
-            self._wait_ack_event.clear()
-        # Send packet
         with self._output_lock:
-            if self._bt_socket is not None:
-                # Send via BT
-                self._bt_socket.send(packet)
-            elif self._serial_port is not None:
-                # Send via serial port
-                self._serial_port.write(packet)
-        # Wait ACK with timeout
-        if wait_ack and ack_id is not None:
-            if not self._wait_ack_event.is_set():
-                # Wait for ACK
-                self._wait_ack_event.wait(timeout_sec)
-            if not self._wait_ack_event.is_set():
+            send_clock_time = clockNs()
+            for ack_future in ack_futures:
+                ack_future.send_clock_time = send_clock_time
+            transport = self._transport
+            if transport is not None:
+                transport.write(packet)
+
+    def _waitAcks(self, ack_futures, timeout_sec):
+        """Waits for acknowledgments.
+
+        Exception
+        ---------
+        Raises a BeltTimeoutException if an acknowledgment is not received
+        within the timeout. The acknowledgments still pending are cancelled.
+        """
+        timeout_time = clockSec()+timeout_sec
+        for ack_idx in range(len(ack_futures)):
+            ack_future = ack_futures[ack_idx]
+            try:
+                ack_future.result(max(0.0, timeout_time-clockSec()))
+            except FutureTimeoutError:
+                for pending_future in ack_futures[ack_idx:]:
+                    self._cancelAck(pending_future)
+                raise BeltTimeoutException("BeltController: ACK not received '"+
+                                           str(ack_future.ack_key[0])+"'.")
+            except Exception:
+                # Cancelled by disconnection
+                for pending_future in ack_futures[ack_idx:]:
+                    self._cancelAck(pending_future)
                 raise BeltTimeoutException("BeltController: ACK not received '"+
-                                           str(ack_id)+"'.")
-            # Clear ACK flag
-            self._wait_ack_event.clear()
-            self._wait_ack_id = None
+                                           str(ack_future.ack_key[0])+
+                                           "', belt disconnected.")
+
+    def _cancelAck(self, ack_future):
+        """Removes an acknowledgment from the pending acknowledgments.
+        """
+        with self._pending_acks_lock:
+            pending = self._pending_acks.get(ack_future.ack_key)
+            if pending is not None:
+                try:
+                    pending.remove(ack_future)
+                except ValueError:
+                    pass
+                if not pending:
+                    del self._pending_acks[ack_future.ack_key]
+        ack_future.cancel()
+
+    def _cancelPendingAcks(self):
+        """Cancels all pending acknowledgments.
+        """
+        with self._pending_acks_lock:
+            pending_acks = self._pending_acks
+            self._pending_acks = {}
+        for pending in pending_acks.values():
+            for ack_future in pending:
+                ack_future.cancel()
+
+    def _discardExpiredAcks(self, pending, clock_time):
+        """Cancels and removes the tracked acknowledgments of a queue that
+        have not been received within the retransmission timeout. Must be
+        called with the lock of the pending acknowledgments.
+
+        Parameters
+        ----------
+        :param deque pending:
+            The pending acknowledgments of an ACK key, in sending order.
+        :param int clock_time:
+            The current clock time in nanoseconds.
+        """
+        timeout = self._round_trip_time.getTimeout()
+        if timeout < 0:
+            timeout = toNs(WAIT_ACK_TIMEOUT_SEC)
+        timeout = min(max(timeout, toNs(TRACKED_ACK_MIN_TIMEOUT_SEC)),
+                      toNs(WAIT_ACK_TIMEOUT_SEC))
+        expired_time = clock_time-timeout
+        for ack_future in list(pending):
+            if (ack_future.tracking and
+                ack_future.send_clock_time is not None and
+                ack_future.send_clock_time < expired_time):
+                pending.remove(ack_future)
+                ack_future.cancel()
+
+    def _resolveAck(self, packet_received):
+        """Resolves the oldest pending acknowledgment matching a packet, with
+        the same parameter ID or accepting any parameter ID.
+        """
+        with self._pending_acks_lock:
+            if not self._pending_acks:
+                return
+            ack_clock_time = self._receive_clock_time
+            if ack_clock_time is None:
+                ack_clock_time = clockNs()
+            # Oldest acknowledgment in sending order among the matching keys
+            ack_key = None
+            for key in ((packet_received[0], packet_received[1]),
+                        (packet_received[0], None)):
+                pending = self._pending_acks.get(key)
+                if pending is None:
+                    continue
+                # Tracked acknowledgments not received must not be resolved
+                # by the acknowledgment of a later command
+                self._discardExpiredAcks(pending, ack_clock_time)
+                if not pending:
+                    del self._pending_acks[key]
+                elif (ack_key is None or pending[0].ack_sequence <
+                      self._pending_acks[ack_key][0].ack_sequence):
+                    ack_key = key
+            if ack_key is None:
+                return
+            pending = self._pending_acks[ack_key]
+            ack_future = pending.popleft()
+            if not pending:
+                del self._pending_acks[ack_key]
+            ack_future.ack_clock_time = ack_clock_time
+            if ack_future.send_clock_time is not None:
+                self._round_trip_time.update(
+                    ack_clock_time-ack_future.send_clock_time)
+        if ack_future.set_running_or_notify_cancel():
+            ack_future.set_result(bytes(bytearray(packet_received)))
+
+    def _saveCapabilities(self):
+        """Saves the firmware version and default intensity of the connected
+        belt in the capability cache.
+        """
+        if (self._device_id is None or self._belt_firm_version is None or
+            self._default_vibration_intensity is None):
+            return
+        _saveCapabilities(self._device_id, {
+            'firmware_version': self._belt_firm_version,
+            'default_vibration_intensity': self._default_vibration_intensity
+            })
+
+    def _onCapabilityRefreshed(self, ack_future):
+        """Hands over a refreshed capability value to the capability worker.
+
+        The callback runs on the listener thread, which must not be blocked by
+        the compilation of packets or the writing of the cache file.
+        """
+        if ack_future.cancelled() or self._cached_capabilities is None:
+            return
+        capabilities = {
+            'firmware_version': self._belt_firm_version,
+            'default_vibration_intensity': self._default_vibration_intensity
+            }
+        self._capability_executor.submit(self._updateCapabilities,
+                                         capabilities)
+
+    def _updateCapabilities(self, capabilities):
+        """Updates the capability cache, and compiles again the packets
+        compiled with a cached firmware version that differs.
+
+        Parameters
+        ----------
+        :param dict capabilities:
+            The refreshed firmware version and default intensity.
+        """
+        cached_capabilities = self._cached_capabilities
+        if cached_capabilities is None or capabilities == cached_capabilities:
+            return
+        self._cached_capabilities = capabilities
+        if (capabilities['firmware_version'] !=
+            cached_capabilities['firmware_version']):
+            self._rebuildVibrationPackets()
+        self._saveCapabilities()
 
     def _notifyBeltMode(self, button_id=0, press_type=0):
         """Notifies the belt mode to the delegate.
@@ -1393,9 +2195,10 @@ class BeltController():
     def _notifyConnectionState(self):
         """Notifies the connection state to the delegate.
         """
-        self._event_notifier.notifyEvent(
-                _BeltControllerEvent.BELT_CONNECTION_STATE_CHANGED,
-                (self._belt_connection_state))
+        if self._event_notifier is not None:
+            self._event_notifier.notifyEvent(
+                    _BeltControllerEvent.BELT_CONNECTION_STATE_CHANGED,
+                    (self._belt_connection_state))
 
 
     def _handleDataReceived(self, data_received):
@@ -1406,45 +2209,38 @@ class BeltController():
         :param bytes data_received:
             The data received.
         """
-        # Check for packet timeout
-        if len(self._incoming_packet) > 0:
-            if ((time.time()-self._incoming_packet_start_time) >
-                INCOMING_PACKET_TIMEOUT):
-                # Timeout, clear previous data
-                print("BeltController: Packet timeout.")
-                self._incoming_packet = []
-        # Check data size
-        if data_received is None:
-            return
-        if len(data_received) < 1:
-            return
-        # Fill packet
-        if len(self._incoming_packet) == 0:
-            # Packet start
-            self._incoming_packet_start_time = time.time();
-        while len(data_received) > 0:
-            if len(self._incoming_packet) < 6:
-                # Fill packet
-                add_bytes = min(6-len(self._incoming_packet),
-                                len(data_received))
-                self._incoming_packet = (self._incoming_packet +
-                                         data_received[:add_bytes])
-                data_received = data_received[add_bytes:]
-            if len(self._incoming_packet) == 6:
-                # Check packet format
-                if (self._incoming_packet[5] == 0x0A):
-                    # Handle packet
-                    self._handlePacketReceived(self._incoming_packet)
-                    self._incoming_packet = []
-                else:
-                    print("BeltController: Malformed packet, no termination "+
-                          "byte.")
-                    # Clear until '\x0A', to realign
-                    try:
-                        self._incoming_packet = self._incoming_packet[
-                            self._incoming_packet.index(0x0A)+1:]
-                    except:
-                        self._incoming_packet = []
+        self._receive_clock_time = clockNs()
+        self._packet_framer.feed(data_received, self._handlePacketReceived)
+
+    def getRoundTripTime(self):
+        """Returns the estimate of the round-trip time of commands, from the
+        write of a command to the reception of its acknowledgment.
+
+        Return
+        ------
+        :rtype tuple
+            The smoothed round-trip time and its mean deviation in nanoseconds,
+            or (-1, -1) if no acknowledgment has been received since the
+            connection.
+        """
+        return self._round_trip_time.getEstimate()
+
+    def getFramerStatistics(self):
+        """Returns the statistics of the framing of incoming packets since the
+        last connection.
+
+        Return
+        ------
+        :rtype dict
+            The number of complete packets ('frames'), of realignments on a
+            packet terminator ('resyncs') and of incomplete packets discarded
+            after a timeout ('timeouts').
+        """
+        return {
+            'frames': self._packet_framer.frame_count,
+            'resyncs': self._packet_framer.resync_count,
+            'timeouts': self._packet_framer.timeout_count
+            }
 
     def _handlePacketReceived(self, packet_received):
         """Handles a complete packet received by either the USB or BT interface.
@@ -1469,8 +2265,10 @@ class BeltController():
                         (packet_received[2],    # New belt mode
                          0,                     # Button ID
                          0))                    # Press type
-            # Keep-alive acknowledgment
-            self._send(b'\xF1\xAA\xAA\xAA\xAA\x0A', False)
+            # Keep-alive acknowledgment, deferred and coalesced
+            self._write(KEEP_ALIVE_REPLY, deferred=True,
+                        coalesce_key=KEEP_ALIVE_REPLY)
+            self._belt_ready_event.set()
 
         elif packet_received[0] == 0x02 or packet_received[0] == 0xC2:
             # Button press notification
@@ -1521,14 +2319,17 @@ class BeltController():
             if self._belt_heading_offset > 32768:
                 self._belt_heading_offset -= 65536
             self._belt_heading_offset = self._belt_heading_offset%360
-            orientation = (self._belt_heading, self._belt_heading_offset)
-            self._event_notifier.notifyEvent(
-                _BeltControllerEvent.BELT_ORIENTATION_NOTIFIED, orientation)
+            self._orientation_buffer.push(self._receive_clock_time,
+                                          self._belt_heading,
+                                          self._belt_heading_offset)
+            if self._notify_orientation and self._event_notifier is not None:
+                orientation = (self._belt_heading, self._belt_heading_offset)
+                self._event_notifier.notifyEvent(
+                    _BeltControllerEvent.BELT_ORIENTATION_NOTIFIED,
+                    orientation)
 
-        # ACK flag
-        if self._wait_ack_id is not None:
-            if packet_received[0] == self._wait_ack_id:
-                self._wait_ack_event.set()
+        # Acknowledgment
+        self._resolveAck(packet_received)
 
 
 def findBeltBTAddress(name=None):
@@ -1548,6 +2349,7 @@ def findBeltBTAddress(name=None):
     A ``BluetoothError`` or ``IOError`` is raised if a problem with
     bluetooth communication occurs.
     """
+    import bluetooth # Bluetooth module from pyBluez
     # Look at available devices
     available_devices = bluetooth.discover_devices(duration=BT_LOOKUP_DURATION,
                                                    lookup_names=True)
@@ -1561,54 +2363,156 @@ def findBeltBTAddress(name=None):
             return device[0]
     return None
 
-def findBeltSerialPort():
+def findBeltSerialPort(port_names=None):
     """Searches for a serial port connected to a belt.
 
     This function looks at the list of available serial ports and makes a
-    request to check if the port is connected to a belt.
+    request to check if the port is connected to a belt. The port of the last
+    belt found (identified by USB VID, PID and serial number) is tested first,
+    then all other ports are tested in parallel. The first port that answers
+    the request is returned.
 
-    Exception
-    ---------
-    A ``SerialException`` is raised if a problem with serial communication
-    occurs.
+    Parameters
+    ----------
+    :param list port_names:
+        The names of the ports to test, or None to test all available ports.
+
+    Return
+    ------
+    :rtype str
+        The name of the port connected to a belt, or None if no belt is found.
     """
-    _PY3 = sys.version_info > (3,)
-    ports = serial.tools.list_ports.comports()
-    for comm_port in ports:
-        port_valid = False
-        try:
-            print("Testing port: "+str(comm_port[0]))
-            # Connect to port
-            with serial.Serial(comm_port[0],
+    if port_names is None:
+        comm_ports = serial.tools.list_ports.comports()
+        port_names = [comm_port.device for comm_port in comm_ports]
+        cached_port = _findCachedSerialPort(comm_ports)
+    else:
+        comm_ports = []
+        cached_port = None
+    if not port_names:
+        return None
+    # Test the last port first
+    if cached_port is not None:
+        if _testSerialPort(cached_port, threading.Event(),
+                           SERIAL_LOOKUP_ACK_TIMEOUT):
+            return cached_port
+        port_names = [name for name in port_names if name != cached_port]
+    # Test other ports in parallel
+    stop_event = threading.Event()
+    belt_port = None
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(len(port_names), SERIAL_LOOKUP_MAX_THREADS)))
+    try:
+        tests = {}
+        for port_name in port_names:
+            tests[executor.submit(_testSerialPort, port_name, stop_event,
+                                  SERIAL_CONNECTION_INIT_WAIT+
+                                  SERIAL_LOOKUP_ACK_TIMEOUT)] = port_name
+        for test in as_completed(tests):
+            if test.result():
+                belt_port = tests[test]
+                break
+    finally:
+        # Stop other tests
+        stop_event.set()
+        executor.shutdown(wait=False)
+    if belt_port is not None:
+        _cacheSerialPort(belt_port, comm_ports)
+    return belt_port
+
+def _testSerialPort(port_name, stop_event, timeout_sec):
+    """Tests if a serial port is connected to a belt.
+
+    The firmware request is sent once, and again after each keep-alive, so that
+    a belt that is starting is found as soon as it answers without flooding
+    other devices. Only a complete firmware value packet is accepted.
+
+    Parameters
+    ----------
+    :param str port_name:
+        The name of the port to test.
+    :param Event stop_event:
+        Event set to stop the test.
+    :param float timeout_sec:
+        The maximum duration of the test in seconds.
+
+    Return
+    ------
+    :rtype bool
+        'True' if the port is connected to a belt.
+    """
+    framer = _PacketFramer(sys.version_info > (3,))
+    # Packets received: firmware value and keep-alive
+    received = {'firmware': False, 'keep_alive': False}
+    def handlePacket(packet):
+        if packet[0] == 0xD0 and packet[1] == 0x02:
+            received['firmware'] = True
+        elif packet[0] == 0x01:
+            received['keep_alive'] = True
+    try:
+        print("Testing port: "+str(port_name))
+        with serial.Serial(port_name,
                            SERIAL_BAUDRATE,
-                           timeout=SERIAL_READ_TIMEOUT,
+                           timeout=SERIAL_LOOKUP_READ_TIMEOUT,
                            write_timeout=SERIAL_LOOKUP_WRITE_TIMEOUT) as conn:
-                # Flush input until ready
-                time_ready = time.time()+SERIAL_CONNECTION_INIT_WAIT
-                while time.time() < time_ready:
-                    conn.read(1)
-                # Request firmware
-                conn.write(b'\x90\x02\xAA\xAA\xAA\x0A')
-                # Wait for ACK
-                timeout_time = time.time()+SERIAL_LOOKUP_ACK_TIMEOUT
-                while ((not port_valid) and (time.time() < timeout_time)):
-                    b = conn.read()
-                    if not b:
-                        # Failed to read a byte within time
-                        break
-                    if _PY3:
-                        if (b[0] == 0xD0):
-                            port_valid = True
-                    else:
-                        if (ord(b) == 0xD0):
-                            port_valid = True
-        except Exception as e:
-            print(e)
-            pass
-        if port_valid:
-            return comm_port[0]
+            conn.reset_input_buffer()
+            timeout_time = clockSec()+timeout_sec
+            conn.write(SERIAL_LOOKUP_REQUEST)
+            while clockSec() < timeout_time and not stop_event.is_set():
+                data = conn.read(max(1, conn.in_waiting))
+                framer.feed(data, handlePacket)
+                if received['firmware']:
+                    return True
+                if received['keep_alive']:
+                    # The belt may have ignored the request while starting
+                    received['keep_alive'] = False
+                    conn.write(SERIAL_LOOKUP_REQUEST)
+    except Exception as e:
+        print(e)
+    return False
+
+def _getUsbIdentifiers(port_name, comm_ports):
+    """Returns the USB VID, PID and serial number of a port, or None.
+    """
+    for comm_port in comm_ports:
+        if comm_port.device == port_name:
+            if comm_port.vid is None:
+                return None
+            return [comm_port.vid, comm_port.pid, comm_port.serial_number]
     return None
 
+def _findCachedSerialPort(comm_ports):
+    """Returns the port with the USB identifiers of the last belt, or None.
+    """
+    try:
+        with open(SERIAL_PORT_CACHE_FILE, 'r') as fr:
+            usb_identifiers = json.load(fr).get('usb_identifiers')
+    except (IOError, OSError, ValueError):
+        return None
+    if usb_identifiers is None:
+        return None
+    for comm_port in comm_ports:
+        if (_getUsbIdentifiers(comm_port.device, comm_ports) ==
+            usb_identifiers):
+            return comm_port.device
+    return None
+
+def _cacheSerialPort(port_name, comm_ports):
+    """Saves the USB identifiers of the port of a belt.
+    """
+    usb_identifiers = _getUsbIdentifiers(port_name, comm_ports)
+    if usb_identifiers is None:
+        return
+    try:
+        cache_folder = os.path.dirname(SERIAL_PORT_CACHE_FILE)
+        if not os.path.isdir(cache_folder):
+            os.makedirs(cache_folder)
+        with open(SERIAL_PORT_CACHE_FILE, 'w') as fw:
+            json.dump({'usb_identifiers': usb_identifiers}, fw)
+    except (IOError, OSError) as e:
+        print("BeltController: Unable to save serial port cache.")
+        print(str(e))
+
 class BeltConnectionState:
     """Enumeration of connection state."""
 
@@ -1640,6 +2544,297 @@ class BeltVibrationPattern:
     SINGLE_SHORT_PULSE_PATTERN = 5
     DOUBLE_SHORT_PULSE_PATTERN = 6
 
+class _AckPipeline():
+    """Context in which acknowledgments are awaited together, see
+    :meth:`BeltController.pipelineAcks`.
+    """
+
+    def __init__(self, belt_controller, timeout_sec):
+        self._belt_controller = belt_controller
+        self._timeout_sec = timeout_sec
+        # Flag for nested pipelines, only the outer pipeline waits
+        self._outer = False
+
+    def __enter__(self):
+        ack_pipeline = self._belt_controller._ack_pipeline
+        if getattr(ack_pipeline, 'futures', None) is None:
+            ack_pipeline.futures = []
+            self._outer = True
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        if not self._outer:
+            return False
+        ack_pipeline = self._belt_controller._ack_pipeline
+        ack_futures = ack_pipeline.futures
+        ack_pipeline.futures = None
+        if exc_type is None:
+            self._belt_controller._waitAcks(ack_futures, self._timeout_sec)
+        else:
+            for ack_future in ack_futures:
+                self._belt_controller._cancelAck(ack_future)
+        return False
+
+class CommandTiming():
+    """Timing of a command sent to the belt.
+
+    The belt sends the acknowledgment of a command after executing it, so the
+    command is executed between its write and the reception of its
+    acknowledgment. Until the acknowledgment is received, the execution time
+    is estimated from the round-trip time of previous commands.
+
+    All times are clock times in nanoseconds, see :mod:`clock`.
+    """
+
+    def __init__(self, ack_future, round_trip_time):
+        """Constructor.
+
+        Parameters
+        ----------
+        :param Future ack_future:
+            The future of the acknowledgment of the command.
+        :param _RoundTripEstimator round_trip_time:
+            The round-trip time estimator of the connection.
+        """
+        self._ack_future = ack_future
+        # Round-trip time estimate when the command was sent
+        self._round_trip_estimate = round_trip_time.getEstimate()
+
+    def getSendClockTime(self):
+        """Returns the clock time of the write of the command, or None if the
+        command is still queued.
+        """
+        return self._ack_future.send_clock_time
+
+    def getAckClockTime(self):
+        """Returns the clock time of the reception of the acknowledgment, or
+        -1 if not received.
+        """
+        ack_clock_time = self._ack_future.ack_clock_time
+        if ack_clock_time is None:
+            return -1
+        return ack_clock_time
+
+    def getRoundTripTime(self):
+        """Returns the round-trip time of the command, or -1 if the
+        acknowledgment has not been received.
+        """
+        ack_clock_time = self.getAckClockTime()
+        if ack_clock_time < 0:
+            return -1
+        return ack_clock_time-self.getSendClockTime()
+
+    def getActuationClockTime(self):
+        """Returns the estimated clock time of the execution of the command
+        by the belt, with its error bound.
+
+        Return
+        ------
+        :rtype tuple
+            The estimated clock time and the maximum error in nanoseconds. The
+            error is -1 if no round-trip time is available.
+        """
+        send_clock_time = self.getSendClockTime()
+        if send_clock_time is None:
+            # Not written yet
+            return (-1, -1)
+        round_trip_time = self.getRoundTripTime()
+        if round_trip_time < 0:
+            smoothed_rtt, rtt_deviation = self._round_trip_estimate
+            if smoothed_rtt < 0:
+                return (send_clock_time, -1)
+            round_trip_time = smoothed_rtt+RTT_DEVIATION_BOUND*rtt_deviation
+        return (send_clock_time+round_trip_time//2, round_trip_time//2)
+
+    def getAsynchrony(self, clock_time):
+        """Returns the asynchrony between the estimated execution of the
+        command and another event, with its error bound.
+
+        Parameters
+        ----------
+        :param int clock_time:
+            The clock time of the event in nanoseconds, from
+            :func:`pybelt.clock.clockNs`.
+
+        Return
+        ------
+        :rtype tuple
+            The time in nanoseconds from the event to the execution of the
+            command, negative if the command is executed first, and the
+            maximum error in nanoseconds. The asynchrony is None if the
+            command has not been written.
+        """
+        actuation_clock_time, error = self.getActuationClockTime()
+        if actuation_clock_time < 0:
+            return (None, -1)
+        return (actuation_clock_time-clock_time, error)
+
+class VibrationTimeline():
+    """Handle of a timeline of vibrations, see
+    :meth:`BeltController.scheduleVibrations`.
+
+    Timelines that overlap in time use the same channels.
+    """
+
+    def __init__(self, event_count, start_clock_time):
+        """Constructor.
+
+        Parameters
+        ----------
+        :param int event_count:
+            The number of events of the timeline.
+        :param int start_clock_time:
+            The clock time in ns of the start of the timeline.
+        """
+        self._start_clock_time = start_clock_time
+        # Timing and dispatch delay of the events, by event index
+        self._timings = [None]*event_count
+        self._dispatch_delays = [None]*event_count
+        # State managed by the scheduler
+        self._scheduler = None
+        self._pending_count = 0
+        self._active_channels = set()
+        self._cancelled = False
+        self._done_event = threading.Event()
+
+    def cancel(self, stop_vibration=True):
+        """Cancels the commands not yet sent.
+
+        Parameters
+        ----------
+        :param bool stop_vibration:
+            If 'True' the vibrations of the timeline that are still active are
+            stopped.
+        """
+        if self._scheduler is not None:
+            self._scheduler.cancel(self, stop_vibration)
+
+    def isCancelled(self):
+        """Returns 'True' if the timeline has been cancelled.
+        """
+        return self._cancelled
+
+    def isDone(self):
+        """Returns 'True' if all commands have been sent or cancelled.
+        """
+        return self._done_event.is_set()
+
+    def wait(self, timeout_sec=None):
+        """Waits until all commands have been sent or cancelled.
+
+        Parameters
+        ----------
+        :param float timeout_sec:
+            The timeout in seconds, or None to wait without timeout.
+
+        Return
+        ------
+        :rtype bool
+            'False' if the timeout is reached.
+        """
+        return self._done_event.wait(timeout_sec)
+
+    def getStartClockTime(self):
+        """Returns the clock time in ns of the start of the timeline.
+        """
+        return self._start_clock_time
+
+    def getTimings(self):
+        """Returns the timing of the vibration commands.
+
+        Return
+        ------
+        :rtype list[CommandTiming]
+            The timing of each event, or None for the events not sent.
+        """
+        return list(self._timings)
+
+    def getDispatchDelays(self):
+        """Returns the delay between the time of each event and the queuing
+        of its command for writing.
+
+        Return
+        ------
+        :rtype list[int]
+            The delay in ns of each event, or None for the events not sent.
+        """
+        return list(self._dispatch_delays)
+
+class _RoundTripEstimator():
+    """Smoothed round-trip time and mean deviation, updated as the
+    retransmission timer of TCP (RFC 6298).
+    """
+
+    def __init__(self):
+        # Smoothed round-trip time and mean deviation in nanoseconds
+        self._smoothed_rtt = -1
+        self._rtt_deviation = -1
+
+    def update(self, round_trip_time):
+        """Adds a round-trip time sample in nanoseconds.
+        """
+        if self._smoothed_rtt < 0:
+            self._smoothed_rtt = round_trip_time
+            self._rtt_deviation = round_trip_time//2
+            return
+        self._rtt_deviation = int(
+            (1.0-RTT_DEVIATION_FACTOR)*self._rtt_deviation+
+            RTT_DEVIATION_FACTOR*abs(self._smoothed_rtt-round_trip_time))
+        self._smoothed_rtt = int(
+            (1.0-RTT_SMOOTHING_FACTOR)*self._smoothed_rtt+
+            RTT_SMOOTHING_FACTOR*round_trip_time)
+
+    def getEstimate(self):
+        """Returns the smoothed round-trip time and its mean deviation, or
+        (-1, -1) if no sample.
+        """
+        return (self._smoothed_rtt, self._rtt_deviation)
+
+    def getTimeout(self):
+        """Returns the retransmission timeout in nanoseconds, or -1 if no
+        sample.
+        """
+        if self._smoothed_rtt < 0:
+            return -1
+        return self._smoothed_rtt+RTO_DEVIATION_FACTOR*self._rtt_deviation
+
+def _loadCapabilities(device_id):
+    """Returns the cached capabilities of a device, or None.
+    """
+    if device_id is None:
+        return None
+    try:
+        with open(CAPABILITY_CACHE_FILE, 'r') as fr:
+            capabilities = json.load(fr).get(device_id)
+    except (IOError, OSError, ValueError):
+        return None
+    if (capabilities is None or
+        capabilities.get('firmware_version') is None or
+        capabilities.get('default_vibration_intensity') is None):
+        return None
+    return capabilities
+
+def _saveCapabilities(device_id, capabilities):
+    """Saves the capabilities of a device in the cache file.
+    """
+    try:
+        with open(CAPABILITY_CACHE_FILE, 'r') as fr:
+            cache = json.load(fr)
+    except (IOError, OSError, ValueError):
+        cache = {}
+    if cache.get(device_id) == capabilities:
+        return
+    cache[device_id] = capabilities
+    try:
+        cache_folder = os.path.dirname(CAPABILITY_CACHE_FILE)
+        if not os.path.isdir(cache_folder):
+            os.makedirs(cache_folder)
+        with open(CAPABILITY_CACHE_FILE, 'w') as fw:
+            json.dump(cache, fw, indent=4, sort_keys=True)
+    except (IOError, OSError) as e:
+        print("BeltController: Unable to save capability cache.")
+        print(str(e))
+
 class _BeltControllerEvent:
     """Enumeration of belt controller events."""
 
@@ -1673,99 +2868,291 @@ class BeltTimeoutException(Exception):
         return self._desc
 
 
-class _BTSocketListener(threading.Thread):
-    """Class for listening BT socket."""
+class _BeltWriter(threading.Thread):
+    """Thread that writes the outgoing packets on a transport.
 
-    def __init__(self, socket, belt_controller):
-        """Constructor that configures the socket listener.
+    Commands are written in order as soon as possible. Keep-alive replies and
+    background parameter requests are deferred: they are appended to the next
+    write of commands, or written when their maximum delay is reached. Packets
+    queued together are written in a single write.
+
+    The listener thread only queues packets, so that it is never blocked by a
+    write.
+    """
+
+    def __init__(self, transport, belt_controller):
+        """Constructor.
 
         Parameters
         ----------
-        :param BluetoothSocket socket:
-            The socket to listen.
+        :param BeltTransport transport:
+            The transport to write.
         :param BeltController belt_controller:
             The belt controller.
         """
-        threading.Thread.__init__(self, name="BTSocketListener")
-        self._bt_socket = socket
+        threading.Thread.__init__(self, name="BeltWriter")
+        self.daemon = True
+        self._transport = transport
         self._belt_controller = belt_controller
-
+        self._condition = threading.Condition()
+        # Queued commands and deferred packets as (packet, ACK futures)
+        self._commands = collections.deque()
+        self._deferred = []
+        self._deferred_keys = set()
+        # Time limit for writing the deferred packets
+        self._deferred_deadline = None
+        # Statistics
+        self.write_count = 0
+        self.coalesced_count = 0
         # Flag for stopping the thread
         self.stop_flag = False
 
+    def write(self, packet, ack_futures=()):
+        """Queues a command.
+        """
+        with self._condition:
+            self._commands.append((packet, ack_futures))
+            self._condition.notify()
+
+    def writeDeferred(self, packet, ack_futures=(), coalesce_key=None):
+        """Queues a deferred packet, unless a packet with the same coalesce key
+        is already queued.
+        """
+        with self._condition:
+            if coalesce_key is not None:
+                if coalesce_key in self._deferred_keys:
+                    self.coalesced_count += 1
+                    return
+                self._deferred_keys.add(coalesce_key)
+            self._deferred.append((packet, ack_futures))
+            if self._deferred_deadline is None:
+                self._deferred_deadline = clockSec()+DEFERRED_WRITE_MAX_DELAY
+                self._condition.notify()
+
+    def stop(self, join=False):
+        """Stops the thread, the queued packets are discarded.
+        """
+        with self._condition:
+            self.stop_flag = True
+            self._condition.notify()
+        if join and self is not threading.current_thread():
+            self.join(THREAD_JOIN_TIMEOUT_SEC)
+
     def run(self):
         """Starts the thread."""
-        self.stop_flag = False
-        print("BTSocketListener: Start listening belt.")
-        while not self.stop_flag:
+        condition = self._condition
+        while True:
+            with condition:
+                while not self.stop_flag and not self._commands:
+                    if self._deferred_deadline is None:
+                        condition.wait()
+                        continue
+                    remaining = self._deferred_deadline-clockSec()
+                    if remaining <= 0:
+                        break
+                    condition.wait(remaining)
+                if self.stop_flag:
+                    break
+                entries = list(self._commands)
+                self._commands.clear()
+                entries.extend(self._deferred)
+                self._deferred = []
+                self._deferred_keys.clear()
+                self._deferred_deadline = None
+            if len(entries) == 1:
+                data = entries[0][0]
+            else:
+                data = b''.join([bytes(entry[0]) for entry in entries])
+            send_clock_time = clockNs()
+            for entry in entries:
+                for ack_future in entry[1]:
+                    ack_future.send_clock_time = send_clock_time
             try:
-                # Blocking until data are received
-                data_str = self._bt_socket.recv(128)
-                data = []
-                # Convert to list of int
-                if data_str is not None and len(data_str) > 0:
-                    if self._belt_controller._PY3:
-                        for c in data_str:
-                            data.append(c)
-                    else:
-                        for c in data_str:
-                            data.append(ord(c))
-                    self._belt_controller._handleDataReceived(data)
+                self._transport.write(data)
+                self.write_count += 1
             except Exception as e:
                 if not self.stop_flag:
-                    print("BTSocketListener: Error when reading BT input.")
+                    print("BeltWriter: Error when writing output.")
                     print(e)
-                self._belt_controller.disconnectBelt()
+                    self._belt_controller.disconnectBelt()
                 break
-        print("BTSocketListener: Stop listening belt.")
 
 
-class _SerialPortListener(threading.Thread):
-    """Class for listening serial port."""
+class _BeltScheduler(threading.Thread):
+    """Thread that sends the commands of vibration timelines at their clock
+    time.
+
+    The thread sleeps until shortly before the next command, then waits
+    actively for the time of the command, so that the dispatch accuracy does
+    not depend on the sleep granularity of the OS. On Windows, the resolution
+    of the OS timer is set to 1 ms while the thread runs, as for the frame
+    clock, to keep the active wait short. The commands due at the
+    same time are sent in a single write.
+    """
 
-    def __init__(self, serial_port, belt_controller):
-        """Constructor that configures the port listener.
+    def __init__(self, belt_controller):
+        """Constructor.
 
         Parameters
         ----------
-        :param Serial serial_port:
-            The port to listen.
         :param BeltController belt_controller:
             The belt controller.
         """
-        threading.Thread.__init__(self, name="SerialPortListener")
-        self._serial_port = serial_port
+        threading.Thread.__init__(self, name="BeltScheduler")
+        self.daemon = True
         self._belt_controller = belt_controller
-
+        self._condition = threading.Condition()
+        # Scheduled commands as (clock time, priority, sequence, timeline,
+        # event index, compiled packets, channel) ordered by time
+        self._commands = []
+        self._sequence = 0
         # Flag for stopping the thread
         self.stop_flag = False
 
+    def schedule(self, timeline, commands):
+        """Schedules the commands of a timeline.
+
+        Parameters
+        ----------
+        :param VibrationTimeline timeline:
+            The timeline of the commands.
+        :param list[tuple] commands:
+            The commands as (clock time, priority, event index, compiled
+            packets, channel) tuples, where the event index is -1 for stop
+            commands.
+        """
+        with self._condition:
+            timeline._scheduler = self
+            timeline._pending_count = len(commands)
+            if len(commands) == 0 or self.stop_flag:
+                timeline._done_event.set()
+                return
+            for clock_time, priority, index, compiled, channel in commands:
+                self._sequence += 1
+                heapq.heappush(self._commands,
+                               (clock_time, priority, self._sequence,
+                                timeline, index, compiled, channel))
+            self._condition.notify()
+
+    def cancel(self, timeline, stop_vibration):
+        """Cancels the commands of a timeline not yet sent.
+        """
+        with self._condition:
+            if not timeline._cancelled:
+                timeline._cancelled = True
+                timeline._pending_count = 0
+                timeline._done_event.set()
+                # Cancelled commands are removed when reaching the top
+                self._condition.notify()
+            channels = sorted(timeline._active_channels)
+            timeline._active_channels = set()
+            if stop_vibration and channels:
+                # Written under the lock to not overtake a dispatch
+                belt_controller = self._belt_controller
+                belt_controller._write(b''.join([
+                    bytes(belt_controller._compileStopVibration(channel)[0])
+                    for channel in channels]))
+
+    def stop(self, join=False):
+        """Stops the thread, the scheduled commands are cancelled.
+        """
+        with self._condition:
+            self.stop_flag = True
+            for command in self._commands:
+                command[3]._cancelled = True
+                command[3]._done_event.set()
+            del self._commands[:]
+            self._condition.notify()
+        if join and self is not threading.current_thread():
+            self.join(THREAD_JOIN_TIMEOUT_SEC)
+
     def run(self):
         """Starts the thread."""
-        self.stop_flag = False
-        print("SerialPortListener: Start listening belt.")
-        while not self.stop_flag:
+        timer_period_set = False
+        if sys.platform == 'win32':
+            # Set the resolution of the OS timer to 1 ms for the waits
             try:
-                # Blocking until data are received
-                data_serial = self._serial_port.read()
-                data_buffer = []
-                # Convert to list of int
-                if data_serial is not None and len(data_serial) > 0:
-                    if self._belt_controller._PY3:
-                        for c in data_serial:
-                            data_buffer.append(c)
-                    else:
-                        for c in data_serial:
-                            data_buffer.append(ord(c))
-                    self._belt_controller._handleDataReceived(data_buffer)
-            except Exception as e:
-                if not self.stop_flag:
-                    print("SerialPortListener: Error when reading serial "+
-                          "input.")
+                import ctypes
+                ctypes.windll.winmm.timeBeginPeriod(1)
+                timer_period_set = True
+            except Exception:
+                pass
+        try:
+            self._runTimeline()
+        finally:
+            if timer_period_set:
+                try:
+                    import ctypes
+                    ctypes.windll.winmm.timeEndPeriod(1)
+                except Exception:
+                    pass
+
+    def _runTimeline(self):
+        """Waits for the scheduled commands and sends them until the thread is
+        stopped.
+        """
+        condition = self._condition
+        commands = self._commands
+        while True:
+            with condition:
+                while not self.stop_flag:
+                    while commands and commands[0][3]._cancelled:
+                        heapq.heappop(commands)
+                    if not commands:
+                        condition.wait()
+                        continue
+                    remaining = toSec(commands[0][0]-clockNs())
+                    if remaining <= SCHEDULER_SPIN_DURATION:
+                        break
+                    condition.wait(remaining-SCHEDULER_SPIN_DURATION)
+                if self.stop_flag:
+                    break
+                dispatch_clock_time = commands[0][0]
+            # Active wait, the GIL is released at each iteration
+            while clockNs() < dispatch_clock_time and not self.stop_flag:
+                time.sleep(0)
+            with condition:
+                if self.stop_flag:
+                    break
+                try:
+                    self._dispatch()
+                except Exception as e:
+                    print("BeltScheduler: Error when sending commands.")
                     print(e)
-                self._belt_controller.disconnectBelt()
-                break
-        print("SerialPortListener: Stop listening belt.")
+
+    def _dispatch(self):
+        """Sends the commands that are due in a single write.
+
+        Note: Must be called with the lock of the condition acquired.
+        """
+        belt_controller = self._belt_controller
+        now = clockNs()
+        packets = []
+        ack_futures = []
+        while self._commands and self._commands[0][0] <= now:
+            (clock_time, _, _, timeline, index, compiled,
+             channel) = heapq.heappop(self._commands)
+            if timeline._cancelled:
+                continue
+            packets.append(compiled[0])
+            if index < 0:
+                timeline._active_channels.discard(channel)
+            else:
+                # Track the acknowledgment to time the vibration
+                ack_future = belt_controller._registerAck(compiled[1][0],
+                                                          tracking=True)
+                ack_futures.append(ack_future)
+                timeline._timings[index] = CommandTiming(
+                    ack_future, belt_controller._round_trip_time)
+                timeline._dispatch_delays[index] = now-clock_time
+                timeline._active_channels.add(channel)
+            timeline._pending_count -= 1
+            if timeline._pending_count == 0:
+                timeline._done_event.set()
+        if packets:
+            belt_controller._write(b''.join([bytes(packet)
+                                             for packet in packets]),
+                                   ack_futures)
 
 
 class _BeltEventNotifier(threading.Thread):
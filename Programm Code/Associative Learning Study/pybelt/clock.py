@@ -0,0 +1,100 @@
+# Monotonic clock shared by the belt controller and the experiment.
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+import sys
+import time
+
+NS_PER_SEC = 1000000000
+# Number of nanoseconds in one second
+
+NS_PER_MS = 1000000
+# Number of nanoseconds in one millisecond
+
+def _getClockFunction():
+    """Returns a function without argument that returns the time of a
+    monotonic high-resolution clock in nanoseconds.
+    """
+    if hasattr(time, 'perf_counter_ns'):
+        return time.perf_counter_ns
+    if hasattr(time, 'perf_counter'):
+        perf_counter = time.perf_counter
+        return lambda: int(perf_counter()*NS_PER_SEC)
+    if sys.platform == 'win32':
+        # Python 2 on Windows: 'time.clock' uses the performance counter
+        clock = time.clock
+        return lambda: int(clock()*NS_PER_SEC)
+    try:
+        # Python 2 on Linux: 'clock_gettime' with CLOCK_MONOTONIC
+        import ctypes
+        import ctypes.util
+
+        class _Timespec(ctypes.Structure):
+            _fields_ = [('tv_sec', ctypes.c_long),
+                        ('tv_nsec', ctypes.c_long)]
+
+        CLOCK_MONOTONIC = 1
+        librt = ctypes.CDLL(ctypes.util.find_library('rt') or
+                            ctypes.util.find_library('c'), use_errno=True)
+        clock_gettime = librt.clock_gettime
+        timespec = _Timespec()
+        timespec_ref = ctypes.byref(timespec)
+        if clock_gettime(CLOCK_MONOTONIC, timespec_ref) != 0:
+            raise OSError("clock_gettime failed.")
+
+        def clock_ns():
+            clock_gettime(CLOCK_MONOTONIC, timespec_ref)
+            return timespec.tv_sec*NS_PER_SEC+timespec.tv_nsec
+        return clock_ns
+    except Exception:
+        # Last resort, not monotonic
+        wall_time = time.time
+        return lambda: int(wall_time()*NS_PER_SEC)
+
+clockNs = _getClockFunction()
+# Returns the time of the experiment clock in nanoseconds, as an int. The clock
+# is monotonic with an arbitrary origin, only differences are meaningful. All
+# timestamps of trials, stimuli, belt and audio events use this clock and can
+# be compared directly.
+
+def clockSec():
+    """Returns the time of the experiment clock in seconds.
+    """
+    return clockNs()/float(NS_PER_SEC)
+
+def toSec(duration_ns):
+    """Converts a duration in nanoseconds to seconds.
+    """
+    return duration_ns/float(NS_PER_SEC)
+
+def toNs(duration_sec):
+    """Converts a duration in seconds to nanoseconds.
+    """
+    return int(duration_sec*NS_PER_SEC)
+
+# Reference for the conversion to wall-clock time
+_reference_clock_ns = clockNs()
+_reference_wall_time = time.time()
+
+def toWallTime(clock_ns):
+    """Converts a clock time in nanoseconds to a wall-clock time in seconds
+    since the epoch, as returned by ``time.time()``.
+    """
+    return _reference_wall_time+toSec(clock_ns-_reference_clock_ns)
+
+def getWallClockDriftNs():
+    """Returns the drift in nanoseconds of the wall clock relative to the
+    experiment clock since the module has been loaded.
+
+    A positive drift means that the wall clock advanced more than the
+    experiment clock. The drift includes adjustments of the system time, e.g.
+    by NTP.
+    """
+    clock_ns = clockNs()
+    wall_time = time.time()
+    return (toNs(wall_time-_reference_wall_time)-
+            (clock_ns-_reference_clock_ns))
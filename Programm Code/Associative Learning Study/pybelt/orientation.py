@@ -0,0 +1,217 @@
+# Ring buffer of the orientation notifications of the belt
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+import numpy as np
+from pybelt.clock import NS_PER_SEC
+
+ORIENTATION_BUFFER_SIZE = 4096
+# Default number of orientation samples kept in the buffer
+
+class OrientationRingBuffer(object):
+    """Fixed-size ring buffer of orientation samples.
+
+    Each sample is a (clock time in ns, heading, heading offset) triple stored
+    in preallocated NumPy arrays, so that pushing a sample creates no Python
+    object. The buffer has a single writer, the listener thread of the belt
+    controller, and any number of readers. When the buffer is full, the oldest
+    samples are overwritten.
+
+    Samples are identified by a sequence number that increases with each push.
+    Readers get views on the arrays without copy with :meth:`getSegments`. As
+    the writer may overwrite the oldest samples while a view is used, a reader
+    checks with :meth:`isValid` that the samples of a view were not overwritten
+    before trusting the values read.
+
+    Required module
+    ---------------
+    This module requires NumPy.
+    """
+
+    def __init__(self, capacity=ORIENTATION_BUFFER_SIZE):
+        """Constructor.
+
+        Parameters
+        ----------
+        :param int capacity:
+            The maximum number of samples in the buffer.
+        """
+        self._capacity = capacity
+        self._clock_times = np.zeros(capacity, dtype=np.int64)
+        self._headings = np.zeros(capacity, dtype=np.int16)
+        self._offsets = np.zeros(capacity, dtype=np.int16)
+        # Number of samples pushed, only modified by the writer
+        self._count = 0
+
+    def getCapacity(self):
+        """Returns the maximum number of samples in the buffer.
+        """
+        return self._capacity
+
+    def getCount(self):
+        """Returns the number of samples pushed since the last clear, which is
+        also the sequence number of the next sample.
+        """
+        return self._count
+
+    def clear(self):
+        """Removes all samples (writer side).
+        """
+        self._count = 0
+
+    def push(self, clock_time, heading, offset):
+        """Adds a sample to the buffer (writer side).
+
+        Parameters
+        ----------
+        :param int clock_time:
+            The clock time in ns of the sample.
+        :param int heading:
+            The heading of the belt in degrees.
+        :param int offset:
+            The heading offset of the belt in degrees.
+        """
+        index = self._count%self._capacity
+        self._clock_times[index] = clock_time
+        self._headings[index] = heading
+        self._offsets[index] = offset
+        # Publish the sample only once it has been written
+        self._count += 1
+
+    def isValid(self, sequence):
+        """Checks that the samples from a sequence number have not been
+        overwritten.
+
+        Parameters
+        ----------
+        :param int sequence:
+            The sequence number of the first sample read.
+
+        Return
+        ------
+        :rtype bool
+            'True' if the samples from the sequence number are still in the
+            buffer and not being overwritten.
+        """
+        # The slot of the next sample may be partially written
+        return self._count-sequence < self._capacity
+
+    def getSegments(self, since=None):
+        """Returns views on the samples of the buffer without copy.
+
+        Parameters
+        ----------
+        :param int since:
+            The sequence number of the first sample to return, or None for all
+            samples of the buffer. Samples already overwritten are skipped.
+
+        Return
+        ------
+        :rtype tuple
+            The sequence number of the first sample returned and a list of at
+            most two (clock_times, headings, offsets) tuples of array views in
+            chronological order.
+        """
+        count = self._count
+        # Keep the slot of the next sample out of the views
+        first = max(0, count-self._capacity+1)
+        if since is not None:
+            first = min(max(first, since), count)
+        start = first%self._capacity
+        end = start+count-first
+        if end <= self._capacity:
+            slices = [slice(start, end)]
+        else:
+            slices = [slice(start, self._capacity),
+                      slice(0, end-self._capacity)]
+        segments = [(self._clock_times[s], self._headings[s], self._offsets[s])
+                    for s in slices if s.stop > s.start]
+        return (first, segments)
+
+    def getSnapshot(self, since=None):
+        """Returns the samples of the buffer as contiguous arrays.
+
+        The arrays are views without copy if the samples are contiguous in
+        the buffer, and copies if the samples wrap around the end of the
+        buffer.
+
+        Parameters
+        ----------
+        :param int since:
+            The sequence number of the first sample to return, or None for all
+            samples of the buffer.
+
+        Return
+        ------
+        :rtype tuple
+            The sequence number of the first sample and the arrays of clock
+            times in ns, headings and heading offsets.
+        """
+        first, segments = self.getSegments(since)
+        if len(segments) == 0:
+            return (first, self._clock_times[:0], self._headings[:0],
+                    self._offsets[:0])
+        if len(segments) == 1:
+            return (first,)+segments[0]
+        return (first,)+tuple(np.concatenate(arrays)
+                              for arrays in zip(*segments))
+
+    def getHeadingHistory(self, since=None):
+        """Returns the heading history with the 360 degrees jumps removed.
+
+        Parameters
+        ----------
+        :param int since:
+            The sequence number of the first sample to return, or None for all
+            samples of the buffer.
+
+        Return
+        ------
+        :rtype tuple
+            The arrays of clock times in ns and of continuous headings in
+            degrees, or None if the samples have been overwritten during the
+            computation.
+        """
+        first, clock_times, headings, _ = self.getSnapshot(since)
+        unwrapped = np.rad2deg(np.unwrap(np.deg2rad(
+            headings.astype(np.float64))))
+        clock_times = np.array(clock_times)
+        if not self.isValid(first):
+            return None
+        return (clock_times, unwrapped)
+
+    def getRateStatistics(self, since=None):
+        """Returns the statistics of the intervals between samples.
+
+        Parameters
+        ----------
+        :param int since:
+            The sequence number of the first sample to consider, or None for
+            all samples of the buffer.
+
+        Return
+        ------
+        :rtype dict
+            The number of samples, the sample rate in Hz, and the mean,
+            standard deviation and maximum of the intervals in seconds. Returns
+            None if there are less than two samples or if the samples have been
+            overwritten during the computation.
+        """
+        first, clock_times, _, _ = self.getSnapshot(since)
+        if len(clock_times) < 2:
+            return None
+        intervals = np.diff(clock_times)/float(NS_PER_SEC)
+        if not self.isValid(first):
+            return None
+        mean_interval = float(intervals.mean())
+        return {
+            'count': len(clock_times),
+            'rate': (1.0/mean_interval if mean_interval > 0 else 0.0),
+            'mean_interval': mean_interval,
+            'jitter': float(intervals.std()),
+            'max_gap': float(intervals.max())
+            }
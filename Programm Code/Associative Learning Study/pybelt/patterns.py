@@ -0,0 +1,408 @@
+# Compiler of multi-motor vibration patterns into belt commands
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+from builtins import bytes # For Python 2.7/3 compatibility
+
+VIBROMOTORS_COUNT = 16
+# Number of vibromotors on the belt
+
+CHANNELS_COUNT = 6
+# Number of vibration channels from firmware version 30
+
+DEFAULT_INTENSITY_BYTE = 170
+# Intensity byte for the user-defined intensity of the belt
+
+PULSE_MAX_ITERATIONS = 127
+# Maximum number of iterations of a pulse command
+
+PULSE_MAX_DURATION_MS = 0xFFFF
+# Maximum duration and period in milliseconds of a pulse command
+
+PULSE_RESOLUTION_MS = 10
+# Resolution in milliseconds of the durations of a pulse command
+
+class VibrationPattern(object):
+    """Declarative description of the intensity over time of each vibromotor.
+
+    A pattern is a set of segments, each segment being a vibration of one or
+    more vibromotors at a constant intensity during a time interval. Times are
+    in milliseconds from the start of the pattern. The pattern is translated
+    into belt commands by :func:`compilePattern`.
+
+    >>> pattern = VibrationPattern()
+    >>> pattern.addVibration([0, 8], 0, 500, 80)
+    >>> pattern.addPulses([4], 500, 100, 150, 4)
+    """
+
+    def __init__(self):
+        # Segments as (start, end, intensity) lists by vibromotor index
+        self._segments = {}
+
+    @classmethod
+    def fromIntensityFrames(cls, frames, frame_duration_ms):
+        """Creates a pattern from a sequence of intensity frames.
+
+        Parameters
+        ----------
+        :param list[list[int]] frames:
+            The intensity of each vibromotor for each frame, 0 for no
+            vibration and a negative value for the user-defined intensity.
+        :param int frame_duration_ms:
+            The duration of a frame in milliseconds.
+
+        Return
+        ------
+        :rtype VibrationPattern
+            The pattern.
+        """
+        pattern = cls()
+        for position in range(VIBROMOTORS_COUNT):
+            start = None
+            intensity = 0
+            for frame_idx, frame in enumerate(frames):
+                frame_intensity = 0
+                if position < len(frame):
+                    frame_intensity = frame[position]
+                if frame_intensity == intensity:
+                    continue
+                if intensity != 0:
+                    pattern.addVibration([position],
+                                         start*frame_duration_ms,
+                                         (frame_idx-start)*frame_duration_ms,
+                                         intensity)
+                start = frame_idx
+                intensity = frame_intensity
+            if intensity != 0:
+                pattern.addVibration([position], start*frame_duration_ms,
+                                     (len(frames)-start)*frame_duration_ms,
+                                     intensity)
+        return pattern
+
+    def addVibration(self, positions, start_ms, duration_ms, intensity=-1):
+        """Adds a vibration of vibromotors.
+
+        Parameters
+        ----------
+        :param list[int] positions:
+            The indexes of the vibromotors, in range [0-15].
+        :param int start_ms:
+            The start of the vibration in milliseconds.
+        :param int duration_ms:
+            The duration of the vibration in milliseconds.
+        :param int intensity:
+            The intensity in range [0-100] or a negative value to use the
+            user-defined intensity set on the belt.
+
+        Exception
+        ---------
+        Raises a ValueError if the vibration overlaps another vibration of a
+        vibromotor or if a parameter is invalid.
+        """
+        start_ms = int(round(start_ms))
+        end_ms = start_ms+int(round(duration_ms))
+        if start_ms < 0 or end_ms <= start_ms:
+            raise ValueError("Illegal vibration time or duration.")
+        if intensity == 0:
+            return
+        intensity = min(intensity, 100) if intensity > 0 else -1
+        for position in positions:
+            if position < 0 or position >= VIBROMOTORS_COUNT:
+                raise ValueError("Illegal vibromotor index: "+str(position))
+            segments = self._segments.setdefault(position, [])
+            for start, end, _ in segments:
+                if start < end_ms and start_ms < end:
+                    raise ValueError("Overlapping vibrations of vibromotor "+
+                                     str(position)+".")
+            segments.append((start_ms, end_ms, intensity))
+            segments.sort()
+
+    def addPulses(self, positions, start_ms, on_duration_ms, off_duration_ms,
+                  iterations, intensity=-1):
+        """Adds regular vibration pulses of vibromotors.
+
+        Parameters
+        ----------
+        :param list[int] positions:
+            The indexes of the vibromotors, in range [0-15].
+        :param int start_ms:
+            The start of the first pulse in milliseconds.
+        :param int on_duration_ms:
+            The duration of each pulse in milliseconds.
+        :param int off_duration_ms:
+            The duration of the pause between pulses in milliseconds.
+        :param int iterations:
+            The number of pulses.
+        :param int intensity:
+            The intensity in range [0-100] or a negative value to use the
+            user-defined intensity set on the belt.
+        """
+        period_ms = on_duration_ms+off_duration_ms
+        for pulse_idx in range(iterations):
+            self.addVibration(positions, start_ms+pulse_idx*period_ms,
+                              on_duration_ms, intensity)
+
+    def getSegments(self, position):
+        """Returns the vibrations of a vibromotor.
+
+        Return
+        ------
+        :rtype list[tuple]
+            The (start_ms, end_ms, intensity) segments of the vibromotor.
+        """
+        return list(self._segments.get(position, []))
+
+    def getDuration(self):
+        """Returns the duration of the pattern in milliseconds.
+        """
+        return max([segments[-1][1] for segments in self._segments.values()
+                    if segments] or [0])
+
+    def _getMergedSegments(self):
+        """Returns the segments of each vibromotor with the contiguous segments
+        of same intensity merged.
+        """
+        merged_segments = {}
+        for position, segments in self._segments.items():
+            merged = []
+            for segment in segments:
+                if (merged and merged[-1][1] == segment[0] and
+                    merged[-1][2] == segment[2]):
+                    merged[-1] = (merged[-1][0], segment[1], segment[2])
+                else:
+                    merged.append(segment)
+            if merged:
+                merged_segments[position] = merged
+        return merged_segments
+
+class CompiledPattern(object):
+    """Belt commands of a vibration pattern for a firmware version, see
+    :func:`compilePattern`.
+    """
+
+    def __init__(self, firmware_version, commands, duration_ms):
+        """Constructor.
+
+        Parameters
+        ----------
+        :param int firmware_version:
+            The firmware version of the commands.
+        :param list[tuple] commands:
+            The commands as (t_offset_ms, priority, packet, ack_id, channel)
+            tuples in order of time, where stop commands have the priority 0
+            and are sent before the other commands of the same time.
+        :param int duration_ms:
+            The duration of the pattern in milliseconds.
+        """
+        self.firmware_version = firmware_version
+        self.commands = commands
+        self.duration_ms = duration_ms
+
+    def getCommandCount(self):
+        """Returns the number of commands of the pattern.
+        """
+        return len(self.commands)
+
+    def getByteCount(self):
+        """Returns the number of bytes written for the pattern.
+        """
+        return sum([len(command[2]) for command in self.commands])
+
+def compilePattern(pattern, firmware_version, adjust_index=None):
+    """Translates a vibration pattern into the fewest belt commands for a
+    firmware version.
+
+    Vibromotors with the same vibrations are started together with a direction
+    mask. From firmware version 33, a series of regular pulses is a single
+    pulse command with iterations, and the belt stops each vibration by itself.
+    Vibrations that overlap in time are played on different channels. Before
+    firmware version 30, only one channel is available and all vibromotors
+    vibrating at the same time must have the same intensity.
+
+    Parameters
+    ----------
+    :param VibrationPattern pattern:
+        The pattern to compile.
+    :param int firmware_version:
+        The firmware version of the belt.
+    :param function adjust_index:
+        Function that adjusts a vibromotor index to the signal orientation, or
+        None.
+
+    Return
+    ------
+    :rtype CompiledPattern
+        The commands of the pattern.
+
+    Exception
+    ---------
+    Raises a ValueError if the pattern cannot be played with the firmware
+    version.
+    """
+    merged_segments = pattern._getMergedSegments()
+    if adjust_index is not None:
+        merged_segments = dict((adjust_index(position), segments)
+                               for position, segments in
+                               merged_segments.items())
+    if firmware_version < 30:
+        commands = _compileSingleChannel(merged_segments)
+    else:
+        commands = _compileChannels(merged_segments, firmware_version >= 33)
+    commands.sort(key=lambda command: command[:2])
+    return CompiledPattern(firmware_version, commands, pattern.getDuration())
+
+def _compileChannels(merged_segments, pulse_available):
+    """Compiles the segments with commands 0x87, 0x88 and 0x8A.
+    """
+    # Vibromotors with the same segments
+    groups = {}
+    for position, segments in merged_segments.items():
+        groups.setdefault(tuple(segments), []).append(position)
+    # Channels by time of the first segment
+    channel_free_times = [0]*CHANNELS_COUNT
+    commands = []
+    for segments, positions in sorted(groups.items()):
+        channel = None
+        for candidate in range(CHANNELS_COUNT):
+            if channel_free_times[candidate] <= segments[0][0]:
+                channel = candidate
+                break
+        if channel is None:
+            raise ValueError("Too many vibrations at the same time.")
+        channel_free_times[channel] = segments[-1][1]
+        direction_type, direction_int = _directionBytes(positions)
+        sct_byte = (channel<<4)+direction_type
+        if pulse_available:
+            runs = _splitPulseRuns(segments)
+        else:
+            runs = [(segment, 1, 0) for segment in segments]
+        for run_idx, (segment, iterations, period) in enumerate(runs):
+            start, end, intensity = segment
+            intensity_byte = _intensityByte(intensity)
+            duration = end-start
+            if pulse_available and _isPulseDuration(duration):
+                # The belt stops the vibration
+                if iterations == 1:
+                    period = duration
+                packet = bytes([0x8A,
+                                sct_byte,
+                                direction_int&0xFF,
+                                (direction_int>>8)&0xFF,
+                                intensity_byte,
+                                iterations,
+                                duration&0xFF,
+                                (duration>>8)&0xFF,
+                                period&0xFF,
+                                (period>>8)&0xFF,
+                                0x00, # Interrupt current pulse
+                                0x0A])
+                commands.append((start, 1, packet, 0xCA, channel))
+                continue
+            packet = bytes([0x87,
+                            sct_byte,
+                            direction_int&0xFF,
+                            (direction_int>>8)&0xFF,
+                            intensity_byte,
+                            0x00, # Continuous
+                            0x0A])
+            commands.append((start, 1, packet, 0xC7, channel))
+            # No stop if the next vibration of the channel starts at the end
+            if run_idx+1 < len(runs) and runs[run_idx+1][0][0] == end:
+                continue
+            mask = 2**channel
+            commands.append((end, 0, bytes([0x88, mask&0xFF, (mask>>8)&0xFF,
+                                            0x00, 0x00, 0x0A]),
+                             0xC8, channel))
+    return commands
+
+def _splitPulseRuns(segments):
+    """Splits segments into runs of regular pulses.
+
+    Return
+    ------
+    :rtype list[tuple]
+        The runs as (first segment, iterations, period) tuples.
+    """
+    runs = []
+    for segment in segments:
+        if runs:
+            first, iterations, period = runs[-1]
+            duration = first[1]-first[0]
+            gap = segment[0]-first[0]-(iterations-1)*period
+            if (segment[1]-segment[0] == duration and
+                segment[2] == first[2] and
+                iterations < PULSE_MAX_ITERATIONS and
+                _isPulseDuration(duration) and
+                _isPulseDuration(gap) and
+                (iterations == 1 or gap == period)):
+                runs[-1] = (first, iterations+1, gap)
+                continue
+        runs.append((segment, 1, 0))
+    return runs
+
+def _isPulseDuration(duration):
+    """Checks that a duration can be set exactly in a pulse command.
+    """
+    return (duration <= PULSE_MAX_DURATION_MS and
+            duration%PULSE_RESOLUTION_MS == 0)
+
+def _compileSingleChannel(merged_segments):
+    """Compiles the segments with commands 0x84 and 0x86 of channel 0.
+    """
+    times = set()
+    for segments in merged_segments.values():
+        for start, end, _ in segments:
+            times.add(start)
+            times.add(end)
+    commands = []
+    previous_state = None
+    for time_ms in sorted(times):
+        # Vibromotors and intensity at this time
+        mask = 0
+        intensities = set()
+        for position, segments in merged_segments.items():
+            for start, end, intensity in segments:
+                if start <= time_ms < end:
+                    mask |= 32768 >> (((position+2)%16))
+                    intensities.add(intensity)
+        if len(intensities) > 1:
+            raise ValueError("Vibrations at the same time with different "+
+                             "intensities require firmware version 30.")
+        state = (mask, intensities.pop() if intensities else None)
+        if state == previous_state:
+            continue
+        previous_state = state
+        if mask == 0:
+            commands.append((time_ms, 0, b'\x84\x00\x00\x00\xAA\x0A', 0xC4, 0))
+            continue
+        commands.append((time_ms, 1, bytes([0x86,
+                                            (mask>>8)&0xFF,
+                                            mask&0xFF,
+                                            0x00,
+                                            _intensityByte(state[1]),
+                                            0x0A]),
+                         0xC6, 0))
+    return commands
+
+def _directionBytes(positions):
+    """Returns the direction type and direction value of vibromotors.
+    """
+    if len(positions) == 1:
+        # Vibromotor index
+        return (1, positions[0])
+    # Binary mask
+    direction_int = 0
+    for position in positions:
+        direction_int |= (1<<position)
+    return (0, direction_int)
+
+def _intensityByte(intensity):
+    """Returns the intensity byte of an intensity.
+    """
+    if intensity < 0:
+        return DEFAULT_INTENSITY_BYTE
+    return min(intensity, 100)
@@ -0,0 +1,503 @@
+# Transport layer of the communication with the feelSpace belt
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+import abc # For the abstract transport
+import serial # PySerial for USB connection
+import serial.tools.list_ports
+import threading # For listener thread
+import time # For batching delays
+import queue # For in-memory transport
+from pybelt.clock import clockSec # Monotonic clock of the experiment
+
+PACKET_SIZE = 6
+# Size of incoming packets
+
+PACKET_TERMINATOR = 0x0A
+# Last byte of incoming packets
+
+RECEIVE_BUFFER_SIZE = 4096
+# Size of the buffer for incoming data
+
+INCOMING_PACKET_TIMEOUT = 0.5
+# Timeout to receive a complete packet
+
+THREAD_JOIN_TIMEOUT_SEC = 2.0
+# Timeout for joining the listener thread
+
+BELT_BT_COMM_PORT = 1
+# Comm port
+
+SERIAL_BAUDRATE = 115200
+# Baudrate of the serial connection
+
+SERIAL_READ_TIMEOUT = 1.0
+# Read timeout of the serial port in seconds
+
+SERIAL_READ_MIN_BATCH = 1
+# Default minimum number of bytes read before handling received data
+
+SERIAL_READ_LATENCY_CAP = 0.002
+# Default maximum time in seconds to wait for the minimum number of bytes
+
+SERIAL_READ_POLL_PERIOD = 0.0005
+# Waiting time between two checks of the input buffer when batching
+
+SOCKET_READ_SIZE = 128
+# Maximum number of bytes read at once from a socket
+
+_AbstractBase = abc.ABCMeta('_AbstractBase', (object,), {})
+# Base of abstract classes, for Python 2.7/3 compatibility
+
+
+class BeltTransport(_AbstractBase):
+    """Connection to a belt that transfers raw bytes.
+
+    A transport opens the connection, writes the outgoing bytes and hands the
+    incoming bytes to a data handler from a listener thread. Packet framing and
+    acknowledgments are managed by the belt controller, identically for all
+    transports.
+
+    Subclasses implement the abstract backend methods ``_openConnection``,
+    ``_read``, ``_write`` and ``_closeConnection``.
+    """
+
+    WAIT_KEEP_ALIVE = False
+    # 'True' if the belt is only ready after its first keep-alive
+
+    def __init__(self, name):
+        """Constructor.
+
+        Parameters
+        ----------
+        :param str name:
+            The name of the transport, used for the listener thread.
+        """
+        self._name = name
+        self._listener = None
+
+    def open(self, data_handler, error_handler):
+        """Opens the connection and starts listening.
+
+        Parameters
+        ----------
+        :param function data_handler:
+            Function called from the listener thread with the bytes received.
+        :param function error_handler:
+            Function without argument called from the listener thread when the
+            connection is lost.
+
+        Exception
+        ---------
+        Raises the exception of the backend if the connection fails.
+        """
+        self._openConnection()
+        self._listener = _TransportListener(self, data_handler, error_handler)
+        self._listener.start()
+
+    def write(self, data):
+        """Writes bytes on the connection.
+        """
+        self._write(data)
+
+    def close(self, join=False):
+        """Stops listening and closes the connection.
+
+        Parameters
+        ----------
+        :param bool join:
+            'True' to join the listener thread.
+        """
+        listener = self._listener
+        self._listener = None
+        if listener is not None:
+            listener.stop_flag = True
+        try:
+            self._closeConnection()
+        except Exception as e:
+            print(self._name+": Failed to close connection.")
+            print(e)
+        if (join and listener is not None and
+            listener is not threading.current_thread()):
+            listener.join(THREAD_JOIN_TIMEOUT_SEC)
+
+    def getDeviceId(self):
+        """Returns an identifier of the connected device, or None.
+        """
+        return None
+
+    @abc.abstractmethod
+    def _openConnection(self):
+        """Opens the connection, called before the listener thread is started.
+        Raises an exception if the connection fails.
+        """
+
+    @abc.abstractmethod
+    def _read(self):
+        """Returns the bytes received, blocking until bytes are available or
+        a timeout. Raises an exception when the connection is lost.
+
+        This method is called from the listener thread.
+        """
+
+    @abc.abstractmethod
+    def _write(self, data):
+        """Writes bytes on the connection. Raises an exception if the write
+        fails.
+        """
+
+    @abc.abstractmethod
+    def _closeConnection(self):
+        """Closes the connection, and unblocks a pending read of the listener
+        thread.
+        """
+
+
+class SerialTransport(BeltTransport):
+    """Transport over a serial port (USB).
+    """
+
+    WAIT_KEEP_ALIVE = True
+
+    def __init__(self, port_name, min_batch=SERIAL_READ_MIN_BATCH,
+                 latency_cap=SERIAL_READ_LATENCY_CAP):
+        """Constructor.
+
+        Parameters
+        ----------
+        :param str port_name:
+            The serial port, e.g. 'COM1' on Windows or '/dev/ttyUSB0' on Linux.
+        :param int min_batch:
+            The minimum number of bytes read before handling the data.
+        :param float latency_cap:
+            The maximum time in seconds to wait for the minimum number of
+            bytes.
+        """
+        BeltTransport.__init__(self, "SerialPortListener")
+        self._port_name = port_name
+        self._min_batch = min_batch
+        self._latency_cap = latency_cap
+        self._serial_port = None
+
+    def getDeviceId(self):
+        return _getSerialDeviceId(self._port_name)
+
+    def _openConnection(self):
+        self._serial_port = serial.Serial(self._port_name, SERIAL_BAUDRATE,
+                                          timeout=SERIAL_READ_TIMEOUT)
+        # Discard old input
+        self._serial_port.reset_input_buffer()
+
+    def _read(self):
+        """Reads all bytes available on the serial port, waiting for the
+        minimum batch size within the latency cap.
+        """
+        serial_port = self._serial_port
+        # Blocking until data are received
+        data = serial_port.read(max(1, serial_port.in_waiting))
+        if not data or len(data) >= self._min_batch:
+            return data
+        deadline = clockSec()+self._latency_cap
+        while len(data) < self._min_batch:
+            waiting = serial_port.in_waiting
+            if waiting > 0:
+                data += serial_port.read(waiting)
+            else:
+                remaining = deadline-clockSec()
+                if remaining <= 0:
+                    break
+                time.sleep(min(remaining, SERIAL_READ_POLL_PERIOD))
+        return data
+
+    def _write(self, data):
+        self._serial_port.write(data)
+
+    def _closeConnection(self):
+        if self._serial_port is not None:
+            self._serial_port.close()
+
+
+class SocketTransport(BeltTransport):
+    """Transport over a connected stream socket.
+    """
+
+    def __init__(self, socket, device_id=None, name="SocketListener"):
+        """Constructor.
+
+        Parameters
+        ----------
+        :param socket socket:
+            The connected socket.
+        :param str device_id:
+            The identifier of the connected device, or None.
+        :param str name:
+            The name of the transport.
+        """
+        BeltTransport.__init__(self, name)
+        self._socket = socket
+        self._device_id = device_id
+
+    def getDeviceId(self):
+        return self._device_id
+
+    def _openConnection(self):
+        pass
+
+    def _read(self):
+        data = self._socket.recv(SOCKET_READ_SIZE)
+        if data is not None and len(data) == 0:
+            raise IOError("Connection closed.")
+        return data
+
+    def _write(self, data):
+        self._socket.send(data)
+
+    def _closeConnection(self):
+        if self._socket is not None:
+            self._socket.close()
+
+
+class RfcommTransport(SocketTransport):
+    """Transport over a Bluetooth RFCOMM socket.
+
+    This transport requires PyBluez (https://github.com/karulis/pybluez).
+    """
+
+    def __init__(self, bt_address):
+        """Constructor.
+
+        Parameters
+        ----------
+        :param str bt_address:
+            The Bluetooth address of the belt.
+        """
+        SocketTransport.__init__(self, None, bt_address, "BTSocketListener")
+        self._bt_address = bt_address
+
+    def _openConnection(self):
+        import bluetooth # Bluetooth module from pyBluez
+        self._socket = bluetooth.BluetoothSocket(bluetooth.RFCOMM)
+        self._socket.connect((self._bt_address, BELT_BT_COMM_PORT))
+
+
+class MemoryTransport(BeltTransport):
+    """In-memory transport, e.g. for a simulated belt.
+
+    Bytes written by the belt controller are passed to a write handler, and
+    bytes injected with :meth:`receive` are handed to the belt controller from
+    the listener thread, as for other transports.
+    """
+
+    def __init__(self, write_handler=None, device_id=None):
+        """Constructor.
+
+        Parameters
+        ----------
+        :param function write_handler:
+            Function called with the bytes written by the belt controller, or
+            None to discard them.
+        :param str device_id:
+            The identifier of the simulated device, or None.
+        """
+        BeltTransport.__init__(self, "MemoryListener")
+        self._write_handler = write_handler
+        self._device_id = device_id
+        self._incoming = queue.Queue()
+
+    def receive(self, data):
+        """Injects bytes received from the belt.
+        """
+        self._incoming.put(data)
+
+    def getDeviceId(self):
+        return self._device_id
+
+    def _openConnection(self):
+        pass
+
+    def _read(self):
+        data = self._incoming.get()
+        if data is None:
+            raise IOError("Connection closed.")
+        return data
+
+    def _write(self, data):
+        if self._write_handler is not None:
+            self._write_handler(data)
+
+    def _closeConnection(self):
+        # Unblock the listener
+        self._incoming.put(None)
+
+
+class _TransportListener(threading.Thread):
+    """Thread that reads a transport and hands over the bytes received."""
+
+    def __init__(self, transport, data_handler, error_handler):
+        """Constructor that configures the listener.
+
+        Parameters
+        ----------
+        :param BeltTransport transport:
+            The transport to read.
+        :param function data_handler:
+            Function called with the bytes received.
+        :param function error_handler:
+            Function called when the connection is lost.
+        """
+        threading.Thread.__init__(self, name=transport._name)
+        self.daemon = True
+        self._transport = transport
+        self._data_handler = data_handler
+        self._error_handler = error_handler
+
+        # Flag for stopping the thread
+        self.stop_flag = False
+
+    def run(self):
+        """Starts the thread."""
+        print(self.name+": Start listening belt.")
+        while not self.stop_flag:
+            try:
+                data = self._transport._read()
+                if data is not None and len(data) > 0:
+                    self._data_handler(data)
+            except Exception as e:
+                if not self.stop_flag:
+                    print(self.name+": Error when reading input.")
+                    print(e)
+                    self._error_handler()
+                break
+        print(self.name+": Stop listening belt.")
+
+
+class _PacketFramer():
+    """Splits the incoming data in packets.
+
+    Incoming data are copied in a preallocated buffer, and the packets are
+    handed over as views on this buffer without copy. A view is only valid
+    during the call of the packet handler. When the terminator byte of a
+    packet is missing, the framer realigns on the next terminator byte.
+    """
+
+    def __init__(self, py3=True):
+        """Constructor.
+
+        Parameters
+        ----------
+        :param bool py3:
+            'True' if running Python 3. Under Python 2, items of memory views
+            are not int, so packets are handed over as bytearray copies.
+        """
+        self._buffer = bytearray(RECEIVE_BUFFER_SIZE)
+        self._view = memoryview(self._buffer)
+        self._py3 = py3
+        # Start and end of unprocessed data in buffer
+        self._start = 0
+        self._end = 0
+        # Reception time of the first byte of the incomplete packet
+        self._packet_start_time = clockSec()
+        # Statistics
+        self.frame_count = 0
+        self.resync_count = 0
+        self.timeout_count = 0
+
+    def reset(self):
+        """Clears the buffer and the statistics.
+        """
+        self._start = 0
+        self._end = 0
+        self.frame_count = 0
+        self.resync_count = 0
+        self.timeout_count = 0
+
+    def feed(self, data, packet_handler):
+        """Adds data to the buffer and hands over the complete packets.
+
+        Parameters
+        ----------
+        :param bytes data:
+            The data received.
+        :param function packet_handler:
+            Function called with each complete packet.
+        """
+        # Check for packet timeout
+        if self._end > self._start:
+            if ((clockSec()-self._packet_start_time) >
+                INCOMING_PACKET_TIMEOUT):
+                # Timeout, clear previous data
+                print("BeltController: Packet timeout.")
+                self.timeout_count += 1
+                self._start = 0
+                self._end = 0
+        # Check data size
+        if data is None:
+            return
+        data_len = len(data)
+        if data_len < 1:
+            return
+        if self._end == self._start:
+            # Packet start
+            self._start = 0
+            self._end = 0
+            self._packet_start_time = clockSec()
+        # Copy data in buffer
+        if self._end+data_len > RECEIVE_BUFFER_SIZE:
+            # Move unprocessed data to the buffer start
+            pending = self._end-self._start
+            if pending+data_len > RECEIVE_BUFFER_SIZE:
+                print("BeltController: Receive buffer overflow.")
+                self.resync_count += 1
+                pending = 0
+            self._buffer[0:pending] = self._buffer[self._end-pending:self._end]
+            self._start = 0
+            self._end = pending
+            if data_len > RECEIVE_BUFFER_SIZE:
+                data = data[-RECEIVE_BUFFER_SIZE:]
+                data_len = RECEIVE_BUFFER_SIZE
+        self._buffer[self._end:self._end+data_len] = data
+        self._end += data_len
+        # Hand over complete packets
+        buffer = self._buffer
+        start = self._start
+        end = self._end
+        while end-start >= PACKET_SIZE:
+            terminator = start+PACKET_SIZE-1
+            if buffer[terminator] != PACKET_TERMINATOR:
+                print("BeltController: Malformed packet, no termination "+
+                      "byte.")
+                # Realign on the next terminator
+                self.resync_count += 1
+                terminator = buffer.find(b'\x0A', terminator+1, end)
+                if terminator < 0:
+                    start = end-(PACKET_SIZE-1)
+                    break
+                start = terminator-(PACKET_SIZE-1)
+            self.frame_count += 1
+            if self._py3:
+                packet_handler(self._view[start:start+PACKET_SIZE])
+            else:
+                packet_handler(buffer[start:start+PACKET_SIZE])
+            start += PACKET_SIZE
+        if start != self._start and start < end:
+            # Next packet started in this data
+            self._packet_start_time = clockSec()
+        self._start = start
+
+
+def _getSerialDeviceId(port_name):
+    """Returns an identifier of the USB device of a serial port, or None.
+    """
+    try:
+        for comm_port in serial.tools.list_ports.comports():
+            if comm_port.device == port_name:
+                if comm_port.serial_number:
+                    return "usb:"+str(comm_port.serial_number)
+                return None
+    except Exception:
+        pass
+    return None
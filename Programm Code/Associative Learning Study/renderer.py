@@ -0,0 +1,167 @@
+# Retained-mode renderer for the UI components of the experiment.
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+import pygame
+
+class LayerRenderer(object):
+    """Renderer that keeps one cached layer per UI component.
+
+    A component is only drawn again when its layer has been invalidated. The
+    component is drawn on a transparent canvas of the screen size and reports
+    the areas it has drawn. Its layer keeps a copy of these areas only, and
+    the canvas is cleared in these areas for the next component. The screen
+    is then composed only in the areas that changed since the last frame
+    (dirty rectangles), and only these areas are sent to the display.
+    """
+
+    def __init__(self, screen):
+        """Constructor.
+
+        Parameters
+        ----------
+        :param Surface screen:
+            The display surface.
+        """
+        self._screen = screen
+        # Layers by component
+        self._layers = {}
+        # Canvas on which components are drawn, transparent between draws
+        self._canvas = _newCanvas(screen)
+        # Background color of the last frame
+        self._background = None
+        # Flag for a complete redraw of the screen
+        self._full_redraw = True
+
+    def setScreen(self, screen):
+        """Sets a new display surface, e.g. after a change of window mode.
+        All layers are discarded.
+        """
+        self._screen = screen
+        self._layers = {}
+        self._canvas = _newCanvas(screen)
+        self._full_redraw = True
+
+    def invalidate(self, component=None):
+        """Invalidates the layer of a component, or all layers and the whole
+        screen if no component is given.
+        """
+        if component is None:
+            for layer in self._layers.values():
+                layer.valid = False
+            self._full_redraw = True
+        elif component in self._layers:
+            self._layers[component].valid = False
+
+    def render(self, components, background, draw_layer):
+        """Draws the invalid layers and updates the dirty areas of the screen.
+
+        Parameters
+        ----------
+        :param list components:
+            The components to display, in drawing order.
+        :param Color background:
+            The background color of the screen.
+        :param function draw_layer:
+            Function called as ``draw_layer(component, canvas)`` to draw a
+            component on the canvas. It returns the list of buttons, kept with
+            the layer until the layer is invalidated, and the list of rects
+            drawn on the canvas.
+
+        Return
+        ------
+        :rtype list
+            The buttons of all displayed layers, in drawing order.
+        """
+        dirty_rects = []
+        # Remove layers of hidden components
+        for component in list(self._layers.keys()):
+            if component not in components:
+                layer = self._layers.pop(component)
+                if layer.rect is not None:
+                    dirty_rects.append(layer.rect)
+        # Check background
+        if background != self._background:
+            self._background = background
+            self._full_redraw = True
+        # Draw invalid layers
+        layers = []
+        buttons = []
+        for component in components:
+            layer = self._layers.get(component)
+            if layer is None:
+                layer = _Layer()
+                self._layers[component] = layer
+            elif layer in layers:
+                # Component displayed twice
+                continue
+            if not layer.valid:
+                if layer.rect is not None:
+                    dirty_rects.append(layer.rect)
+                layer.valid = True
+                layer.buttons, drawn_rects = draw_layer(component,
+                                                        self._canvas)
+                self._copyLayer(layer, drawn_rects)
+                if layer.rect is not None:
+                    dirty_rects.append(layer.rect)
+            layers.append(layer)
+            buttons.extend(layer.buttons)
+        # Compose screen
+        if self._full_redraw:
+            self._full_redraw = False
+            self._screen.fill(background)
+            for layer in layers:
+                if layer.rect is not None:
+                    self._screen.blit(layer.surface, layer.rect)
+            pygame.display.flip()
+        elif dirty_rects:
+            for dirty_rect in dirty_rects:
+                self._screen.fill(background, dirty_rect)
+                for layer in layers:
+                    if (layer.rect is not None and
+                        layer.rect.colliderect(dirty_rect)):
+                        area = layer.rect.clip(dirty_rect)
+                        self._screen.blit(
+                            layer.surface, area,
+                            area.move(-layer.rect.x, -layer.rect.y))
+            pygame.display.update(dirty_rects)
+        return buttons
+
+    def _copyLayer(self, layer, drawn_rects):
+        """Copies the areas drawn on the canvas in a layer of their size, and
+        clears these areas of the canvas.
+        """
+        canvas_rect = self._canvas.get_rect()
+        drawn_rects = [canvas_rect.clip(rect) for rect in drawn_rects]
+        drawn_rects = [rect for rect in drawn_rects
+                       if rect.width > 0 and rect.height > 0]
+        if not drawn_rects:
+            layer.rect = None
+            layer.surface = None
+            return
+        layer.rect = drawn_rects[0].unionall(drawn_rects[1:])
+        # Copy of the pixels, without blending on a transparent surface
+        layer.surface = self._canvas.subsurface(layer.rect).copy()
+        self._canvas.fill((0, 0, 0, 0), layer.rect)
+
+def _newCanvas(screen):
+    """Returns a transparent surface of the screen size.
+    """
+    return pygame.Surface(screen.get_size(), pygame.SRCALPHA).convert_alpha()
+
+class _Layer(object):
+    """Cached drawing of one component.
+    """
+
+    def __init__(self):
+        self.valid = False
+        # Copy of the area drawn by the component, or None if empty
+        self.surface = None
+        # Area drawn on the screen, or None if empty
+        self.rect = None
+        # Buttons of the component
+        self.buttons = []
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+
+# Test of the retained-mode renderer of the UI components
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+import os
+import unittest
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+from pygame.rect import Rect
+from renderer import LayerRenderer
+
+BACKGROUND = pygame.Color(0, 0, 0)
+# Background color of the screen
+
+class LayerRendererTest(unittest.TestCase):
+
+    def setUp(self):
+        pygame.display.init()
+        self.screen = pygame.display.set_mode((200, 100))
+        self.renderer = LayerRenderer(self.screen)
+        self.rects = {
+            'left': Rect(10, 10, 20, 20),
+            'right': Rect(150, 50, 30, 10)
+            }
+        self.draw_count = 0
+
+    def tearDown(self):
+        pygame.display.quit()
+
+    def _drawLayer(self, component, canvas):
+        self.draw_count += 1
+        rect = pygame.draw.rect(canvas, (255, 0, 0), self.rects[component])
+        return ([(component, rect)], [rect])
+
+    def testLayersAreSizedToDrawnAreas(self):
+        buttons = self.renderer.render(['left', 'right'], BACKGROUND,
+                                       self._drawLayer)
+        self.assertEqual([button[0] for button in buttons], ['left', 'right'])
+        layer = self.renderer._layers['left']
+        self.assertEqual(layer.rect, self.rects['left'])
+        self.assertEqual(layer.surface.get_size(), (20, 20))
+        self.assertEqual(self.screen.get_at((15, 15)), (255, 0, 0, 255))
+        self.assertEqual(self.screen.get_at((100, 50)), (0, 0, 0, 255))
+        # The canvas is transparent for the next components
+        self.assertEqual(self.renderer._canvas.get_bounding_rect().size,
+                         (0, 0))
+
+    def testOnlyInvalidLayersAreDrawn(self):
+        self.renderer.render(['left', 'right'], BACKGROUND, self._drawLayer)
+        self.renderer.render(['left', 'right'], BACKGROUND, self._drawLayer)
+        self.assertEqual(self.draw_count, 2)
+        self.renderer.invalidate('right')
+        self.rects['right'] = Rect(100, 20, 10, 10)
+        self.renderer.render(['left', 'right'], BACKGROUND, self._drawLayer)
+        self.assertEqual(self.draw_count, 3)
+        self.assertEqual(self.screen.get_at((155, 55)), (0, 0, 0, 255))
+        self.assertEqual(self.screen.get_at((105, 25)), (255, 0, 0, 255))
+
+    def testHiddenComponentIsCleared(self):
+        self.renderer.render(['left', 'right'], BACKGROUND, self._drawLayer)
+        self.renderer.render(['left'], BACKGROUND, self._drawLayer)
+        self.assertEqual(self.screen.get_at((155, 55)), (0, 0, 0, 255))
+        self.assertNotIn('right', self.renderer._layers)
+
+    def testDrawnAreasAreClippedToScreen(self):
+        self.rects['left'] = Rect(-10, 90, 30, 30)
+        self.renderer.render(['left'], BACKGROUND, self._drawLayer)
+        self.assertEqual(self.renderer._layers['left'].rect, Rect(0, 90, 20, 10))
+
+    def testEmptyComponent(self):
+        self.renderer.render(['empty'], BACKGROUND,
+                             lambda component, canvas: ([], []))
+        self.assertIsNone(self.renderer._layers['empty'].rect)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,380 @@
+#!/usr/bin/env python
+
+# Offline re-scoring of the voice responses of recorded sessions
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+from __future__ import print_function
+import argparse
+import csv
+import fnmatch
+import glob
+import json
+import multiprocessing
+import os
+import sys
+from audioreplay import readWav, chunkPowers, replayChunks, MS_PER_CHUNK, \
+    THRESHOLD_LEVEL_ONSET, THRESHOLD_LEVEL_OFFSET, DETECTION_WINDOW
+from onsetdetection import ThresholdOnsetDetector
+from pybelt.clock import toNs
+
+RESULT_FOLDER = "./results/"
+# Default root of the results tree, as in the experiment
+
+VALUES_FILE = "./session_data/values.json"
+# Default file of the values used during the sessions
+
+MINIMUM_RESPONSE_DURATION = 0.100
+# Default minimum duration in seconds of a voice response
+
+TRIAL_RESULTS_PATTERN = "*_Results_trials*.csv"
+# Pattern of the trial results files
+
+RESCORED_SUFFIX = "_rescored"
+# Suffix of the re-scored trial results files
+
+ONSET_COLUMN = 'response_sound_onset_clock_time'
+# Column of the sound onset detected during the session
+
+RESCORED_ONSET_COLUMN = 'rescored_response_sound_onset_clock_time'
+# Column of the re-scored sound onset
+
+WAV_PATTERN = "*_{trial_id}.wav"
+# Default pattern of the trial records in a block folder
+
+def main():
+    """Detects again the sound onsets of all trial records of a results tree
+    with new detector parameters.
+
+    Each trial results file is processed by a worker of a process pool, and
+    the records are mapped in memory. The re-scored onsets are written in a
+    copy of the trial results file, in a column next to the original onsets.
+
+    The clock time of an onset is the clock time of the original onset, moved
+    by the difference between the new onset and the onset detected offline
+    with the parameters of the session. Without original onset, the clock time
+    is computed from the start column of the trial. An onset that cannot be
+    detected, or a trial without record, is scored -1.
+    """
+    parser = argparse.ArgumentParser(
+        description="Offline re-scoring of the voice responses of recorded "+
+        "sessions.")
+    parser.add_argument('root', nargs='?', default=RESULT_FOLDER,
+                        help="Root folder of the results tree.")
+    parser.add_argument('--values', default=VALUES_FILE,
+                        help="JSON file of the values used during the "+
+                        "sessions.")
+    parser.add_argument('--onset-level', type=float,
+                        help="Threshold level for detecting onset.")
+    parser.add_argument('--offset-level', type=float,
+                        help="Threshold level for detecting offset.")
+    parser.add_argument('--onset-window', type=int,
+                        help="Number of chunks of the onset condition.")
+    parser.add_argument('--offset-window', type=int,
+                        help="Number of chunks of the offset condition.")
+    parser.add_argument('--min-duration', type=float,
+                        help="Minimum duration in seconds of a response.")
+    parser.add_argument('--wav-pattern', default=WAV_PATTERN,
+                        help="Pattern of the trial records relative to the "+
+                        "block folder, formatted with the trial fields.")
+    parser.add_argument('--start-column', default='start_stimulus_clock_time',
+                        help="Column of the clock time of the record start, "+
+                        "used for trials without original onset.")
+    parser.add_argument('--workers', type=int,
+                        default=multiprocessing.cpu_count(),
+                        help="Number of worker processes.")
+    parser.add_argument('--overwrite', action='store_true',
+                        help="Re-score files already re-scored.")
+    args = parser.parse_args()
+
+    original_parameters = loadParameters(args.values)
+    parameters = dict(original_parameters)
+    for key, value in [('threshold_level_onset', args.onset_level),
+                       ('threshold_level_offset', args.offset_level),
+                       ('onset_window', args.onset_window),
+                       ('offset_window', args.offset_window),
+                       ('minimum_duration', args.min_duration)]:
+        if value is not None:
+            parameters[key] = value
+    print("INFO: Session parameters "+_formatParameters(original_parameters))
+    print("INFO: New parameters "+_formatParameters(parameters))
+
+    filenames = findTrialResults(args.root)
+    tasks = []
+    for filename in filenames:
+        if (not args.overwrite and
+                os.path.isfile(_getRescoredFilename(filename))):
+            print("INFO: Skip "+filename+", already re-scored.")
+            continue
+        tasks.append((filename, original_parameters, parameters,
+                      args.wav_pattern, args.start_column))
+    if len(tasks) == 0:
+        print("INFO: No trial results to re-score.")
+        return
+    pool = multiprocessing.Pool(max(1, min(args.workers, len(tasks))))
+    try:
+        trial_count = 0
+        missing_count = 0
+        for filename, result in pool.imap_unordered(_rescoreTask, tasks):
+            if result is None:
+                continue
+            trial_count += result['trials']
+            missing_count += result['missing']
+            print(filename+"\t"+str(result['trials'])+" trials\t"+
+                  str(result['onsets'])+" onsets\t"+
+                  str(result['missing'])+" missing records")
+    finally:
+        pool.close()
+        pool.join()
+    print("INFO: "+str(len(tasks))+" files, "+str(trial_count)+" trials, "+
+          str(missing_count)+" missing records.")
+
+def loadParameters(values_file):
+    """Returns the detector parameters of the sessions.
+
+    Parameters
+    ----------
+    :param str values_file:
+        The JSON file of the values, the default values of the experiment are
+        used for the values not in the file.
+
+    Return
+    ------
+    :rtype dict
+        The detector parameters.
+    """
+    values = {
+        'audio_threshold_level_onset': THRESHOLD_LEVEL_ONSET,
+        'audio_threshold_level_offset': THRESHOLD_LEVEL_OFFSET,
+        'audio_window_onset': DETECTION_WINDOW,
+        'audio_window_offset': DETECTION_WINDOW,
+        'minimum_audio_response_duration': MINIMUM_RESPONSE_DURATION
+        }
+    if values_file and os.path.isfile(values_file):
+        with open(values_file, 'r') as fp:
+            values.update(json.load(fp))
+    else:
+        print("WARNING: No values file, default values used.")
+    return {
+        'threshold_level_onset': values['audio_threshold_level_onset'],
+        'threshold_level_offset': values['audio_threshold_level_offset'],
+        'onset_window': values['audio_window_onset'],
+        'offset_window': values['audio_window_offset'],
+        'minimum_duration': values['minimum_audio_response_duration']
+        }
+
+def findTrialResults(root):
+    """Returns the trial results files of a results tree, without the
+    re-scored files.
+    """
+    filenames = []
+    for folder, _, files in os.walk(root):
+        for name in fnmatch.filter(files, TRIAL_RESULTS_PATTERN):
+            if not os.path.splitext(name)[0].endswith(RESCORED_SUFFIX):
+                filenames.append(os.path.join(folder, name))
+    filenames.sort()
+    return filenames
+
+def rescoreTrialResults(filename, original_parameters, parameters,
+                        wav_pattern, start_column):
+    """Re-scores the trials of a trial results file and writes the re-scored
+    file.
+
+    Parameters
+    ----------
+    :param str filename:
+        The trial results file.
+    :param dict original_parameters:
+        The detector parameters of the session.
+    :param dict parameters:
+        The new detector parameters.
+    :param str wav_pattern:
+        The pattern of the records relative to the block folder.
+    :param str start_column:
+        The column of the clock time of the record start.
+
+    Return
+    ------
+    :rtype dict
+        The number of trials, of onsets detected and of missing records.
+    """
+    with _openCsv(filename, 'r') as fr:
+        reader = csv.DictReader(fr, delimiter='\t')
+        fieldnames = list(reader.fieldnames)
+        rows = list(reader)
+    if ONSET_COLUMN in fieldnames:
+        fieldnames.insert(fieldnames.index(ONSET_COLUMN)+1,
+                          RESCORED_ONSET_COLUMN)
+    else:
+        fieldnames.append(RESCORED_ONSET_COLUMN)
+    block_folder = os.path.dirname(filename)
+    result = {'trials': len(rows), 'onsets': 0, 'missing': 0}
+    for row in rows:
+        wav_filename = findRecord(block_folder, wav_pattern, row)
+        if wav_filename is None:
+            result['missing'] += 1
+            row[RESCORED_ONSET_COLUMN] = -1
+            continue
+        onset_clock_time = rescoreRecord(wav_filename, row, original_parameters,
+                                         parameters, start_column)
+        if onset_clock_time >= 0:
+            result['onsets'] += 1
+        row[RESCORED_ONSET_COLUMN] = onset_clock_time
+    with _openCsv(_getRescoredFilename(filename), 'w') as fw:
+        writer = csv.DictWriter(fw, fieldnames=fieldnames, delimiter='\t')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+    return result
+
+def findRecord(block_folder, wav_pattern, row):
+    """Returns the record of a trial, or None if there is no record.
+    """
+    try:
+        pattern = wav_pattern.format(**row)
+    except (KeyError, IndexError, ValueError):
+        return None
+    wav_filenames = sorted(glob.glob(os.path.join(block_folder, pattern)))
+    if len(wav_filenames) == 0:
+        return None
+    if len(wav_filenames) > 1:
+        print("WARNING: Several records for '"+pattern+"', "+
+              wav_filenames[0]+" used.")
+    return wav_filenames[0]
+
+def rescoreRecord(wav_filename, row, original_parameters, parameters,
+                  start_column):
+    """Returns the clock time of the re-scored onset of a trial.
+
+    Parameters
+    ----------
+    :param str wav_filename:
+        The record of the trial.
+    :param dict row:
+        The fields of the trial.
+    :param dict original_parameters:
+        The detector parameters of the session.
+    :param dict parameters:
+        The new detector parameters.
+    :param str start_column:
+        The column of the clock time of the record start.
+
+    Return
+    ------
+    :rtype int
+        The clock time in nanoseconds of the onset, or -1 if no onset is
+        detected.
+    """
+    try:
+        rate, samples = readWav(wav_filename)
+    except (IOError, OSError, ValueError) as e:
+        print("WARNING: Unable to read "+wav_filename+". "+str(e))
+        return -1
+    powers, baselines = chunkPowers(samples, rate)
+    elapsed = detectOnset(powers, baselines, parameters)
+    if elapsed is None:
+        return -1
+    original_clock_time = _toInt(row.get(ONSET_COLUMN))
+    if original_clock_time is not None and original_clock_time >= 0:
+        original_elapsed = detectOnset(powers, baselines, original_parameters)
+        if original_elapsed is not None:
+            return original_clock_time+toNs(elapsed-original_elapsed)
+    start_clock_time = _toInt(row.get(start_column))
+    if start_clock_time is None or start_clock_time < 0:
+        return -1
+    return start_clock_time+toNs(elapsed)
+
+def detectOnset(powers, baselines, parameters):
+    """Returns the time of the first onset of a response in a record.
+
+    An onset starts a response if the sound lasts at least the minimum
+    duration, or until the end of the record.
+
+    Parameters
+    ----------
+    :param numpy.ndarray powers:
+        The power of the chunks of the record.
+    :param numpy.ndarray baselines:
+        The baseline power of the chunks of the record.
+    :param dict parameters:
+        The detector parameters.
+
+    Return
+    ------
+    :rtype float
+        The time in seconds of the onset since the start of the record, or
+        None if there is no response.
+    """
+    detector = ThresholdOnsetDetector(parameters['threshold_level_onset'],
+                                      parameters['threshold_level_offset'],
+                                      parameters['onset_window'],
+                                      parameters['offset_window'])
+    onset_elapsed = None
+    for onset, chunk_idx in replayChunks(detector, powers, baselines):
+        if onset:
+            onset_elapsed = ((chunk_idx-parameters['onset_window'])*
+                             MS_PER_CHUNK/1000.)
+            continue
+        offset_elapsed = ((chunk_idx-parameters['offset_window'])*
+                          MS_PER_CHUNK/1000.)
+        if offset_elapsed-onset_elapsed >= parameters['minimum_duration']:
+            return onset_elapsed
+        onset_elapsed = None
+    return onset_elapsed
+
+def _rescoreTask(task):
+    """Re-scores a trial results file in a worker process.
+
+    Return
+    ------
+    :rtype tuple
+        The trial results file and the result, or None if the file could not
+        be re-scored.
+    """
+    filename = task[0]
+    try:
+        return (filename, rescoreTrialResults(*task))
+    except (IOError, OSError, csv.Error) as e:
+        print("ERROR: Unable to re-score "+filename+". "+str(e))
+        return (filename, None)
+
+def _getRescoredFilename(filename):
+    """Returns the name of the re-scored file of a trial results file.
+    """
+    base, extension = os.path.splitext(filename)
+    return base+RESCORED_SUFFIX+extension
+
+def _openCsv(filename, mode):
+    """Opens a CSV file in the mode required by the csv module.
+    """
+    if sys.version_info[0] < 3:
+        return open(filename, mode+'b')
+    return open(filename, mode, newline='')
+
+def _toInt(value):
+    """Converts a field to an integer, or returns None.
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+def _formatParameters(parameters):
+    """Returns a one-line description of detector parameters.
+    """
+    return ("onset "+str(parameters['threshold_level_onset'])+"/"+
+            str(parameters['onset_window'])+", offset "+
+            str(parameters['threshold_level_offset'])+"/"+
+            str(parameters['offset_window'])+", min duration "+
+            str(parameters['minimum_duration'])+" s")
+
+if __name__ == "__main__":
+    main()
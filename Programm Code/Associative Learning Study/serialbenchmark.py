@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+
+# Benchmark of the serial port listener of the belt controller
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+from __future__ import print_function
+import argparse
+import os
+import sys
+import time
+from pybelt import transport
+from pybelt.transport import SerialTransport
+from pybelt.clock import clockSec
+
+BYTES_PER_SEC = transport.SERIAL_BAUDRATE//10
+# Transfer rate of the serial connection (8 data bits, start and stop bits)
+
+REPLAY_PERIOD = 0.001
+# Period in seconds of the writes on the pseudo-terminal
+
+def main():
+    """Replays a byte stream through a pseudo-terminal and measures the CPU
+    time used by the serial port listener thread with different read batches.
+
+    The byte stream is read from a capture file, or consists of orientation
+    notifications if no file is given. The pseudo-terminal requires a POSIX
+    system. The CPU time of the listener thread is measured with
+    time.thread_time(), available from Python 3.7.
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark of the serial port listener.")
+    parser.add_argument('--capture', default=None,
+                        help="File with a captured byte stream.")
+    parser.add_argument('--duration', type=float, default=5.0,
+                        help="Duration in seconds of each replay.")
+    parser.add_argument('--batches', default="1,6,60",
+                        help="Comma separated list of minimum batch sizes.")
+    parser.add_argument('--latency-cap', type=float,
+                        default=transport.SERIAL_READ_LATENCY_CAP,
+                        help="Latency cap in seconds.")
+    args = parser.parse_args()
+
+    if args.capture is not None:
+        with open(args.capture, 'rb') as fr:
+            stream = fr.read()
+    else:
+        stream = _orientationStream()
+    if len(stream) == 0:
+        print("ERROR: Empty byte stream.")
+        return
+
+    print("INFO: Replay "+str(len(stream))+" bytes at "+str(BYTES_PER_SEC)+
+          " bytes/s for "+str(args.duration)+" s.")
+    print("reader\tframes\tresyncs\tlistener_cpu_ms\tlistener_cpu_percent")
+    _printResult("read(1)", _replay(stream, args.duration, None,
+                                    args.latency_cap))
+    for min_batch in args.batches.split(','):
+        _printResult("batch "+min_batch.strip(),
+                     _replay(stream, args.duration, int(min_batch),
+                             args.latency_cap))
+
+def _orientationStream():
+    """Returns a byte stream of orientation notifications.
+    """
+    stream = bytearray()
+    for heading in range(360):
+        stream += bytearray([0x03, heading & 0xFF, heading >> 8,
+                             0x00, 0x00, 0x0A])
+    return bytes(stream)
+
+def _replay(stream, duration, min_batch, latency_cap):
+    """Replays a byte stream and returns the statistics of the listener.
+
+    Parameters
+    ----------
+    :param bytes stream:
+        The byte stream to replay (repeated for the duration).
+    :param float duration:
+        The duration of the replay in seconds.
+    :param int min_batch:
+        The minimum batch of the listener, or None for one-byte reads.
+    :param float latency_cap:
+        The latency cap of the listener.
+
+    Return
+    ------
+    :rtype tuple
+        The framer statistics, the CPU time in seconds of the listener thread
+        (-1 if not available) and the duration.
+    """
+    master, slave = os.openpty()
+    controller = _ReplayController()
+    if min_batch is None:
+        serial_transport = _ByteTransport(os.ttyname(slave))
+    else:
+        serial_transport = _ReplayTransport(os.ttyname(slave), min_batch,
+                                            latency_cap)
+    serial_transport.open(controller._handleDataReceived,
+                          controller.disconnectBelt)
+    # Write the stream at the rate of the serial connection
+    chunk_size = max(1, int(BYTES_PER_SEC*REPLAY_PERIOD))
+    position = 0
+    start_time = clockSec()
+    next_write = start_time
+    while clockSec()-start_time < duration:
+        chunk = stream[position:position+chunk_size]
+        if len(chunk) < chunk_size:
+            chunk += stream[:chunk_size-len(chunk)]
+        os.write(master, chunk)
+        position = (position+chunk_size)%len(stream)
+        next_write += REPLAY_PERIOD
+        remaining = next_write-clockSec()
+        if remaining > 0:
+            time.sleep(remaining)
+    time.sleep(latency_cap+0.1)
+    # The listener measures its CPU time until its last read
+    serial_transport.close(True)
+    os.close(master)
+    os.close(slave)
+    return (controller.getFramerStatistics(),
+            serial_transport.listener_cpu_time, duration)
+
+def _printResult(name, result):
+    """Prints a line of results.
+    """
+    statistics, cpu_time, duration = result
+    if cpu_time < 0:
+        cpu_columns = "n/a\tn/a"
+    else:
+        cpu_columns = (str(int(cpu_time*1000))+"\t"+
+                       "{:.1f}".format(cpu_time/duration*100))
+    print(name+"\t"+str(statistics['frames'])+"\t"+
+          str(statistics['resyncs'])+"\t"+cpu_columns)
+
+class _ReplayController(object):
+    """Minimal controller that frames the received packets.
+    """
+
+    def __init__(self):
+        self._packet_framer = transport._PacketFramer(
+            sys.version_info > (3,))
+
+    def _handleDataReceived(self, data_received):
+        self._packet_framer.feed(data_received, self._handlePacketReceived)
+
+    def _handlePacketReceived(self, packet_received):
+        pass
+
+    def getFramerStatistics(self):
+        return {
+            'frames': self._packet_framer.frame_count,
+            'resyncs': self._packet_framer.resync_count,
+            'timeouts': self._packet_framer.timeout_count
+            }
+
+    def disconnectBelt(self):
+        pass
+
+class _ReplayTransport(SerialTransport):
+    """Serial transport that measures the CPU time of its listener thread,
+    including the polling while no data are received.
+    """
+
+    def __init__(self, port_name, min_batch=transport.SERIAL_READ_MIN_BATCH,
+                 latency_cap=transport.SERIAL_READ_LATENCY_CAP):
+        SerialTransport.__init__(self, port_name, min_batch, latency_cap)
+        # CPU time in seconds of the listener thread at the end of its last
+        # read, -1 if not available
+        self.listener_cpu_time = -1
+
+    def _read(self):
+        try:
+            return self._readData()
+        finally:
+            # CPU time of the listener thread since its start
+            thread_time = getattr(time, 'thread_time', None)
+            if thread_time is not None:
+                self.listener_cpu_time = thread_time()
+
+    def _readData(self):
+        return SerialTransport._read(self)
+
+class _ByteTransport(_ReplayTransport):
+    """Serial transport reading one byte per call, as before batched reads.
+    """
+
+    def _readData(self):
+        return self._serial_port.read()
+
+if __name__ == "__main__":
+    main()
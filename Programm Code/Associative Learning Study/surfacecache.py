@@ -0,0 +1,154 @@
+# Cache of pre-rendered text surfaces.
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+from collections import OrderedDict
+
+SIZE_CACHE_MAX_ENTRIES = 4096
+# Maximum number of text sizes kept by the cache
+
+class SurfaceCache(object):
+    """Least-recently-used cache of rendered surfaces with a memory cap.
+
+    Surfaces are identified by a key, typically the tuple (text, font, color,
+    background). When the memory used by the cached surfaces exceeds the cap,
+    the least recently used surfaces are discarded, except the pinned ones.
+    """
+
+    def __init__(self, max_bytes=32*1024*1024):
+        """Constructor.
+
+        Parameters
+        ----------
+        :param int max_bytes:
+            The maximum memory in bytes used by the cached surfaces.
+        """
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        # Statistics of the surface lookups
+        self.hits = 0
+        self.misses = 0
+        # Surfaces and memory size by key, in order of use
+        self._surfaces = OrderedDict()
+        # Text sizes by (text, font)
+        self._sizes = {}
+        # Keys of the surfaces that cannot be discarded
+        self._pinned = set()
+
+    def get(self, key, render_function):
+        """Returns the surface for a key, and renders it if not in cache.
+
+        Parameters
+        ----------
+        :param tuple key:
+            The key of the surface.
+        :param function render_function:
+            Function without argument that renders the surface on a miss.
+
+        Return
+        ------
+        :rtype Surface
+            The surface.
+        """
+        entry = self._surfaces.pop(key, None)
+        if entry is not None:
+            self.hits += 1
+            self._surfaces[key] = entry
+            return entry[0]
+        self.misses += 1
+        surface = render_function()
+        surface_bytes = surface.get_pitch()*surface.get_height()
+        self._surfaces[key] = (surface, surface_bytes)
+        self.used_bytes += surface_bytes
+        if self.used_bytes > self.max_bytes:
+            self._discard()
+        return surface
+
+    def render(self, text, font, color, background=None):
+        """Returns an anti-aliased text surface as rendered by
+        ``font.render(text, True, color, background)``.
+        """
+        key = textKey(text, font, color, background)
+        return self.get(key, lambda: font.render(text, True, color,
+                                                 background))
+
+    def size(self, text, font):
+        """Returns the size (width, height) of a text rendered with a font,
+        without rendering the text. Size lookups are not counted in the
+        statistics.
+        """
+        key = (text, font)
+        text_size = self._sizes.get(key)
+        if text_size is not None:
+            return text_size
+        text_size = font.size(text)
+        if len(self._sizes) >= SIZE_CACHE_MAX_ENTRIES:
+            self._sizes.clear()
+        self._sizes[key] = text_size
+        return text_size
+
+    def pin(self, key):
+        """Pins a cached surface so that it is never discarded.
+
+        Return
+        ------
+        :rtype int
+            The memory in bytes of the surface, or 0 if the surface is not in
+            cache.
+        """
+        entry = self._surfaces.get(key)
+        if entry is None:
+            return 0
+        self._pinned.add(key)
+        return entry[1]
+
+    def unpin(self, key):
+        """Unpins a surface.
+        """
+        self._pinned.discard(key)
+        if self.used_bytes > self.max_bytes:
+            self._discard()
+
+    def getPinnedBytes(self):
+        """Returns the memory in bytes used by pinned surfaces.
+        """
+        pinned_bytes = 0
+        for key in self._pinned:
+            pinned_bytes += self._surfaces[key][1]
+        return pinned_bytes
+
+    def clear(self):
+        """Removes all surfaces and sizes from the cache.
+        """
+        self._surfaces.clear()
+        self._sizes.clear()
+        self._pinned.clear()
+        self.used_bytes = 0
+
+    def _discard(self):
+        """Discards least recently used surfaces until the memory cap is
+        respected. Pinned surfaces and the most recent surface are kept.
+        """
+        for key in list(self._surfaces.keys())[:-1]:
+            if self.used_bytes <= self.max_bytes:
+                break
+            if key in self._pinned:
+                continue
+            _, discarded_bytes = self._surfaces.pop(key)
+            self.used_bytes -= discarded_bytes
+
+def textKey(text, font, color, background=None):
+    """Returns the cache key of a text surface.
+    """
+    return (text, font, _colorKey(color), _colorKey(background))
+
+def _colorKey(color):
+    """Returns a hashable value for a color.
+    """
+    if color is None:
+        return None
+    return tuple(color)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+# Test of the cache of pre-rendered text surfaces
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+import unittest
+import pygame
+from surfacecache import SurfaceCache, textKey
+
+class _Font(object):
+    """Font that renders a surface of one pixel per character, and counts
+    the calls.
+    """
+
+    def __init__(self):
+        self.render_count = 0
+        self.size_count = 0
+
+    def render(self, text, antialias, color, background=None):
+        self.render_count += 1
+        return pygame.Surface((len(text), 1), 0, 32)
+
+    def size(self, text):
+        self.size_count += 1
+        return (len(text), 1)
+
+def _surface(width):
+    """Returns a surface of 4 bytes per pixel and 1 row.
+    """
+    return pygame.Surface((width, 1), 0, 32)
+
+class SurfaceCacheTest(unittest.TestCase):
+
+    def testHitAndMiss(self):
+        cache = SurfaceCache()
+        surface = cache.get('a', lambda: _surface(10))
+        self.assertIs(cache.get('a', lambda: _surface(10)), surface)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(cache.used_bytes, surface.get_pitch())
+
+    def testLeastRecentlyUsedIsDiscarded(self):
+        cache = SurfaceCache(max_bytes=250)
+        cache.get('a', lambda: _surface(25))
+        cache.get('b', lambda: _surface(25))
+        cache.get('a', lambda: _surface(25))
+        cache.get('c', lambda: _surface(25))
+        self.assertEqual(cache.used_bytes, 200)
+        cache.get('a', lambda: _surface(25))
+        cache.get('c', lambda: _surface(25))
+        self.assertEqual((cache.hits, cache.misses), (3, 3))
+        cache.get('b', lambda: _surface(25))
+        self.assertEqual(cache.misses, 4)
+
+    def testPinnedSurfaceIsKept(self):
+        cache = SurfaceCache(max_bytes=250)
+        cache.get('a', lambda: _surface(25))
+        self.assertEqual(cache.pin('a'), 100)
+        cache.get('b', lambda: _surface(25))
+        cache.get('c', lambda: _surface(25))
+        self.assertEqual(cache.getPinnedBytes(), 100)
+        cache.get('a', lambda: _surface(25))
+        self.assertEqual(cache.misses, 3)
+        self.assertEqual(cache.pin('d'), 0)
+
+    def testMostRecentSurfaceIsKeptAboveCap(self):
+        cache = SurfaceCache(max_bytes=50)
+        surface = cache.get('a', lambda: _surface(25))
+        self.assertIs(cache.get('a', lambda: _surface(25)), surface)
+
+    def testUnpinDiscardsAboveCap(self):
+        cache = SurfaceCache(max_bytes=150)
+        cache.get('a', lambda: _surface(25))
+        cache.pin('a')
+        cache.get('b', lambda: _surface(25))
+        self.assertEqual(cache.used_bytes, 200)
+        cache.unpin('a')
+        self.assertEqual(cache.used_bytes, 100)
+        self.assertEqual(cache.getPinnedBytes(), 0)
+
+    def testRenderUsesTextKey(self):
+        cache = SurfaceCache()
+        font = _Font()
+        surface = cache.render("text", font, pygame.Color(255, 0, 0))
+        self.assertIs(cache.get(textKey("text", font, (255, 0, 0, 255)),
+                                None), surface)
+        cache.render("text", font, pygame.Color(255, 0, 0), (0, 0, 0))
+        self.assertEqual(font.render_count, 2)
+
+    def testSizeIsNotCounted(self):
+        cache = SurfaceCache()
+        font = _Font()
+        self.assertEqual(cache.size("text", font), (4, 1))
+        self.assertEqual(cache.size("text", font), (4, 1))
+        self.assertEqual(font.size_count, 1)
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+
+    def testClear(self):
+        cache = SurfaceCache()
+        cache.get('a', lambda: _surface(25))
+        cache.pin('a')
+        cache.clear()
+        self.assertEqual(cache.used_bytes, 0)
+        self.assertEqual(cache.getPinnedBytes(), 0)
+
+if __name__ == "__main__":
+    unittest.main()
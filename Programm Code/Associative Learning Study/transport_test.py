@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+
+# Test of the framing of incoming belt packets
+
+# Copyright 2017-2018, feelSpace GmbH, <info@feelspace.de>
+# All rights reserved. Do not redistribute, sell or publish without the
+# prior explicit written consent of the copyright owner.
+
+# Last update: 17.10.2026
+
+import sys
+import unittest
+from pybelt.transport import (_PacketFramer, BeltTransport, MemoryTransport,
+                              INCOMING_PACKET_TIMEOUT, RECEIVE_BUFFER_SIZE)
+
+PACKETS = [b'\x01\x00\x00\x00\x00\x0A', b'\xC7\x01\x00\x00\x00\x0A',
+           b'\x03\x10\x00\x20\x00\x0A']
+# Belt packets terminated by 0x0A
+
+class PacketFramerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.framer = _PacketFramer(sys.version_info > (3,))
+        self.packets = []
+
+    def _feed(self, data):
+        # Views are only valid during the call of the handler
+        self.framer.feed(data, lambda packet:
+                         self.packets.append(bytes(bytearray(packet))))
+
+    def testPacketsInOneRead(self):
+        self._feed(b''.join(PACKETS))
+        self.assertEqual(self.packets, PACKETS)
+        self.assertEqual(self.framer.frame_count, 3)
+
+    def testPacketSplitAcrossReads(self):
+        data = b''.join(PACKETS)
+        for position in range(len(data)):
+            self._feed(data[position:position+1])
+        self.assertEqual(self.packets, PACKETS)
+        self.assertEqual(self.framer.resync_count, 0)
+
+    def testResyncOnMissingTerminator(self):
+        self._feed(b'\x55\x55'+PACKETS[0]+PACKETS[1])
+        self.assertEqual(self.packets, PACKETS[:2])
+        self.assertEqual(self.framer.resync_count, 1)
+
+    def testIncompletePacketTimeout(self):
+        self._feed(PACKETS[0][:3])
+        self.framer._packet_start_time -= INCOMING_PACKET_TIMEOUT+0.1
+        self._feed(PACKETS[1])
+        self.assertEqual(self.packets, [PACKETS[1]])
+        self.assertEqual(self.framer.timeout_count, 1)
+
+    def testBufferWrapAround(self):
+        packet_count = RECEIVE_BUFFER_SIZE//len(PACKETS[0])*2+1
+        for _ in range(packet_count):
+            self._feed(PACKETS[0][:4])
+            self._feed(PACKETS[0][4:])
+        self.assertEqual(self.packets, [PACKETS[0]]*packet_count)
+
+    def testPython2Packets(self):
+        framer = _PacketFramer(False)
+        packets = []
+        framer.feed(PACKETS[1], packets.append)
+        self.assertIsInstance(packets[0], bytearray)
+        self.assertEqual(packets[0][0], 0xC7)
+
+    def testReset(self):
+        self._feed(PACKETS[0]+PACKETS[1][:2])
+        self.framer.reset()
+        self._feed(PACKETS[2])
+        self.assertEqual(self.packets, [PACKETS[0], PACKETS[2]])
+        self.assertEqual(self.framer.frame_count, 1)
+
+class BeltTransportTest(unittest.TestCase):
+
+    def testBackendMethodsAreAbstract(self):
+        self.assertRaises(TypeError, BeltTransport, "Transport")
+
+        class _ReadOnlyTransport(BeltTransport):
+            def _read(self):
+                return b''
+        self.assertRaises(TypeError, _ReadOnlyTransport, "Transport")
+
+    def testMemoryTransport(self):
+        written = []
+        memory_transport = MemoryTransport(written.append)
+        memory_transport.write(PACKETS[0])
+        self.assertEqual(written, [PACKETS[0]])
+
+if __name__ == "__main__":
+    unittest.main()